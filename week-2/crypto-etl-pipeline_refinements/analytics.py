@@ -0,0 +1,207 @@
+# analytics.py - Streaming rolling-window price analytics per coin
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from logger import setup_logger
+from config import Config
+from load import ANALYTICS_COLUMNS, get_loader
+
+logger = setup_logger('Analytics')
+
+class RollingAnalytics:
+    """
+    Last `window` prices of every coin in one 2-D ring buffer (a row per
+    coin), with running sums for mean/std and running min/max. A tick costs
+    O(1): the sums are adjusted by the value written and the one evicted,
+    and a row's min/max is only rescanned when the evicted value was the
+    extreme. Each batch updates all coins at once with numpy.
+
+    The z-score compares a price with the window *before* it, so a spike
+    does not dampen its own score.
+    """
+
+    def __init__(self, window=None, z_threshold=None, min_periods=None, capacity=64):
+        self.window = window or Config.ANALYTICS_WINDOW
+        self.z_threshold = z_threshold or Config.ANALYTICS_Z_THRESHOLD
+        self.min_periods = min_periods or Config.ANALYTICS_MIN_PERIODS
+        self.ids = pd.Index([], dtype=object)
+        self.lock = threading.Lock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """(Re)size every per-coin array, keeping existing rows"""
+        fields = {
+            'values': np.full((capacity, self.window), np.nan),
+            'head': np.zeros(capacity, dtype=np.int64),
+            'count': np.zeros(capacity, dtype=np.int64),
+            'ticks': np.zeros(capacity, dtype=np.int64),
+            # Sums are kept relative to a per-coin shift so the variance of
+            # large prices does not drown in floating-point cancellation
+            'shift': np.zeros(capacity),
+            'total': np.zeros(capacity),
+            'total_sq': np.zeros(capacity),
+            'minimum': np.full(capacity, np.inf),
+            'maximum': np.full(capacity, -np.inf),
+        }
+        for name, array in fields.items():
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+
+    def _rows(self, crypto_ids):
+        """Buffer row of every id, adding rows for coins seen for the first time"""
+        rows = self.ids.get_indexer(crypto_ids)
+        if (rows == -1).any():
+            new_ids = pd.unique(crypto_ids[rows == -1])
+            self.ids = self.ids.append(pd.Index(new_ids, dtype=object))
+            if len(self.ids) > len(self.head):
+                self._allocate(max(len(self.ids), 2 * len(self.head)))
+            rows = self.ids.get_indexer(crypto_ids)
+        return rows
+
+    def _stats(self, rows):
+        """Mean and sample std of the current windows"""
+        n = self.count[rows]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_offset = self.total[rows] / n
+            variance = (self.total_sq[rows] - self.total[rows] * mean_offset) / (n - 1)
+        mean = np.where(n > 0, self.shift[rows] + mean_offset, np.nan)
+        std = np.where(n > 1, np.sqrt(np.clip(variance, 0, None)), np.nan)
+        return mean, std
+
+    def _rebase(self, rows):
+        """Recompute sums and extremes from the buffer, bounding rounding drift"""
+        values = self.values[rows]
+        shift = np.nanmean(values, axis=1)
+        offset = values - shift[:, None]
+        self.shift[rows] = shift
+        self.total[rows] = np.nansum(offset, axis=1)
+        self.total_sq[rows] = np.nansum(offset ** 2, axis=1)
+        self.minimum[rows] = np.nanmin(values, axis=1)
+        self.maximum[rows] = np.nanmax(values, axis=1)
+
+    def _push(self, rows, prices):
+        """One tick for each row (rows are unique). Returns: z-score vs the previous window."""
+        mean_before, std_before = self._stats(rows)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            zscore = np.where(
+                (self.count[rows] >= self.min_periods) & (std_before > 0),
+                (prices - mean_before) / std_before,
+                np.nan
+            )
+
+        first = self.count[rows] == 0
+        self.shift[rows[first]] = prices[first]
+
+        full = self.count[rows] == self.window
+        head = self.head[rows]
+        evicted = np.where(full, self.values[rows, head], np.nan)
+        self.values[rows, head] = prices
+        self.head[rows] = (head + 1) % self.window
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+        self.ticks[rows] += 1
+
+        shift = self.shift[rows]
+        evicted_offset = np.where(full, evicted - shift, 0.0)
+        self.total[rows] += (prices - shift) - evicted_offset
+        self.total_sq[rows] += (prices - shift) ** 2 - evicted_offset ** 2
+
+        rescan = full & ((evicted <= self.minimum[rows]) | (evicted >= self.maximum[rows]))
+        self.minimum[rows] = np.minimum(self.minimum[rows], prices)
+        self.maximum[rows] = np.maximum(self.maximum[rows], prices)
+
+        rebase = rescan | (self.ticks[rows] % self.window == 0)
+        if rebase.any():
+            self._rebase(rows[rebase])
+
+        return zscore
+
+    def _apply(self, crypto_ids, prices, extracted_at):
+        """
+        Feed every tick in time order. A coin appearing k times in the batch
+        is updated in k vectorized rounds. Returns: Per-row result columns.
+        """
+        size = len(prices)
+        results = {name: np.full(size, np.nan) for name in ANALYTICS_COLUMNS[:-1]}
+
+        rows = self._rows(crypto_ids)
+        order = np.argsort(extracted_at, kind='stable')
+        if len(np.unique(rows)) == size:
+            # Usual live batch: one tick per coin, a single round
+            occurrence = np.zeros(size, dtype=np.int64)
+        else:
+            occurrence = pd.Series(rows[order]).groupby(rows[order]).cumcount().to_numpy()
+
+        for k in range(occurrence.max() + 1 if size else 0):
+            positions = order[occurrence == k]
+            positions = positions[~np.isnan(prices[positions])]
+            if not len(positions):
+                continue
+
+            tick_rows = rows[positions]
+            results['price_zscore'][positions] = self._push(tick_rows, prices[positions])
+            mean, std = self._stats(tick_rows)
+            results['rolling_mean'][positions] = mean
+            results['rolling_std'][positions] = std
+            results['rolling_min'][positions] = self.minimum[tick_rows]
+            results['rolling_max'][positions] = self.maximum[tick_rows]
+
+        return results
+
+    def update(self, df):
+        """Returns: df with ANALYTICS_COLUMNS appended"""
+        if df.empty:
+            return df
+
+        with self.lock:
+            results = self._apply(
+                df['crypto_id'].astype(str).to_numpy(),
+                df['price_inr'].to_numpy(dtype='float64', na_value=np.nan),
+                df['extracted_at'].to_numpy()
+            )
+
+        results['is_price_anomaly'] = pd.array(np.abs(results['price_zscore']) >= self.z_threshold, dtype='boolean')
+        # One concat instead of a column insert per result
+        df = pd.concat([df, pd.DataFrame(results, index=df.index)], axis=1)
+
+        if results['is_price_anomaly'].any():
+            anomalies = df[df['is_price_anomaly']]
+            flagged = ', '.join(f"{c} (z={z:+.1f})" for c, z in zip(anomalies['crypto_id'], anomalies['price_zscore']))
+            logger.warning(f"⚠ Price anomalies: {flagged}")
+        return df
+
+    def warm_start(self, history):
+        """Fill the windows from recent (crypto_id, price_inr, extracted_at) history"""
+        if history.empty:
+            return
+        with self.lock:
+            self._apply(
+                history['crypto_id'].astype(str).to_numpy(),
+                history['price_inr'].to_numpy(dtype='float64', na_value=np.nan),
+                history['extracted_at'].to_numpy()
+            )
+        logger.info(f"✓ Analytics warmed with {len(history)} prices for {history['crypto_id'].nunique()} coins")
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+def get_analytics():
+    """
+    Return the process-wide RollingAnalytics, warm-started from the last
+    ANALYTICS_WARM_START_HOURS of crypto_prices on first use
+    """
+    global _analytics
+    if _analytics is None:
+        with _analytics_lock:
+            if _analytics is None:
+                analytics = RollingAnalytics()
+                if Config.ANALYTICS_WARM_START_HOURS > 0:
+                    since = datetime.now() - timedelta(hours=Config.ANALYTICS_WARM_START_HOURS)
+                    try:
+                        analytics.warm_start(get_loader().recent_history(since, analytics.window))
+                    except Exception as e:
+                        logger.warning(f"Analytics warm start failed, starting cold: {e}")
+                _analytics = analytics
+    return _analytics
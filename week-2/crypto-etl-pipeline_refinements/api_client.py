@@ -0,0 +1,299 @@
+# api_client.py - Rate-limited, retrying, cached access to the CoinGecko API
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from logger import setup_logger
+from config import Config
+
+logger = setup_logger('ApiClient')
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at calls_per_minute.
+    `capacity` bounds how many calls may go out back to back.
+    """
+
+    def __init__(self, calls_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = calls_per_minute / 60.0
+        self.capacity = capacity or max(1, calls_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated_at = clock()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Block until a call may be made. Returns: Seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """Hold every caller for `seconds`, e.g. after a Retry-After"""
+        with self.lock:
+            now = self.clock()
+            self.paused_until = max(self.paused_until, now + seconds)
+            # The server asked us to back off, so do not burst when it ends
+            self._refill(now)
+            self.tokens = 0.0
+
+def parse_retry_after(value, now=None):
+    """Retry-After as seconds (delta-seconds or HTTP-date), None if absent/invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+def create_session():
+    """
+    Keep-alive session with a connection pool sized for the shard workers.
+    Retries are left to RequestScheduler so they stay within the budget.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        max_retries=0
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+        'User-Agent': 'crypto-etl-pipeline/1.0'
+    })
+    return session
+
+class RequestScheduler:
+    """
+    Sends GET requests within the API budget. Transient failures (timeouts,
+    connection errors, 429 and 5xx) are retried with exponential backoff and
+    jitter; a Retry-After header pauses every caller sharing the budget,
+    for at most backoff_max seconds.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, calls_per_minute=None, max_retries=None, backoff_base=None,
+                 backoff_max=None, session=None, clock=time.monotonic, sleep=time.sleep):
+        self.bucket = TokenBucket(
+            calls_per_minute or Config.API_CALLS_PER_MINUTE,
+            capacity=Config.API_BURST or None,
+            clock=clock,
+            sleep=sleep
+        )
+        self.max_retries = Config.API_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or Config.API_BACKOFF_BASE
+        self.backoff_max = backoff_max or Config.API_BACKOFF_MAX
+        self.session = session or create_session()
+        self.sleep = sleep
+        self.stats = {'requests': 0, 'throttled': 0, 'rate_limited': 0, 'retried': 0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def backoff(self, attempt):
+        """Exponential backoff with jitter for the given retry attempt (0-based)"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        """GET url within the budget. Returns: The final requests.Response."""
+        timeout = timeout or Config.API_TIMEOUT
+
+        for attempt in range(self.max_retries + 1):
+            if self.bucket.acquire() > 0:
+                self._count('throttled')
+            self._count('requests')
+
+            try:
+                response = self.session.get(url, params=params, timeout=timeout, headers=headers)
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"Request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                self._count('retried')
+                self.sleep(delay)
+                continue
+
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                return response
+
+            if response.status_code == 429:
+                self._count('rate_limited')
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                logger.warning(f"HTTP {response.status_code}, server asked to wait {retry_after:.1f}s")
+                # A misbehaving server (or a far-off HTTP-date) must not stall every caller for hours
+                if retry_after > self.backoff_max:
+                    logger.warning(f"⚠ Retry-After capped at API_BACKOFF_MAX ({self.backoff_max:g}s)")
+                    retry_after = self.backoff_max
+                self.bucket.pause(retry_after)
+            else:
+                delay = self.backoff(attempt)
+                logger.warning(f"HTTP {response.status_code}, retrying in {delay:.1f}s")
+                self.sleep(delay)
+            self._count('retried')
+
+        return response
+
+    def snapshot_stats(self):
+        """Copy of the request counters"""
+        with self.stats_lock:
+            return dict(self.stats)
+
+class CacheEntry:
+    """Parsed response body plus the validators needed to revalidate it"""
+
+    def __init__(self, data, expires_at, etag=None, last_modified=None):
+        self.data = data
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+class ApiClient:
+    """
+    JSON GETs through the scheduler with an in-memory TTL cache.
+    Expired entries are revalidated with If-None-Match / If-Modified-Since,
+    and concurrent callers for the same key share one in-flight request.
+    Cached payloads are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, scheduler=None, ttl=None, max_entries=None, clock=time.monotonic):
+        self.scheduler = scheduler or RequestScheduler()
+        self.ttl = Config.API_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or Config.API_CACHE_MAX_ENTRIES
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.stats = {'cache_hits': 0, 'revalidated': 0, 'shared': 0}
+
+    @staticmethod
+    def cache_key(url, params):
+        return url, tuple(sorted((params or {}).items()))
+
+    def get_json(self, url, params=None, ttl=None):
+        """Parsed JSON for url + params, served from cache while fresh"""
+        ttl = self.ttl if ttl is None else ttl
+        key = self.cache_key(url, params)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.clock() < entry.expires_at:
+                self.stats['cache_hits'] += 1
+                return entry.data
+
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats['shared'] += 1
+                owner = False
+            else:
+                future = Future()
+                self.in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            data = self._fetch(key, url, params, ttl, entry)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def _fetch(self, key, url, params, ttl, stale):
+        headers = {}
+        if stale is not None:
+            if stale.etag:
+                headers['If-None-Match'] = stale.etag
+            if stale.last_modified:
+                headers['If-Modified-Since'] = stale.last_modified
+
+        response = self.scheduler.get(url, params=params, headers=headers or None)
+
+        if response.status_code == 304 and stale is not None:
+            with self.lock:
+                stale.expires_at = self.clock() + ttl
+                self.entries.move_to_end(key)
+                self.stats['revalidated'] += 1
+            return stale.data
+
+        response.raise_for_status()
+        data = response.json()
+
+        if ttl > 0:
+            entry = CacheEntry(
+                data,
+                self.clock() + ttl,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+            with self.lock:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return data
+
+    def snapshot_stats(self):
+        """Request counters from the scheduler merged with cache counters"""
+        stats = self.scheduler.snapshot_stats()
+        with self.lock:
+            stats.update(self.stats)
+        return stats
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_api_client():
+    """Return the process-wide ApiClient so every caller shares one session, budget and cache"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ApiClient()
+    return _client
+
+def get_scheduler():
+    """The RequestScheduler behind the process-wide ApiClient"""
+    return get_api_client().scheduler
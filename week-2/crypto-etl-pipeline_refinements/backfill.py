@@ -0,0 +1,147 @@
+# backfill.py - Parallel, resumable historical backfill of crypto_prices
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from logger import setup_logger
+from config import Config
+from extract import fetch_market_chart_range
+from transform import transform_market_chart
+from load import get_loader
+
+logger = setup_logger('Backfill')
+
+def backfill_windows(start, end, window_days):
+    """Split [start, end) into consecutive windows of at most window_days"""
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + timedelta(days=window_days), end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+class BackfillCheckpoint:
+    """
+    Completed (coin, window) pairs persisted to a JSON file. The file is
+    rewritten atomically after every window, so a crash loses at most the
+    windows that were still in flight.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.completed = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.completed = set(json.load(f).get('completed', []))
+            logger.info(f"Resuming: {len(self.completed)} windows already done ({path})")
+
+    @staticmethod
+    def key(crypto_id, window_start, window_end):
+        return f"{crypto_id}|{window_start:%Y-%m-%dT%H:%M:%S}|{window_end:%Y-%m-%dT%H:%M:%S}"
+
+    def is_done(self, crypto_id, window_start, window_end):
+        return self.key(crypto_id, window_start, window_end) in self.completed
+
+    def mark_done(self, crypto_id, window_start, window_end):
+        with self.lock:
+            self.completed.add(self.key(crypto_id, window_start, window_end))
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'completed': sorted(self.completed)}, f)
+            os.replace(tmp_path, self.path)
+
+def backfill_window(crypto_id, window_start, window_end):
+    """Fetch, transform and bulk-load one coin/window. Returns: Rows inserted."""
+    chart = fetch_market_chart_range(crypto_id, window_start, window_end)
+    df = transform_market_chart(crypto_id, chart)
+    if df.empty:
+        return 0
+    return get_loader().copy_load(df)
+
+def run_backfill(start, end, crypto_ids=None, window_days=None, workers=None, checkpoint_path=None):
+    """
+    Backfill crypto_prices for every coin between start and end.
+    Windows run in parallel across coins and finished windows are skipped
+    on the next run. Returns: True if every window completed.
+    """
+    crypto_ids = crypto_ids or Config.CRYPTO_IDS
+    window_days = window_days or Config.BACKFILL_WINDOW_DAYS
+    workers = workers or Config.BACKFILL_WORKERS
+    checkpoint = BackfillCheckpoint(checkpoint_path or Config.BACKFILL_CHECKPOINT)
+
+    tasks = [
+        (crypto_id, window_start, window_end)
+        for window_start, window_end in backfill_windows(start, end, window_days)
+        for crypto_id in crypto_ids
+        if not checkpoint.is_done(crypto_id, window_start, window_end)
+    ]
+
+    logger.info("=" * 60)
+    logger.info(f"BACKFILL {start:%Y-%m-%d} → {end:%Y-%m-%d} for {len(crypto_ids)} coins")
+    logger.info(f"{len(tasks)} windows to load with {workers} workers")
+    logger.info("=" * 60)
+
+    backfill_start = time.perf_counter()
+    rows_inserted = 0
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill') as pool:
+        futures = {pool.submit(backfill_window, *task): task for task in tasks}
+        for future in as_completed(futures):
+            crypto_id, window_start, window_end = futures[future]
+            try:
+                inserted = future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"✗ {crypto_id} [{window_start:%Y-%m-%d} → {window_end:%Y-%m-%d}] failed: {e}")
+                continue
+
+            checkpoint.mark_done(crypto_id, window_start, window_end)
+            rows_inserted += inserted
+            logger.info(f"✓ {crypto_id} [{window_start:%Y-%m-%d} → {window_end:%Y-%m-%d}]: {inserted} rows")
+
+    elapsed = time.perf_counter() - backfill_start
+    rows_per_sec = rows_inserted / elapsed if elapsed > 0 else 0
+    logger.info("=" * 60)
+    logger.info(f"Backfill inserted {rows_inserted} rows in {elapsed:.1f}s ({rows_per_sec:,.0f} rows/sec)")
+    if failed:
+        logger.warning(f"{failed} windows failed; rerun to resume from the checkpoint")
+    logger.info("=" * 60)
+
+    return failed == 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill crypto_prices history from CoinGecko")
+    parser.add_argument('--start', required=True, type=datetime.fromisoformat, help="UTC start, e.g. 2026-01-01")
+    parser.add_argument('--end', type=datetime.fromisoformat, default=None, help="UTC end (default: now)")
+    parser.add_argument('--ids', default=None, help="Comma-separated coin ids (default: CRYPTO_IDS)")
+    parser.add_argument('--window-days', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default: BACKFILL_CHECKPOINT)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("\n⏪ Starting crypto_prices backfill...\n")
+
+    success = run_backfill(
+        args.start,
+        args.end or datetime.now(timezone.utc).replace(tzinfo=None),
+        crypto_ids=args.ids.split(',') if args.ids else None,
+        window_days=args.window_days,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint
+    )
+
+    if success:
+        print("\n✅ Backfill completed!")
+        sys.exit()
+    else:
+        print("\n❌ Backfill incomplete. Rerun the same command to resume.")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+# memory_report.py - Bytes per row of transformed frames, object layout vs compact schema
+#
+#   python benchmarks/memory_report.py [--coins 100000] [--history-coins 50]
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'benchmark')
+
+import transform
+from transform import apply_compact_schema, memory_per_row, transform_crypto_data, transform_market_chart, transform_market_page
+from transform_benchmark import make_market_page, make_simple_price
+
+def object_layout(df):
+    """The frame as it was before the compact schema: object strings and booleans, float64 numbers"""
+    legacy = df.astype({
+        'crypto_id': object, 'crypto_name': object, 'price_category': object,
+        'market_cap_inr': 'float64', 'volume_24h_inr': 'float64', 'is_positive_change': object,
+    })
+    return legacy.where(legacy.notna(), None).astype({'market_cap_inr': 'float64', 'volume_24h_inr': 'float64'})
+
+def make_history(n_coins, days=90):
+    """Backfill-shaped frame: hourly points for n_coins concatenated"""
+    start = datetime(2026, 1, 1)
+    ts = np.array([(start + timedelta(hours=h)).timestamp() * 1000 for h in range(days * 24)])
+    frames = []
+    for i in range(n_coins):
+        prices = np.random.default_rng(i).lognormal(6, 2, len(ts))
+        chart = {
+            'prices': np.column_stack([ts, prices]).tolist(),
+            'market_caps': np.column_stack([ts, prices * 1e7]).tolist(),
+            'total_volumes': np.column_stack([ts, prices * 1e5]).tolist(),
+        }
+        frames.append(transform_market_chart(f"coin-{i}", chart))
+    # concat falls back to plain strings when categories differ
+    return apply_compact_schema(pd.concat(frames, ignore_index=True))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--coins', type=int, default=100000)
+    parser.add_argument('--history-coins', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    transform.logger.setLevel(logging.WARNING)
+    extracted_at = datetime.now()
+    simple = make_simple_price(args.coins)
+
+    workloads = {
+        f"simple_price ({args.coins:,} coins)": transform_crypto_data(simple, extracted_at),
+        "markets page (250 coins)": transform_market_page(make_market_page(simple)[:250], extracted_at),
+        f"backfill ({args.history_coins} coins x 90d hourly)": make_history(args.history_coins),
+    }
+
+    print(f"{'workload':<36} {'rows':>9} {'object B/row':>13} {'compact B/row':>14} {'saved':>7}")
+    for name, df in workloads.items():
+        before, after = memory_per_row(object_layout(df)), memory_per_row(df)
+        print(f"{name:<36} {len(df):>9,} {before:>13.0f} {after:>14.0f} {1 - after / before:>6.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# storage_benchmark.py - Insert throughput of the SQLite backend vs the Postgres loader
+#
+#   python benchmarks/storage_benchmark.py [--sizes 1000,10000,100000] [--ticks 3]
+#
+# Each size is loaded as `ticks` consecutive batches of new rows (history
+# inserts + snapshot upserts), into a fresh SQLite file and, when DB_* points
+# at a reachable server, into Postgres with both LOAD_METHODs.
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'benchmark')
+
+from transform_benchmark import make_simple_price
+from transform import transform_crypto_data
+from load import PostgresLoader
+from sqlite_backend import SQLiteLoader
+
+def make_batches(n, ticks, seed=42):
+    """ticks frames of n coins, a minute apart"""
+    # Anchored on now, so re-running against the same database still inserts
+    start = datetime.now().replace(microsecond=0) + timedelta(seconds=seed)
+    simple = make_simple_price(n, seed=seed)
+    return [transform_crypto_data(simple, extracted_at=start + timedelta(minutes=tick)) for tick in range(ticks)]
+
+def rows_per_sec(loader, batches, method='load'):
+    """Total rows / total load time"""
+    load = getattr(loader, method)
+    start = time.perf_counter()
+    for df in batches:
+        load(df)
+    return sum(map(len, batches)) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--ticks', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # per-coin verification lines would dominate the timings
+
+    try:
+        postgres = PostgresLoader()
+        postgres.ensure_schema()
+    except Exception as e:
+        print(f"Postgres unavailable, SQLite only ({e.__class__.__name__})")
+        postgres = None
+
+    print(f"{'coins':>8} {'sqlite':>14} {'pg copy':>14} {'pg batch':>14}   (rows/sec over {args.ticks} ticks)")
+    for seed, n in enumerate(int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            sqlite = SQLiteLoader(os.path.join(tmp, 'bench.sqlite3'))
+            sqlite_rate = rows_per_sec(sqlite, make_batches(n, args.ticks, seed=seed))
+            sqlite.close()
+
+        copy_rate = batch_rate = None
+        if postgres is not None:
+            # Fresh timestamps per run so every row is a real insert
+            copy_rate = rows_per_sec(postgres, make_batches(n, args.ticks, seed=1000 + seed), 'copy_load')
+            batch_rate = rows_per_sec(postgres, make_batches(n, args.ticks, seed=2000 + seed), 'batch_load')
+
+        cells = [f"{rate:>14,.0f}" if rate else f"{'-':>14}" for rate in (sqlite_rate, copy_rate, batch_rate)]
+        print(f"{n:>8} {' '.join(cells)}")
+
+    if postgres is not None:
+        postgres.close()
+
+if __name__ == "__main__":
+    main()
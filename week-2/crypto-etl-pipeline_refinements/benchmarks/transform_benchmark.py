@@ -0,0 +1,100 @@
+# transform_benchmark.py - Columnar vs row-wise transform at large coin counts
+#
+#   python benchmarks/transform_benchmark.py [--sizes 1000,10000,100000,250000]
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'benchmark')
+
+import transform
+from transform import transform_crypto_data, transform_market_page
+
+def make_simple_price(n, seed=42):
+    """Synthetic /simple/price response; about 5% of coins lack market data"""
+    rng = random.Random(seed)
+    data = {}
+    for i in range(n):
+        values = {'inr': rng.lognormvariate(6, 4)}
+        if rng.random() > 0.05:
+            values.update({
+                'inr_market_cap': rng.lognormvariate(20, 3),
+                'inr_24h_vol': rng.lognormvariate(16, 3),
+                'inr_24h_change': rng.uniform(-20, 20),
+            })
+        data[f"coin-{i}"] = values
+    return data
+
+def make_market_page(simple):
+    """The same coins as a /coins/markets page"""
+    return [
+        {
+            'id': crypto_id, 'name': crypto_id.title(), 'current_price': values['inr'],
+            'market_cap': values.get('inr_market_cap'), 'total_volume': values.get('inr_24h_vol'),
+            'price_change_percentage_24h': values.get('inr_24h_change'),
+        }
+        for crypto_id, values in simple.items()
+    ]
+
+def rowwise_transform(raw_data, extracted_at):
+    """The previous implementation: one dict per coin, apply() for categories"""
+    records = []
+    for crypto_id, values in raw_data.items():
+        change_24h = values.get('inr_24h_change')
+        records.append({
+            'crypto_id': crypto_id,
+            'crypto_name': crypto_id.replace('-', ' ').title(),
+            'price_inr': values.get('inr'),
+            'market_cap_inr': values.get('inr_market_cap'),
+            'volume_24h_inr': values.get('inr_24h_vol'),
+            'price_change_24h_pct': change_24h,
+            'extracted_at': extracted_at,
+            'is_positive_change': change_24h > 0 if change_24h else None
+        })
+    df = pd.DataFrame(records)
+    df['price_category'] = df['price_inr'].apply(
+        lambda x: 'High' if x > 90000 else ('Medium' if x > 9000 else 'Low')
+    )
+    for column in ('price_inr', 'price_change_24h_pct', 'volume_24h_inr', 'market_cap_inr'):
+        df[column] = pd.to_numeric(df[column]).round(2)
+    return df
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,100000,250000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    transform.logger.setLevel(logging.WARNING)
+    extracted_at = datetime.now()
+
+    print(f"{'coins':>8} {'row-wise':>10} {'columnar':>10} {'speedup':>8} {'markets':>10} {'rows/sec':>12}")
+    for n in (int(size) for size in args.sizes.split(',')):
+        simple = make_simple_price(n)
+        page = make_market_page(simple)
+
+        rowwise = best_of(lambda: rowwise_transform(simple, extracted_at), args.repeat)
+        columnar = best_of(lambda: transform_crypto_data(simple, extracted_at), args.repeat)
+        markets = best_of(lambda: transform_market_page(page, extracted_at), args.repeat)
+
+        print(f"{n:>8,} {rowwise:>9.3f}s {columnar:>9.3f}s {rowwise / columnar:>7.1f}x "
+              f"{markets:>9.3f}s {n / columnar:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
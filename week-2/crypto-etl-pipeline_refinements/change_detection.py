@@ -0,0 +1,113 @@
+# change_detection.py - Skip coins whose values have not changed since the last load
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import pandas as pd
+from logger import setup_logger
+from config import Config
+
+logger = setup_logger('ChangeDetection')
+
+# Values that make a row worth writing again; extracted_at is deliberately left out
+FINGERPRINT_COLUMNS = [
+    'price_inr', 'market_cap_inr', 'volume_24h_inr', 'price_change_24h_pct', 'last_updated_at'
+]
+
+def fingerprint(df):
+    """64-bit hash of FINGERPRINT_COLUMNS per row, as int64 so SQLite can store it"""
+    hashes = pd.util.hash_pandas_object(df[FINGERPRINT_COLUMNS], index=False)
+    return hashes.to_numpy().view('int64')
+
+class ChangeDetector:
+    """
+    Per-coin fingerprint of the last values written, kept in a small SQLite
+    file so it survives restarts. changed_rows() filters a batch down to the
+    coins that moved; remember() records them once the load has committed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.CHANGE_STATE_PATH
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                crypto_id TEXT PRIMARY KEY,
+                fingerprint INTEGER NOT NULL,
+                emitted_at TEXT NOT NULL
+            )
+        """)
+        self.connection.commit()
+
+        self.fingerprints = dict(self.connection.execute("SELECT crypto_id, fingerprint FROM fingerprints"))
+        logger.debug(f"Loaded {len(self.fingerprints)} fingerprints from {self.path}")
+
+    def changed_rows(self, df):
+        """
+        The rows of df whose values differ from the previous ones for the
+        same coin. A batch may hold several ticks per coin (write-behind
+        coalesces queued polls), so each row is compared with the coin's
+        previous row in the batch by extracted_at, and only the earliest
+        with the last values remembered.
+        """
+        if df.empty:
+            return df
+
+        rows = pd.DataFrame({
+            'crypto_id': df['crypto_id'].astype(str).to_numpy(),
+            'fingerprint': pd.array(fingerprint(df), dtype='Int64'),
+            'extracted_at': df['extracted_at'].to_numpy(),
+        }).sort_values('extracted_at', kind='stable')
+
+        with self.lock:
+            remembered = pd.Series(self.fingerprints, dtype='Int64')
+        previous = rows.groupby('crypto_id', sort=False)['fingerprint'].shift()
+        # set_axis, not to_numpy: a missing coin would turn the column into float64 and round the hashes
+        previous = previous.fillna(remembered.reindex(rows['crypto_id']).set_axis(rows.index))
+
+        changed = (previous.isna() | (previous != rows['fingerprint'])).sort_index().to_numpy(dtype=bool)
+        skipped = len(df) - int(changed.sum())
+        logger.info(f"✓ Change detection: {int(changed.sum())} changed, {skipped} unchanged (skipped)")
+        return df[changed]
+
+    def remember(self, df):
+        """Record df's fingerprints as the last written values"""
+        if df.empty:
+            return
+
+        # Several ticks of one coin: the latest one is what the next batch is compared with
+        df = df.sort_values('extracted_at', kind='stable')
+        crypto_ids = df['crypto_id'].astype(str).tolist()
+        fingerprints = fingerprint(df).tolist()
+        emitted_at = datetime.now().isoformat(timespec='seconds')
+
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    """
+                    INSERT INTO fingerprints (crypto_id, fingerprint, emitted_at) VALUES (?, ?, ?)
+                    ON CONFLICT (crypto_id) DO UPDATE
+                    SET fingerprint = excluded.fingerprint, emitted_at = excluded.emitted_at
+                    """,
+                    [(crypto_id, fp, emitted_at) for crypto_id, fp in zip(crypto_ids, fingerprints)]
+                )
+            self.fingerprints.update(zip(crypto_ids, fingerprints))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_change_detector():
+    """Return the process-wide ChangeDetector"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = ChangeDetector()
+    return _detector
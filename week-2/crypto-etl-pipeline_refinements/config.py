@@ -15,15 +15,129 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD')
 
+    # 'postgres', or 'sqlite' for an embedded single-file store (edge boxes, CI)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'postgres')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/crypto_tracker.sqlite3')
+
+    # Connection pool size for the long-lived loader. Connections above
+    # DB_POOL_MIN are closed when returned, so keep it equal for warm sessions.
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '4'))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '4'))
+
+    # Create tables on first load; set to false once `python migrate.py` has run
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'true').lower() == 'true'
+
     # API SETTINGS
     API_BASE_URL = os.getenv('API_BASE_URL', 'https://api.coingecko.com/api/v3')
+    API_TIMEOUT = float(os.getenv('API_TIMEOUT', '10'))
+
+    # Request budget shared by every API call in the process (CoinGecko free tier ~30/min)
+    API_CALLS_PER_MINUTE = int(os.getenv('API_CALLS_PER_MINUTE', '30'))
+    API_BURST = int(os.getenv('API_BURST', '0'))  # 0 = ten seconds' worth of calls
+
+    # Retries for timeouts, 429 and 5xx responses; API_BACKOFF_MAX also caps Retry-After waits
+    API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', '4'))
+    API_BACKOFF_BASE = float(os.getenv('API_BACKOFF_BASE', '1'))
+    API_BACKOFF_MAX = float(os.getenv('API_BACKOFF_MAX', '60'))
+
+    # Keep-alive connection pool (size it at or above EXTRACT_MAX_WORKERS)
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '8'))
+
+    # CoinGecko refreshes prices about once a minute; 0 disables the cache (always, with --daemon)
+    API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', '60'))
+    API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '1024'))
+
+    # Cryptocurrencies to track (comma-separated CRYPTO_IDS overrides the default list)
+    CRYPTO_IDS = os.getenv('CRYPTO_IDS', 'bitcoin,ethereum,cardano,solana,ripple').split(',')
+
+    # 'simple' polls /simple/price for CRYPTO_IDS; 'markets' streams the
+    # top MARKETS_PER_PAGE * MARKETS_MAX_PAGES coins from /coins/markets
+    EXTRACT_SOURCE = os.getenv('EXTRACT_SOURCE', 'simple')
+    MARKETS_PER_PAGE = int(os.getenv('MARKETS_PER_PAGE', '250'))
+    MARKETS_MAX_PAGES = int(os.getenv('MARKETS_MAX_PAGES', '20'))
+
+    # Backfill: history window per request (CoinGecko returns hourly points up
+    # to 90 days) and how many windows are fetched and loaded in parallel
+    BACKFILL_WINDOW_DAYS = int(os.getenv('BACKFILL_WINDOW_DAYS', '90'))
+    BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', '4'))
+    BACKFILL_CHECKPOINT = os.getenv('BACKFILL_CHECKPOINT', 'backfill_checkpoint.json')
+
+    # Raw API responses are landed here (gzip NDJSON by dt/hour) for replay
+    RAW_DATA_DIR = os.getenv('RAW_DATA_DIR', 'data/raw')
+    RAW_LANDING = os.getenv('RAW_LANDING', 'true').lower() == 'true'
+
+    # Only load coins whose values changed since the last write (fingerprints in SQLite)
+    CHANGE_DETECTION = os.getenv('CHANGE_DETECTION', 'true').lower() == 'true'
+    CHANGE_STATE_PATH = os.getenv('CHANGE_STATE_PATH', 'data/state/fingerprints.sqlite3')
 
-    # Cryptocurrencies to track
-    CRYPTO_IDS = ['bitcoin', 'ethereum', 'cardano', 'solana', 'ripple']
+    # Rolling analytics per coin: window of the last N prices, z-score flag
+    # threshold, and how much crypto_prices history seeds the windows at start
+    ANALYTICS = os.getenv('ANALYTICS', 'true').lower() == 'true'
+    ANALYTICS_WINDOW = int(os.getenv('ANALYTICS_WINDOW', '60'))
+    ANALYTICS_MIN_PERIODS = int(os.getenv('ANALYTICS_MIN_PERIODS', '10'))
+    ANALYTICS_Z_THRESHOLD = float(os.getenv('ANALYTICS_Z_THRESHOLD', '4'))
+    ANALYTICS_WARM_START_HOURS = float(os.getenv('ANALYTICS_WARM_START_HOURS', '24'))
+
+    # Data quality: quarantined rows and per-batch metrics are written here;
+    # quotes CoinGecko last refreshed longer ago than this are quarantined
+    QUALITY_DIR = os.getenv('QUALITY_DIR', 'data/quality')
+    DQ_MAX_STALENESS_MINUTES = float(os.getenv('DQ_MAX_STALENESS_MINUTES', '60'))
+
+    # Load targets, comma-separated: 'postgres' (the STORAGE_BACKEND database)
+    # and/or 'parquet' (needs pyarrow).
+    # The Parquet dataset is partitioned by dt and crypto_id; a partition's
+    # small files are merged once it holds PARQUET_COMPACT_MIN_FILES (0 = never)
+    SINKS = [sink.strip() for sink in os.getenv('SINKS', 'postgres').lower().split(',') if sink.strip()]
+    PARQUET_DIR = os.getenv('PARQUET_DIR', 'data/parquet')
+    PARQUET_COMPRESSION = os.getenv('PARQUET_COMPRESSION', 'zstd')
+    PARQUET_COMPACT_MIN_FILES = int(os.getenv('PARQUET_COMPACT_MIN_FILES', '24'))
+    PARQUET_TARGET_FILE_BYTES = int(os.getenv('PARQUET_TARGET_FILE_BYTES', str(64 * 1024 * 1024)))
+
+    # Write-behind: queue transformed batches for a background loader thread,
+    # which coalesces up to WRITE_BEHIND_MAX_ROWS into one write. Extraction
+    # blocks only when WRITE_BEHIND_QUEUE_SIZE batches are already waiting.
+    WRITE_BEHIND = os.getenv('WRITE_BEHIND', 'false').lower() == 'true'
+    WRITE_BEHIND_QUEUE_SIZE = int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', '8'))
+    WRITE_BEHIND_MAX_ROWS = int(os.getenv('WRITE_BEHIND_MAX_ROWS', '50000'))
+
+    # `python run.py --daemon`: seconds between scheduled pipeline runs
+    DAEMON_INTERVAL_SECONDS = float(os.getenv('DAEMON_INTERVAL_SECONDS', '60'))
+
+    # Large id lists are fetched in shards of this size, a few shards at a time
+    EXTRACT_SHARD_SIZE = int(os.getenv('EXTRACT_SHARD_SIZE', '250'))
+    EXTRACT_MAX_WORKERS = int(os.getenv('EXTRACT_MAX_WORKERS', '4'))
 
     # Target Currency
     VS_CURRENCY = 'inr'
 
+    # Extra currencies derived from the VS_CURRENCY prices (e.g. 'usd,eur'),
+    # written to crypto_prices_fx; exchange rates are refetched after FX_RATES_TTL
+    TARGET_CURRENCIES = [c for c in os.getenv('TARGET_CURRENCIES', '').lower().split(',') if c]
+    FX_RATES_TTL = float(os.getenv('FX_RATES_TTL', '600'))
+
+    # Load settings: 'copy' (COPY + staging merge) or 'batch' (execute_values)
+    LOAD_METHOD = os.getenv('LOAD_METHOD', 'copy')
+
+    # On a row-level database error, bisect the batch inside savepoints and move
+    # only the offending rows to crypto_load_dead_letters (false: fail the batch)
+    LOAD_ISOLATE_FAILURES = os.getenv('LOAD_ISOLATE_FAILURES', 'true').lower() == 'true'
+
+    # Percent of each crypto_prices_latest page filled on insert; the rest is
+    # kept free so snapshot updates can be HOT (same-page) updates
+    LATEST_FILLFACTOR = int(os.getenv('LATEST_FILLFACTOR', '70'))
+
+    # query.py result cache: entries kept, and seconds before an entry expires
+    # (loads in the same process clear it immediately; 0 disables caching)
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+    QUERY_CACHE_TTL_SECONDS = float(os.getenv('QUERY_CACHE_TTL_SECONDS', '30'))
+
+    # crypto_prices range partitioning by extracted_at: 'none', 'daily' or 'monthly'
+    PARTITION_GRANULARITY = os.getenv('PARTITION_GRANULARITY', 'none')
+
+    # Upcoming partitions kept created ahead of the current one
+    PARTITIONS_AHEAD = int(os.getenv('PARTITIONS_AHEAD', '3'))
+
     @classmethod
     def get_db_connection_string(cls):
         """Get PostgreSQL connection string"""
@@ -32,8 +146,22 @@ class Config:
     @classmethod
     def validate(cls):
         """Validate Configuration"""
-        if not cls.DB_PASSWORD:
+        if cls.STORAGE_BACKEND not in ('postgres', 'sqlite'):
+            raise ValueError(f"STORAGE_BACKEND must be 'postgres' or 'sqlite', got '{cls.STORAGE_BACKEND}'")
+        if cls.STORAGE_BACKEND == 'postgres' and not cls.DB_PASSWORD:
             raise ValueError("DB_PASSWORD not set in .env file")
+        if cls.DAEMON_INTERVAL_SECONDS <= 0:
+            raise ValueError(f"DAEMON_INTERVAL_SECONDS must be positive, got {cls.DAEMON_INTERVAL_SECONDS}")
+        if not 10 <= cls.LATEST_FILLFACTOR <= 100:
+            raise ValueError(f"LATEST_FILLFACTOR must be between 10 and 100, got {cls.LATEST_FILLFACTOR}")
+        if cls.LOAD_METHOD not in ('copy', 'batch'):
+            raise ValueError(f"LOAD_METHOD must be 'copy' or 'batch', got '{cls.LOAD_METHOD}'")
+        if cls.EXTRACT_SOURCE not in ('simple', 'markets'):
+            raise ValueError(f"EXTRACT_SOURCE must be 'simple' or 'markets', got '{cls.EXTRACT_SOURCE}'")
+        if cls.PARTITION_GRANULARITY not in ('none', 'daily', 'monthly'):
+            raise ValueError(f"PARTITION_GRANULARITY must be 'none', 'daily' or 'monthly', got '{cls.PARTITION_GRANULARITY}'")
+        if not cls.SINKS or set(cls.SINKS) - {'postgres', 'parquet'}:
+            raise ValueError(f"SINKS must list 'postgres' and/or 'parquet', got {cls.SINKS}")
         return True
     
 # Validate config on import    
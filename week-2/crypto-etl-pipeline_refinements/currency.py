@@ -0,0 +1,62 @@
+# currency.py - Convert base-currency prices into other currencies
+import numpy as np
+import pandas as pd
+from logger import setup_logger
+from config import Config
+from api_client import get_api_client
+
+logger = setup_logger('Currency')
+
+# Base-currency columns and their names in the long-format frame
+FX_VALUE_COLUMNS = {
+    'price_inr': 'price',
+    'market_cap_inr': 'market_cap',
+    'volume_24h_inr': 'volume_24h',
+}
+
+def fetch_exchange_rates():
+    """
+    Rate per currency from /exchange_rates (all quoted against BTC).
+    The response is cached for FX_RATES_TTL, independent of the price TTL.
+    """
+    url = f"{Config.API_BASE_URL}/exchange_rates"
+    data = get_api_client().get_json(url, ttl=Config.FX_RATES_TTL)
+    return pd.Series({code: info['value'] for code, info in data['rates'].items()}, dtype='float64')
+
+def conversion_factors(rates, base=None, targets=None):
+    """Multiplier from the base currency into each target currency"""
+    base = (base or Config.VS_CURRENCY).lower()
+    targets = [currency.lower() for currency in (targets or Config.TARGET_CURRENCIES)]
+
+    missing = [currency for currency in [base, *targets] if currency not in rates.index]
+    if missing:
+        raise ValueError(f"No exchange rate for: {missing}")
+
+    return rates[targets] / rates[base]
+
+def to_currencies(df, factors):
+    """
+    Long-format frame with one row per (crypto_id, currency). All
+    currencies are converted with a single broadcast multiply.
+    """
+    n, m = len(df), len(factors)
+    values = df[list(FX_VALUE_COLUMNS)].to_numpy(dtype='float64', na_value=np.nan)
+    # 8 decimals keeps satoshi precision for crypto targets and drops float noise
+    converted = np.round(values[:, None, :] * factors.to_numpy()[None, :, None], 8)
+
+    columns = {
+        'crypto_id': df['crypto_id'].array.repeat(m),
+        'currency': pd.Categorical(np.tile(factors.index.to_numpy(), n)),
+    }
+    for i, name in enumerate(FX_VALUE_COLUMNS.values()):
+        columns[name] = converted[:, :, i].ravel()
+    columns['extracted_at'] = np.repeat(df['extracted_at'].to_numpy(), m)
+
+    return pd.DataFrame(columns)
+
+def convert(df, targets=None):
+    """Convert a transformed batch into TARGET_CURRENCIES (long format)"""
+    factors = conversion_factors(fetch_exchange_rates(), targets=targets)
+    long_df = to_currencies(df, factors)
+    logger.info(f"✓ Converted {len(df)} records into {len(factors)} currencies ({', '.join(factors.index)})")
+    return long_df
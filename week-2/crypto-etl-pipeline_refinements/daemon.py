@@ -0,0 +1,119 @@
+# daemon.py - Long-running pipeline loop on a fixed, drift-free schedule
+import math
+import signal
+import threading
+import time
+from logger import setup_logger
+from config import Config
+from analytics import get_analytics
+from api_client import get_api_client
+from change_detection import get_change_detector
+from load import get_loader
+from pipeline import run_pipeline
+from write_behind import take_write_behind_errors
+
+logger = setup_logger('Daemon')
+
+class Daemon:
+    """
+    Runs tick() every `interval` seconds in one warm process. Tick k is due
+    at start + k * interval on the monotonic clock, so a slow tick never
+    pushes later ones back; ticks missed while one overran are skipped, not
+    run back to back. stop() (wired to SIGTERM/SIGINT) lets the tick in
+    progress finish and wakes the loop from its sleep at once.
+    """
+
+    def __init__(self, tick, interval=None, clock=time.monotonic):
+        self.tick = tick
+        self.interval = interval or Config.DAEMON_INTERVAL_SECONDS
+        self.clock = clock
+        self.stopping = threading.Event()
+        self.ticks_run = 0
+        self.ticks_failed = 0
+        self.ticks_skipped = 0
+
+    def stop(self, signum=None, frame=None):
+        if signum is not None:
+            logger.info(f"Received {signal.Signals(signum).name}, stopping after the current tick")
+        self.stopping.set()
+
+    def install_signal_handlers(self):
+        """Call from the main thread"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def run(self):
+        """Tick until stop(). Returns: True if no tick failed."""
+        logger.info(f"✓ Daemon started, one tick every {self.interval:g}s")
+        start = self.clock()
+        slot = 0
+
+        while not self.stopping.is_set():
+            due = start + slot * self.interval
+            if self.stopping.wait(max(0.0, due - self.clock())):
+                break
+
+            lag = self.clock() - due
+            logger.info(f"Tick {slot} started {lag * 1000:.0f}ms after schedule")
+            try:
+                succeeded = self.tick()
+            except Exception as e:
+                logger.error(f"✗ Tick {slot} raised: {e}")
+                succeeded = False
+            if not succeeded:
+                self.ticks_failed += 1
+            self.ticks_run += 1
+
+            errors = take_write_behind_errors()
+            if errors:
+                self.ticks_failed += 1
+                logger.error(f"✗ {len(errors)} background load(s) failed since the last tick, first: {errors[0]}")
+
+            # Next slot that is still ahead of us
+            elapsed = self.clock() - start
+            next_slot = max(slot + 1, math.ceil(elapsed / self.interval))
+            if next_slot > slot + 1:
+                self.ticks_skipped += next_slot - slot - 1
+                logger.warning(
+                    f"⚠ Tick {slot} overran its {self.interval:g}s slot by "
+                    f"{elapsed - (slot + 1) * self.interval:.1f}s, skipping {next_slot - slot - 1} tick(s)"
+                )
+            slot = next_slot
+
+        logger.info(
+            f"Daemon stopped: {self.ticks_run} tick(s) run, {self.ticks_failed} failed, {self.ticks_skipped} skipped"
+        )
+        return self.ticks_failed == 0
+
+def warm_up():
+    """
+    Open the DB pool, apply the schema, create the HTTP session and build
+    the rolling analytics once, before the first tick. Otherwise the
+    analytics warm start would run on the write-behind thread and compete
+    with the next extract.
+    """
+    get_loader().ensure_schema()
+    get_api_client()
+    if Config.ANALYTICS:
+        get_analytics()
+    if Config.CHANGE_DETECTION:
+        get_change_detector()
+
+def run_daemon(interval=None, sinks=None):
+    """
+    run_pipeline() on a fixed schedule until SIGTERM/SIGINT. Loads go
+    through the write-behind queue, so each tick's load overlaps the next
+    tick's extract. Returns: True if no tick failed.
+    """
+    # The caller flushes the queue (shutdown_write_behind) after we return
+    Config.WRITE_BEHIND = True
+    # Every tick fetches new prices. An API cache entry stamped when the
+    # response arrived is still fresh one interval later whenever
+    # API_CACHE_TTL is close to the interval, and that tick would reload
+    # the previous prices. Set before warm_up() creates the client.
+    Config.API_CACHE_TTL = 0
+    warm_up()
+
+    daemon = Daemon(lambda: run_pipeline(sinks=sinks), interval)
+    daemon.install_signal_handlers()
+    return daemon.run()
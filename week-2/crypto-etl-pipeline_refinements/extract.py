@@ -1,19 +1,29 @@
 # extract.py - Data extraction from CoinGecko API
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
 from logger import setup_logger
 from config import Config
+from api_client import get_api_client
 
 logger = setup_logger('Extract')
 
-def fetch_crypto_prices():
+def chunk_ids(ids, chunk_size):
+    """Split ids into consecutive chunks of at most chunk_size"""
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    return [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+def fetch_crypto_prices(ids=None):
     """
     Fetch cryptocurrency prices from CoinGecko API
     Returns: Dictionary with crypto data.
     """
-    logger.info("Starting data extraction from CoinGeclo API")
+    ids = Config.CRYPTO_IDS if ids is None else ids
+    logger.info("Starting data extraction from CoinGecko API")
 
     # Build API endpoint
-    crypto_ids = ','.join(Config.CRYPTO_IDS)
+    crypto_ids = ','.join(ids)
     url = f"{Config.API_BASE_URL}/simple/price"
 
     params = {
@@ -21,7 +31,8 @@ def fetch_crypto_prices():
         'vs_currencies': Config.VS_CURRENCY,
         'include_24hr_change': 'true',
         'include_market_cap': 'true',
-        'include_24hr_vol': 'true'
+        'include_24hr_vol': 'true',
+        'include_last_updated_at': 'true'
     }
 
     logger.debug(f"API URL: {url}")
@@ -29,11 +40,9 @@ def fetch_crypto_prices():
 
     try:
         # Make API request
-        logger.info(f"Fetching data for: {Config.CRYPTO_IDS}")
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-
-        data = response.json()
+        logger.info(f"Fetching data for {len(ids)} cryptocurrencies")
+        logger.debug(f"Ids: {ids}")
+        data = get_api_client().get_json(url, params=params)
         logger.info(f"✓ Successfully fetched data for {len(data)} cryptocurrencies")
         logger.debug(f"Raw response: {data}")
 
@@ -49,6 +58,103 @@ def fetch_crypto_prices():
         logger.error(f"Unexpected error during execution: {e}")
         raise
 
+def fetch_crypto_prices_sharded(ids=None, shard_size=None, max_workers=None):
+    """
+    Fetch prices for a large id list in shards, at most max_workers at a time.
+    Returns: One dictionary merged from all shards, same shape as fetch_crypto_prices().
+    """
+    ids = Config.CRYPTO_IDS if ids is None else ids
+    shard_size = shard_size or Config.EXTRACT_SHARD_SIZE
+    max_workers = max_workers or Config.EXTRACT_MAX_WORKERS
+
+    shards = chunk_ids(ids, shard_size)
+    if len(shards) <= 1:
+        return fetch_crypto_prices(ids)
+
+    workers = min(max_workers, len(shards))
+    logger.info(f"Fetching {len(ids)} ids in {len(shards)} shards ({workers} concurrent)")
+
+    data = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extract') as pool:
+        # map() yields in shard order and re-raises the first shard failure
+        for shard_data in pool.map(fetch_crypto_prices, shards):
+            data.update(shard_data)
+
+    logger.info(f"✓ Merged {len(shards)} shards into {len(data)} cryptocurrencies")
+    return data
+
+def iter_market_pages(per_page=None, max_pages=None):
+    """
+    Yield /coins/markets pages (lists of coin dicts), largest market cap first.
+    Each page is requested only when the caller asks for the next one.
+    """
+    per_page = per_page or Config.MARKETS_PER_PAGE
+    max_pages = Config.MARKETS_MAX_PAGES if max_pages is None else max_pages
+    url = f"{Config.API_BASE_URL}/coins/markets"
+
+    page = 1
+    while not max_pages or page <= max_pages:
+        params = {
+            'vs_currency': Config.VS_CURRENCY,
+            'order': 'market_cap_desc',
+            'per_page': per_page,
+            'page': page,
+            'price_change_percentage': '24h'
+        }
+
+        try:
+            logger.debug(f"Fetching markets page {page}")
+            data = get_api_client().get_json(url, params=params)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed on markets page {page}: {e}")
+            raise
+
+        if not data:
+            return
+        logger.info(f"✓ Fetched markets page {page} ({len(data)} coins)")
+        yield data
+
+        # A short page is the last one
+        if len(data) < per_page:
+            return
+        page += 1
+
+def fetch_market_chart_range(crypto_id, start, end):
+    """
+    Fetch price, market cap and volume history for one coin between two
+    datetimes (UTC). Returns: Dictionary with 'prices', 'market_caps' and
+    'total_volumes' lists of [timestamp_ms, value].
+    """
+    url = f"{Config.API_BASE_URL}/coins/{crypto_id}/market_chart/range"
+    params = {
+        'vs_currency': Config.VS_CURRENCY,
+        'from': int(start.replace(tzinfo=timezone.utc).timestamp()),
+        'to': int(end.replace(tzinfo=timezone.utc).timestamp())
+    }
+
+    try:
+        # History never changes, so there is nothing to gain from caching it
+        data = get_api_client().get_json(url, params=params, ttl=0)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"History request failed for {crypto_id} [{start} → {end}]: {e}")
+        raise
+
+    logger.debug(f"Fetched {len(data.get('prices', []))} history points for {crypto_id}")
+    return data
+
+def extract_market_pages():
+    """Streaming extract: yields /coins/markets pages for transform/load"""
+    logger.info("=" * 60)
+    logger.info("Extract Phase (streaming /coins/markets) - Starting...")
+    logger.info("=" * 60)
+
+    pages = 0
+    for page in iter_market_pages():
+        pages += 1
+        yield page
+
+    logger.info(f"✓ Extract phase completed successfully ({pages} pages)")
+
 def extract():
     """Main extract function"""
     logger.info("=" * 60)
@@ -56,7 +162,14 @@ def extract():
     logger.info("=" * 60)
 
     try:
-        data = fetch_crypto_prices()
+        data = fetch_crypto_prices_sharded()
+
+        stats = get_api_client().snapshot_stats()
+        logger.info(
+            f"API requests: {stats['requests']} (throttled: {stats['throttled']}, "
+            f"rate limited: {stats['rate_limited']}, retried: {stats['retried']}), "
+            f"cache hits: {stats['cache_hits']}, revalidated: {stats['revalidated']}"
+        )
         logger.info("✓ Extract phase completed successfully")
         return data
     
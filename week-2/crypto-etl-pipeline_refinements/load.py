@@ -1,16 +1,222 @@
 # load.py - FIXED VERSION with proper NULL handling
 import psycopg2
 from psycopg2 import Error
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
 from logger import setup_logger
 from config import Config
+from partitions import PartitionManager
+from rollups import ROLLUP_TABLES, rebuild_bounds, rollup_ctes, upsert_candles_query
+from datetime import datetime, timedelta
 import pandas as pd
+import atexit
+import hashlib
+from collections import Counter
+import io
+import threading
 import time
 
 start_time = time.time()
 
 logger = setup_logger('Load')
 
+# Columns written to crypto_prices / crypto_prices_latest, in table order
+PRICE_COLUMNS = [
+    'crypto_id', 'crypto_name', 'price_inr', 'market_cap_inr',
+    'volume_24h_inr', 'price_change_24h_pct', 'price_category',
+    'is_positive_change', 'extracted_at'
+]
+
+# Rolling-window analytics (analytics.py) kept with every crypto_prices row.
+# NULL while a coin's window fills, or for batches loaded with ANALYTICS off.
+ANALYTICS_COLUMN_TYPES = {
+    'rolling_mean': 'DOUBLE PRECISION',
+    'rolling_std': 'DOUBLE PRECISION',
+    'rolling_min': 'DOUBLE PRECISION',
+    'rolling_max': 'DOUBLE PRECISION',
+    'price_zscore': 'DOUBLE PRECISION',
+    'is_price_anomaly': 'BOOLEAN',
+}
+ANALYTICS_COLUMNS = list(ANALYTICS_COLUMN_TYPES)
+
+# Columns written to crypto_prices (the snapshot only keeps PRICE_COLUMNS)
+PRICE_HISTORY_COLUMNS = PRICE_COLUMNS + ANALYTICS_COLUMNS
+
+# Staging table for the COPY path. It lives as long as the pooled session and
+# is emptied on every commit. Numeric columns are NUMERIC so exponent floats
+# (e.g. 1.5e+16) from the CSV buffer parse cleanly; the merge casts them into
+# the target column types.
+STAGING_TABLE_QUERY = f"""
+CREATE TEMP TABLE IF NOT EXISTS crypto_prices_staging (
+    crypto_id VARCHAR(50),
+    crypto_name VARCHAR(100),
+    price_inr NUMERIC,
+    market_cap_inr NUMERIC,
+    volume_24h_inr NUMERIC,
+    price_change_24h_pct NUMERIC,
+    price_category VARCHAR(20),
+    is_positive_change BOOLEAN,
+    extracted_at TIMESTAMP,
+    {', '.join(f'{column} {column_type}' for column, column_type in ANALYTICS_COLUMN_TYPES.items())}
+) ON COMMIT DELETE ROWS;
+"""
+
+# Candles are folded from the rows this statement actually inserts, so
+# duplicates skipped by ON CONFLICT (replays, retries) never count twice
+MERGE_HISTORY_QUERY = f"""
+WITH inserted AS (
+    INSERT INTO crypto_prices ({', '.join(PRICE_HISTORY_COLUMNS)})
+    SELECT {', '.join(PRICE_HISTORY_COLUMNS)}
+    FROM crypto_prices_staging
+    ON CONFLICT (crypto_id, extracted_at)
+    DO NOTHING
+    RETURNING crypto_id, price_inr, volume_24h_inr, extracted_at
+),
+{rollup_ctes('inserted')}
+SELECT crypto_id FROM inserted;
+"""
+
+INSERT_PRICE_QUERY = f"""
+INSERT INTO crypto_prices ({', '.join(PRICE_HISTORY_COLUMNS)})
+VALUES %s
+ON CONFLICT (crypto_id, extracted_at)
+DO NOTHING
+RETURNING crypto_id, price_inr, volume_24h_inr, extracted_at;
+"""
+
+# Candles for the batch path, from the rows INSERT_PRICE_QUERY returned
+ROLLUP_VALUES_QUERY = f"""
+WITH inserted (crypto_id, price_inr, volume_24h_inr, extracted_at) AS (VALUES %s),
+{rollup_ctes('inserted')}
+SELECT 1;
+"""
+ROLLUP_VALUES_TEMPLATE = "(%s, %s::NUMERIC, %s::BIGINT, %s::TIMESTAMP)"
+
+# Recompute whole buckets from crypto_prices, e.g. after a backfill
+REBUILD_ROLLUP_SOURCE = """(
+    SELECT crypto_id, price_inr, volume_24h_inr, extracted_at
+    FROM crypto_prices
+    WHERE extracted_at >= %(start)s AND extracted_at < %(end)s
+) history"""
+
+# Running row count for crypto_prices, bumped in the same transaction as
+# each insert so total-size reporting never scans the history table
+BUMP_ROW_COUNT_QUERY = """
+UPDATE crypto_table_stats
+SET row_count = row_count + $1, updated_at = CURRENT_TIMESTAMP
+WHERE table_name = 'crypto_prices'
+RETURNING row_count;
+"""
+
+# Time-bounded on extracted_at so a partitioned history only scans the
+# partitions that can hold recent rows
+RECENT_PRICES_QUERY = """
+SELECT crypto_id, COUNT(*)
+FROM crypto_prices
+WHERE extracted_at >= %s
+GROUP BY crypto_id
+ORDER BY crypto_id;
+"""
+
+# Only move the snapshot forward in time, and only rewrite a coin whose values
+# changed: a no-op UPDATE still leaves a dead tuple and WAL behind. extracted_at
+# is not compared, so an unchanged coin keeps the time its values last changed
+# (what change detection already does for live polls).
+SNAPSHOT_VALUE_COLUMNS = [
+    'crypto_name', 'price_inr', 'market_cap_inr', 'volume_24h_inr',
+    'price_change_24h_pct', 'price_category', 'is_positive_change'
+]
+
+SNAPSHOT_UPSERT = f"""
+ON CONFLICT (crypto_id)
+DO UPDATE SET
+    {', '.join(f'{column} = EXCLUDED.{column}' for column in SNAPSHOT_VALUE_COLUMNS)},
+    extracted_at = EXCLUDED.extracted_at,
+    updated_at = CURRENT_TIMESTAMP
+WHERE crypto_prices_latest.extracted_at <= EXCLUDED.extracted_at
+  AND ({', '.join(f'crypto_prices_latest.{column}' for column in SNAPSHOT_VALUE_COLUMNS)})
+      IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in SNAPSHOT_VALUE_COLUMNS)})
+"""
+
+# DISTINCT ON keeps one row per coin so the upsert never touches a row twice.
+# The rowcount is the number of snapshot rows actually inserted or changed.
+MERGE_SNAPSHOT_QUERY = f"""
+INSERT INTO crypto_prices_latest ({', '.join(PRICE_COLUMNS)})
+SELECT DISTINCT ON (crypto_id) {', '.join(PRICE_COLUMNS)}
+FROM crypto_prices_staging
+ORDER BY crypto_id, extracted_at DESC
+{SNAPSHOT_UPSERT};
+"""
+
+# The same merge for the batch path, fed by execute_values
+SNAPSHOT_VALUES_QUERY = f"""
+INSERT INTO crypto_prices_latest ({', '.join(PRICE_COLUMNS)})
+SELECT DISTINCT ON (crypto_id) {', '.join(PRICE_COLUMNS)}
+FROM (VALUES %s) AS batch ({', '.join(PRICE_COLUMNS)})
+ORDER BY crypto_id, extracted_at DESC
+{SNAPSHOT_UPSERT}
+RETURNING 1;
+"""
+
+# One row per committed batch, written in the same transaction as its data,
+# so a retried or replayed batch is skipped with a single primary-key lookup
+BATCH_COMMITTED_QUERY = "SELECT 1 FROM crypto_load_ledger WHERE batch_id = $1;"
+
+RECORD_BATCH_QUERY = """
+INSERT INTO crypto_load_ledger (batch_id, row_count, rows_inserted, first_extracted_at, last_extracted_at)
+VALUES ($1, $2, $3, $4, $5)
+ON CONFLICT (batch_id) DO NOTHING;
+"""
+
+# Rows the database rejected, with the SQLSTATE and the row as JSON, so a
+# bad value never costs the rest of its batch
+INSERT_DEAD_LETTER_QUERY = """
+INSERT INTO crypto_load_dead_letters (batch_id, pgcode, error, payload)
+VALUES %s
+"""
+DEAD_LETTER_TEMPLATE = "(%s, %s, %s, %s::JSONB)"
+
+# Errors caused by the values of particular rows (SQLSTATE classes 22 and 23).
+# Anything else (lost connection, missing table) fails the whole batch as before.
+ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+# Types of PRICE_COLUMNS, so VALUES rows (NULLs included) match the table
+PRICE_PARAM_TYPES = ['VARCHAR', 'VARCHAR', 'NUMERIC', 'NUMERIC', 'NUMERIC', 'NUMERIC', 'VARCHAR', 'BOOLEAN', 'TIMESTAMP']
+PRICE_VALUES_TEMPLATE = f"({', '.join(f'%s::{param_type}' for param_type in PRICE_PARAM_TYPES)})"
+
+# Server-side prepared statements, created once per pooled connection
+PREPARED_STATEMENTS = {
+    'merge_history': f"PREPARE merge_history AS {MERGE_HISTORY_QUERY}",
+    'merge_snapshot': f"PREPARE merge_snapshot AS {MERGE_SNAPSHOT_QUERY}",
+    'bump_row_count': f"PREPARE bump_row_count (BIGINT) AS {BUMP_ROW_COUNT_QUERY}",
+    'batch_committed': f"PREPARE batch_committed (VARCHAR) AS {BATCH_COMMITTED_QUERY}",
+    'record_batch': f"PREPARE record_batch (VARCHAR, INTEGER, INTEGER, TIMESTAMP, TIMESTAMP) AS {RECORD_BATCH_QUERY}",
+}
+
+# Last N prices per coin inside a time bound (the bound prunes partitions)
+RECENT_HISTORY_QUERY = """
+SELECT crypto_id, price_inr, extracted_at
+FROM (
+    SELECT crypto_id, price_inr, extracted_at,
+           ROW_NUMBER() OVER (PARTITION BY crypto_id ORDER BY extracted_at DESC) AS recency
+    FROM crypto_prices
+    WHERE extracted_at >= %s
+) recent
+WHERE recency <= %s
+ORDER BY extracted_at
+"""
+
+# Long-format currency conversions (see currency.py)
+FX_COLUMNS = ['crypto_id', 'currency', 'price', 'market_cap', 'volume_24h', 'extracted_at']
+
+INSERT_FX_QUERY = f"""
+INSERT INTO crypto_prices_fx ({', '.join(FX_COLUMNS)})
+VALUES %s
+ON CONFLICT (crypto_id, currency, extracted_at) DO NOTHING
+RETURNING 1
+"""
+
 def get_db_connection():
     """Create PostgreSQL connection"""
     try:
@@ -27,21 +233,27 @@ def get_db_connection():
         logger.error(f"Error connecting to database: {e}")
         raise
 
-def load_to_postgres(df):
-    """
-    Load DataFrame to PostgreSQL with proper NULL handling
-    """
-    logger.info(f"Loading {len(df)} records to PostgreSQL")
-    
-    connection = None
-    cursor = None
-    
-    try:
-        # Connect to database
-        connection = get_db_connection()
-        cursor = connection.cursor()
+def check_history_layout(cursor, granularity):
+    """Refuse to run against a crypto_prices whose layout differs from the config"""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('crypto_prices')")
+    row = cursor.fetchone()
+    if row is None:
+        return
+
+    is_partitioned = row[0] == 'p'
+    if is_partitioned != (granularity != 'none'):
+        existing = 'partitioned' if is_partitioned else 'a plain table'
+        raise ValueError(
+            f"crypto_prices is {existing} but PARTITION_GRANULARITY is '{granularity}'. "
+            "Migrate the table before changing the partitioning mode."
+        )
+
+def create_tables(cursor):
+    """Create crypto_prices, crypto_prices_latest, crypto_prices_fx, the candle tables, the load ledger, the dead-letter table and the row counter if missing"""
+    granularity = Config.PARTITION_GRANULARITY
+    check_history_layout(cursor, granularity)
 
-        # Create tables if not exists (for containerized DB)
+    if granularity == 'none':
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS crypto_prices (
             id SERIAL PRIMARY KEY,
@@ -56,16 +268,13 @@ def load_to_postgres(df):
             extracted_at TIMESTAMP NOT NULL
         );
         """)
-
-        cursor.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS unique_crypto_timestamp
-        ON crypto_prices (crypto_id, extracted_at);
-        """)
-
+    else:
+        # Primary and unique keys on a partitioned table must include extracted_at
         cursor.execute("""
-        CREATE TABLE IF NOT EXISTS crypto_prices_latest (
-            crypto_id VARCHAR(50) PRIMARY KEY,
-            crypto_name VARCHAR(100),
+        CREATE TABLE IF NOT EXISTS crypto_prices (
+            id BIGSERIAL,
+            crypto_id VARCHAR(50) NOT NULL,
+            crypto_name VARCHAR(100) NOT NULL,
             price_inr DECIMAL(20,2),
             market_cap_inr BIGINT,
             volume_24h_inr BIGINT,
@@ -73,142 +282,709 @@ def load_to_postgres(df):
             price_category VARCHAR(20),
             is_positive_change BOOLEAN,
             extracted_at TIMESTAMP NOT NULL,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            PRIMARY KEY (id, extracted_at)
+        ) PARTITION BY RANGE (extracted_at);
+        """)
+        PartitionManager(granularity).ensure_ahead(cursor)
+
+    # Added to crypto_prices after it first shipped, so existing tables get them here
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'crypto_prices'"
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    missing = [column for column in ANALYTICS_COLUMNS if column not in existing]
+    if missing:
+        cursor.execute(
+            f"ALTER TABLE crypto_prices "
+            f"{', '.join(f'ADD COLUMN {column} {ANALYTICS_COLUMN_TYPES[column]}' for column in missing)};"
+        )
+
+    cursor.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS unique_crypto_timestamp
+    ON crypto_prices (crypto_id, extracted_at);
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS crypto_prices_latest (
+        crypto_id VARCHAR(50) PRIMARY KEY,
+        crypto_name VARCHAR(100),
+        price_inr DECIMAL(20,2),
+        market_cap_inr BIGINT,
+        volume_24h_inr BIGINT,
+        price_change_24h_pct DECIMAL(10,2),
+        price_category VARCHAR(20),
+        is_positive_change BOOLEAN,
+        extracted_at TIMESTAMP NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # The upsert skips unchanged coins, but every coin whose price moved is
+    # rewritten. Free space on each page lets that new version stay on the same
+    # page as a HOT update, which skips the primary key and needs no vacuum to
+    # reclaim. Applies to pages written from now on.
+    cursor.execute(f"ALTER TABLE crypto_prices_latest SET (fillfactor = {Config.LATEST_FILLFACTOR});")
+
+    # HOT is only possible when no indexed column changes, and the 24h change
+    # moves on nearly every update, so it must not be indexed here
+    cursor.execute("DROP INDEX IF EXISTS crypto_prices_latest_change_idx;")
+
+    # Converted values are unbounded NUMERIC: a BTC price needs decimals an INR cap does not
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS crypto_prices_fx (
+        crypto_id VARCHAR(50) NOT NULL,
+        currency VARCHAR(10) NOT NULL,
+        price NUMERIC,
+        market_cap NUMERIC,
+        volume_24h NUMERIC,
+        extracted_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (crypto_id, currency, extracted_at)
+    );
+    """)
+
+    # OHLC candles per coin (see rollups.py), folded in by every load
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            crypto_id VARCHAR(50) NOT NULL,
+            bucket_start TIMESTAMP NOT NULL,
+            open_inr DECIMAL(20,2),
+            high_inr DECIMAL(20,2),
+            low_inr DECIMAL(20,2),
+            close_inr DECIMAL(20,2),
+            volume_24h_inr BIGINT,
+            open_at TIMESTAMP NOT NULL,
+            close_at TIMESTAMP NOT NULL,
+            tick_count INTEGER NOT NULL,
+            PRIMARY KEY (crypto_id, bucket_start)
         );
         """)
 
-        
-        # Prepare insert query
-        insert_query = """
-        INSERT INTO crypto_prices (
-            crypto_id, crypto_name, price_inr, market_cap_inr,
-            volume_24h_inr, price_change_24h_pct, price_category,
-            is_positive_change, extracted_at
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (crypto_id, extracted_at)
-        DO NOTHING;
-        """
-
-        snapshot_query = """
-        INSERT INTO crypto_prices_latest (
-            crypto_id, crypto_name, price_inr, market_cap_inr, volume_24h_inr,
-            price_change_24h_pct, price_category, is_positive_change, extracted_at
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS crypto_load_ledger (
+        batch_id VARCHAR(64) PRIMARY KEY,
+        row_count INTEGER NOT NULL,
+        rows_inserted INTEGER NOT NULL,
+        first_extracted_at TIMESTAMP,
+        last_extracted_at TIMESTAMP,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS crypto_load_dead_letters (
+        id BIGSERIAL PRIMARY KEY,
+        batch_id VARCHAR(64) NOT NULL,
+        pgcode VARCHAR(5),
+        error TEXT NOT NULL,
+        payload JSONB NOT NULL,
+        failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS crypto_table_stats (
+        table_name VARCHAR(63) PRIMARY KEY,
+        row_count BIGINT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # Seed the counter once. The NOT EXISTS guard is a one-time filter, so
+    # the COUNT(*) only scans crypto_prices when the counter row is missing.
+    cursor.execute("""
+    INSERT INTO crypto_table_stats (table_name, row_count)
+    SELECT 'crypto_prices', COUNT(*) FROM crypto_prices
+    WHERE NOT EXISTS (
+        SELECT 1 FROM crypto_table_stats WHERE table_name = 'crypto_prices'
+    )
+    ON CONFLICT (table_name) DO NOTHING;
+    """)
+
+# Callables run after every commit that writes data (e.g. query.py's cache)
+_commit_listeners = []
+
+def on_commit(callback):
+    """Call callback() after each load that commits new data to the storage backend"""
+    _commit_listeners.append(callback)
+
+def notify_commit():
+    for callback in _commit_listeners:
+        callback()
+
+def batch_id(df, columns=PRICE_COLUMNS, prefix=''):
+    """Content-derived id of a batch: the same rows in the same order always get the same id"""
+    hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return prefix + hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+def batch_record(batch, df, rows_inserted):
+    """Ledger parameters for a committed batch"""
+    extracted_at = pd.to_datetime(df['extracted_at'])
+    return (batch, len(df), rows_inserted, extracted_at.min().to_pydatetime(), extracted_at.max().to_pydatetime())
+
+def dead_letter_rows(batch, rejected):
+    """crypto_load_dead_letters parameters for (row frame, error) pairs"""
+    return [
+        (batch, error.pgcode, str(error).strip(), row[PRICE_COLUMNS].to_json(orient='records', date_format='iso')[1:-1])
+        for row, error in rejected
+    ]
+
+def verify_load(df, inserted_ids, total_records):
+    """
+    Log what this batch wrote, using the ids returned by the insert itself.
+    Cost depends on the batch size only, never on the history table size.
+    """
+    inserted_per_crypto = Counter(inserted_ids)
+
+    logger.info(f"="*60)
+    logger.info("VERIFICATION - Rows written by this batch:")
+    logger.info(f"="*60)
+    for crypto_id in sorted(inserted_per_crypto):
+        logger.info(f"  ✓ {crypto_id}: {inserted_per_crypto[crypto_id]} record(s)")
+
+    skipped = sorted(set(df['crypto_id']) - set(inserted_per_crypto))
+    if skipped:
+        logger.warning(f"No new rows for {len(skipped)} crypto(s), already loaded or rejected: {skipped}")
+
+    logger.info(f"Total records in database: {total_records}")
+    logger.info(f"="*60)
+
+def history_rows(df):
+    """df[PRICE_HISTORY_COLUMNS], with empty analytics columns for a batch that has none"""
+    return df.reindex(columns=PRICE_HISTORY_COLUMNS)
+
+def dataframe_to_csv_buffer(df):
+    """
+    Serialize the crypto_prices columns into an in-memory CSV buffer for COPY.
+    Missing values become empty fields, which COPY reads as NULL.
+    """
+    buffer = io.StringIO()
+    history_rows(df).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    return buffer
+
+class StorageBackend:
+    """
+    What the pipeline needs from a store: load() a transformed batch into
+    crypto_prices and crypto_prices_latest, fx_load() conversions, the
+    recent_* reads, fetch() for query.py, and close(). STORAGE_BACKEND
+    picks the implementation; `dialect` names its SQL flavour.
+    """
+
+    dialect = None
+
+    def ensure_schema(self):
+        raise NotImplementedError
+
+    def load(self, df, rejected=None):
+        """
+        Write df; crypto_ids of rows dead-lettered instead of written are
+        appended to `rejected` when a list is passed.
+        """
+        raise NotImplementedError
+
+    def copy_load(self, df, rejected=None):
+        """Bulk path for large batches (backfill)"""
+        return self.load(df, rejected)
+
+    def fx_load(self, df):
+        raise NotImplementedError
+
+    def rebuild_rollups(self, since, until):
+        raise NotImplementedError
+
+    def recent_counts(self, minutes=5):
+        raise NotImplementedError
+
+    def recent_history(self, since, per_coin):
+        raise NotImplementedError
+
+    def fetch(self, query, params=()):
+        """Rows of a read-only query written for this backend's dialect"""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+class PostgresLoader(StorageBackend):
+    """
+    Long-lived PostgreSQL loader backed by a connection pool.
+    The schema is applied once per loader and each pooled connection keeps
+    its staging table and prepared statements for the life of the session.
+    """
+
+    dialect = 'postgres'
+
+    def __init__(self, pool=None):
+        if pool is None:
+            try:
+                pool = ThreadedConnectionPool(
+                    Config.DB_POOL_MIN,
+                    Config.DB_POOL_MAX,
+                    host=Config.DB_HOST,
+                    port=Config.DB_PORT,
+                    database=Config.DB_NAME,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD
+                )
+            except Error as e:
+                logger.error(f"Error creating connection pool: {e}")
+                raise
+            logger.debug(f"Connection pool ready ({Config.DB_POOL_MIN}-{Config.DB_POOL_MAX} connections)")
+
+        self.pool = pool
+        # ThreadedConnectionPool raises when exhausted; make callers wait instead
+        self._slots = threading.BoundedSemaphore(Config.DB_POOL_MAX)
+        self._schema_ready = not Config.AUTO_MIGRATE
+        self._schema_lock = threading.Lock()
+        self._prepared_connections = set()
+        self.partitions = PartitionManager()
+
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, connection, close=False):
+        try:
+            self.pool.putconn(connection, close=close)
+        finally:
+            # The pool closes connections above DB_POOL_MIN; a new connection
+            # may reuse the id, so it must not look already prepared
+            if connection.closed:
+                self._prepared_connections.discard(id(connection))
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a prepared connection from the pool, waiting if all are in use"""
+        connection = self._checkout()
+        broken = False
+        try:
+            self._prepare_session(connection)
+            yield connection
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self._checkin(connection, close=broken or bool(connection.closed))
+
+    def ensure_schema(self):
+        """Create tables on first use; later calls are free"""
+        if self._schema_ready:
+            return
+
+        connection = self._checkout()
+        try:
+            self._ensure_schema(connection)
+        finally:
+            self._checkin(connection)
+
+    def _ensure_schema(self, connection):
+        """Apply the schema on the given connection, once per loader"""
+        if self._schema_ready:
+            return
+
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+
+            try:
+                with connection.cursor() as cursor:
+                    create_tables(cursor)
+                connection.commit()
+            except Error:
+                connection.rollback()
+                raise
+
+            self._schema_ready = True
+            logger.info("✓ Database schema ready")
+
+    def _prepare_session(self, connection):
+        """Create the staging table and prepared statements once per connection"""
+        if id(connection) in self._prepared_connections:
+            return
+
+        self._ensure_schema(connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute(STAGING_TABLE_QUERY)
+            for name, statement in PREPARED_STATEMENTS.items():
+                cursor.execute("SELECT 1 FROM pg_prepared_statements WHERE name = %s", (name,))
+                if cursor.fetchone() is None:
+                    cursor.execute(statement)
+        connection.commit()
+
+        self._prepared_connections.add(id(connection))
+        logger.debug("Prepared statements ready on pooled connection")
+
+    def _ensure_partitions(self, connection, cursor, df):
+        """
+        Create any partitions the batch needs before it is written. New
+        partitions are committed on their own so parallel loads see them.
+        """
+        if self.partitions.enabled and not df.empty:
+            extracted_at = pd.to_datetime(df['extracted_at'])
+            self.partitions.ensure_for_batch(
+                cursor, extracted_at.min(), extracted_at.max(), commit=connection.commit
+            )
+
+    def _batch_committed(self, connection, cursor, batch, rows):
+        """Ledger lookup; ends the read-only transaction when the batch is already in"""
+        cursor.execute("EXECUTE batch_committed (%s)", (batch,))
+        if cursor.fetchone() is None:
+            return False
+        connection.commit()
+        logger.info(f"✓ Batch {batch} ({rows} rows) already committed, skipped")
+        return True
+
+    def _write_isolated(self, cursor, df, write, reset=None):
+        """
+        write(cursor, df) inside a savepoint. When it fails on a row-level
+        error, roll back to the savepoint and retry each half the same way,
+        down to single rows, so k bad rows cost O(k log n) writes instead of
+        one per row. `reset` runs after each part that succeeds, before the
+        next one is written.
+        Returns: (inserted ids, snapshot rows, [(row frame, error), ...])
+        """
+        rejected = []
+
+        def attempt(part):
+            cursor.execute("SAVEPOINT isolate_rows")
+            try:
+                result = write(cursor, part)
+            except ROW_ERRORS as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT isolate_rows")
+                cursor.execute("RELEASE SAVEPOINT isolate_rows")
+                if len(part) == 1:
+                    rejected.append((part, e))
+                    return [], 0
+                middle = len(part) // 2
+                left_ids, left_rows = attempt(part.iloc[:middle])
+                right_ids, right_rows = attempt(part.iloc[middle:])
+                return left_ids + right_ids, left_rows + right_rows
+
+            cursor.execute("RELEASE SAVEPOINT isolate_rows")
+            if reset and len(part) < len(df):
+                cursor.execute(reset)
+            return result
+
+        inserted_ids, snapshot_rows = attempt(df)
+        return inserted_ids, snapshot_rows, rejected
+
+    def _write(self, cursor, batch, df, write, reset=None, rejected_ids=None):
+        """
+        Run write(cursor, df), isolating bad rows into crypto_load_dead_letters
+        when LOAD_ISOLATE_FAILURES is on; their crypto_ids go to rejected_ids.
+        Returns: (inserted ids, snapshot rows)
+        """
+        if not Config.LOAD_ISOLATE_FAILURES:
+            return write(cursor, df)
+
+        inserted_ids, snapshot_rows, rejected = self._write_isolated(cursor, df, write, reset)
+        if rejected:
+            execute_values(
+                cursor, INSERT_DEAD_LETTER_QUERY, dead_letter_rows(batch, rejected),
+                template=DEAD_LETTER_TEMPLATE
+            )
+            if rejected_ids is not None:
+                rejected_ids.extend(str(crypto_id) for part, _ in rejected for crypto_id in part['crypto_id'])
+            first = rejected[0][1]
+            logger.warning(
+                f"⚠ {len(rejected)} row(s) rejected to crypto_load_dead_letters, "
+                f"first: [{first.pgcode}] {str(first).strip().splitlines()[0]}"
+            )
+        return inserted_ids, snapshot_rows
+
+    def _copy_rows(self, cursor, df):
+        """COPY df into the staging table and merge it into both targets"""
+        cursor.copy_expert(
+            f"COPY crypto_prices_staging ({', '.join(PRICE_HISTORY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            dataframe_to_csv_buffer(df)
         )
-        VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s)
-
-        ON CONFLICT (crypto_id)
-        DO UPDATE SET
-            crypto_name = EXCLUDED.crypto_name,
-            price_inr = EXCLUDED.price_inr,
-            market_cap_inr = EXCLUDED.market_cap_inr,
-            volume_24h_inr = EXCLUDED.volume_24h_inr,
-            price_change_24h_pct = EXCLUDED.price_change_24h_pct,
-            price_category = EXCLUDED.price_category,
-            is_positive_change = EXCLUDED.is_positive_change,
-            extracted_at = EXCLUDED.extracted_at,
-            updated_at = CURRENT_TIMESTAMP;
+
+        cursor.execute("EXECUTE merge_history")
+        inserted_ids = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute("EXECUTE merge_snapshot")
+        return inserted_ids, cursor.rowcount
+
+    def copy_load(self, df, rejected=None):
         """
-        
-        # Track successes and failures
-        records_inserted = 0
-        
+        Load DataFrame via COPY into the staging table, then merge into
+        crypto_prices and crypto_prices_latest with one statement each.
+        A batch already in the load ledger is skipped without touching them.
+        Returns: Number of new rows inserted into crypto_prices.
+        """
+        logger.info(f"Bulk loading {len(df)} records to PostgreSQL (COPY)")
+        batch = batch_id(df)
+
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                load_start = time.perf_counter()
+
+                if self._batch_committed(connection, cursor, batch, len(df)):
+                    return 0
+
+                self._ensure_partitions(connection, cursor, df)
+
+                # Stream the frame into the staging table, then a set-based merge into both targets
+                inserted_ids, snapshot_rows = self._write(
+                    cursor, batch, df, self._copy_rows, reset="DELETE FROM crypto_prices_staging",
+                    rejected_ids=rejected
+                )
+                records_inserted = len(inserted_ids)
+
+                cursor.execute("EXECUTE bump_row_count (%s)", (records_inserted,))
+                total_records = cursor.fetchone()[0]
+
+                cursor.execute("EXECUTE record_batch (%s, %s, %s, %s, %s)", batch_record(batch, df, records_inserted))
+                connection.commit()
+                notify_commit()
+
+                elapsed = time.perf_counter() - load_start
+                records_skipped = len(df) - records_inserted
+                rows_per_sec = len(df) / elapsed if elapsed > 0 else float('inf')
+
+                logger.info(f"✓ Inserted: {records_inserted}, skipped (already loaded or rejected): {records_skipped}")
+                logger.info(f"✓ Snapshot rows changed: {snapshot_rows} of {df['crypto_id'].nunique()} coins")
+                logger.info(f"✓ Bulk load took {elapsed:.4f}s ({rows_per_sec:,.0f} rows/sec)")
+
+                verify_load(df, inserted_ids, total_records)
+
+                return records_inserted
+
+            except Error as e:
+                connection.rollback()
+                self.partitions.forget()
+                logger.error("Transaction rolled back due to error")
+                logger.error(f"Database error: {e}")
+                raise
+            finally:
+                cursor.close()
+
+    def _insert_rows(self, cursor, df):
+        """Multi-row VALUES insert, its candles, then the VALUES snapshot merge"""
         # ============================================================
         # KEY FIX: Replace pandas NaN with Python None (PostgreSQL NULL)
         # ============================================================
         # Pandas uses NaN for missing values
         # PostgreSQL uses NULL
         # psycopg2 expects Python None for NULL
-        # 
-        # 
         # ============================================================
+        df_clean = history_rows(df)
+        df_clean = df_clean.astype(object).where(pd.notna(df_clean), None)
+        records = list(df_clean.itertuples(index=False, name=None))
+        # PRICE_COLUMNS come first, and are all the snapshot keeps
+        snapshot_records = [record[:len(PRICE_COLUMNS)] for record in records]
 
+        inserted = execute_values(cursor, INSERT_PRICE_QUERY, records, page_size=100, fetch=True)
+        if inserted:
+            execute_values(
+                cursor, ROLLUP_VALUES_QUERY, inserted, template=ROLLUP_VALUES_TEMPLATE, page_size=1000
+            )
+        changed = execute_values(
+            cursor, SNAPSHOT_VALUES_QUERY, snapshot_records, template=PRICE_VALUES_TEMPLATE, page_size=1000, fetch=True
+        )
+        return [row[0] for row in inserted], len(changed)
 
-        df_clean = df.where(pd.notna(df), None)
+    def batch_load(self, df, rejected=None):
+        """
+        Load DataFrame with multi-row VALUES inserts into both targets
+        """
+        logger.info(f"Loading {len(df)} records to PostgreSQL")
+        batch = batch_id(df)
 
-        records = [
-            (
-                row['crypto_id'],
-                row['crypto_name'],
-                row['price_inr'],
-                row['market_cap_inr'],
-                row['volume_24h_inr'],
-                row['price_change_24h_pct'],
-                row['price_category'],
-                row['is_positive_change'],
-                row['extracted_at']
-            )
-            for _, row in df_clean.iterrows()
-        ]
-        
-        # Batch insert
-        try:
-            execute_batch(cursor, insert_query, records, page_size=100)
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                if self._batch_committed(connection, cursor, batch, len(df)):
+                    return 0
+
+                self._ensure_partitions(connection, cursor, df)
+
+                inserted_ids, snapshot_rows = self._write(
+                    cursor, batch, df, self._insert_rows, rejected_ids=rejected
+                )
+
+                cursor.execute("EXECUTE bump_row_count (%s)", (len(inserted_ids),))
+                total_records = cursor.fetchone()[0]
+
+                cursor.execute("EXECUTE record_batch (%s, %s, %s, %s, %s)", batch_record(batch, df, len(inserted_ids)))
+                connection.commit()
+                notify_commit()
+
+                records_inserted = len(inserted_ids)
+                logger.info(f"✓ {len(df)} processed in batch, {records_inserted} new, {snapshot_rows} snapshot rows changed.")
+
+                verify_load(df, inserted_ids, total_records)
+
+                return records_inserted
+
+            except Error as e:
+                connection.rollback()
+                self.partitions.forget()
+                logger.error("Batch insert failed.")
+                logger.error(f"Error: {e}")
+                raise
+            finally:
+                cursor.close()
+
+    def fx_load(self, df):
+        """
+        Insert long-format currency conversions into crypto_prices_fx
+        Returns: Number of new rows.
+        """
+        batch = batch_id(df, FX_COLUMNS, prefix='fx-')
+
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                if self._batch_committed(connection, cursor, batch, len(df)):
+                    return 0
 
-            execute_batch(cursor, snapshot_query, records, page_size=100)
+                df_clean = df[FX_COLUMNS].astype(object).where(pd.notna(df[FX_COLUMNS]), None)
+                records = list(df_clean.itertuples(index=False, name=None))
 
+                inserted = execute_values(cursor, INSERT_FX_QUERY, records, page_size=1000, fetch=True)
+                cursor.execute("EXECUTE record_batch (%s, %s, %s, %s, %s)", batch_record(batch, df, len(inserted)))
+                connection.commit()
+                notify_commit()
+
+                logger.info(f"✓ {len(records)} currency rows processed, {len(inserted)} new.")
+                return len(inserted)
+
+            except Error as e:
+                connection.rollback()
+                logger.error("Currency load failed.")
+                logger.error(f"Error: {e}")
+                raise
+            finally:
+                cursor.close()
+
+    def rebuild_rollups(self, since, until):
+        """
+        Recompute every candle of the days covering [since, until] from
+        crypto_prices in one transaction, e.g. for rows loaded before the
+        rollups existed. Returns: Candles written per table.
+        """
+        start, end = rebuild_bounds(since, until)
+        logger.info(f"Rebuilding candles for {start:%Y-%m-%d} to {end:%Y-%m-%d} (exclusive)")
+
+        written = {}
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                for table in ROLLUP_TABLES:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE bucket_start >= %(start)s AND bucket_start < %(end)s",
+                        {'start': start, 'end': end}
+                    )
+                    cursor.execute(
+                        upsert_candles_query(table, REBUILD_ROLLUP_SOURCE, 'postgres'),
+                        {'start': start, 'end': end}
+                    )
+                    written[table] = cursor.rowcount
+                connection.commit()
+                notify_commit()
+            except Error as e:
+                connection.rollback()
+                logger.error(f"Rollup rebuild rolled back: {e}")
+                raise
+            finally:
+                cursor.close()
+
+        logger.info(f"✓ Rebuilt candles: {written}")
+        return written
+
+    def recent_counts(self, minutes=5):
+        """Rows per crypto written in the last `minutes` minutes"""
+        since = datetime.now() - timedelta(minutes=minutes)
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(RECENT_PRICES_QUERY, (since,))
+                rows = cursor.fetchall()
             connection.commit()
+        return rows
 
-            records_inserted = len(records)
+    def recent_history(self, since, per_coin):
+        """Up to per_coin most recent prices per crypto since `since`, oldest first"""
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(RECENT_HISTORY_QUERY, (since, per_coin))
+                rows = cursor.fetchall()
+            connection.commit()
 
+        history = pd.DataFrame(rows, columns=['crypto_id', 'price_inr', 'extracted_at'])
+        history['price_inr'] = history['price_inr'].astype('float64')
+        return history
 
-            logger.info(f"✓ {len(records)} processed in batch.)")
-            
-        except Error as e:
-            connection.rollback()
-            logger.error("Batch insert failed.")
-            logger.error(f"Error: {e}")
-            raise
-            # Continue to try other records
-            
-        
-        # Verify insert with detailed query
-        cursor.execute("""
-            SELECT crypto_name, COUNT(*) 
-            FROM crypto_prices 
-            WHERE extracted_at >= NOW() - INTERVAL '5 minutes'
-            GROUP BY crypto_name
-            ORDER BY crypto_name
-        """)
-        recent_inserts = cursor.fetchall()
-        
-        logger.info(f"="*60)
-        logger.info("VERIFICATION - Recent inserts (last 5 mins):")
-        logger.info(f"="*60)
-        for crypto, count in recent_inserts:
-            logger.info(f"  ✓ {crypto}: {count} record(s)")
-        
-        if len(recent_inserts) < len(df):
-            logger.warning(f"Expected {len(df)} cryptos, but only {len(recent_inserts)} were inserted!")
-        
-        # Total count
-        cursor.execute("SELECT COUNT(*) FROM crypto_prices")
-        total_records = cursor.fetchone()[0]
-        logger.info(f"Total records in database: {total_records}")
-        logger.info(f"="*60)
-        
-        return records_inserted
-        
-    except Error as e:
-        if connection:
-            connection.rollback()
-            logger.error("Transaction rolled back due to error")
-        logger.error(f"Database error: {e}")
-        raise
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
-            logger.debug("Database connection closed")
-
-def load(df):
-    """Main load function"""
+    def fetch(self, query, params=()):
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+            connection.commit()
+        return rows
+
+    def load(self, df, rejected=None):
+        """Load with the configured LOAD_METHOD"""
+        if Config.LOAD_METHOD == 'copy':
+            return self.copy_load(df, rejected)
+        return self.batch_load(df, rejected)
+
+    def close(self):
+        """Close every pooled connection"""
+        if not self.pool.closed:
+            self.pool.closeall()
+            self._prepared_connections.clear()
+            logger.debug("Connection pool closed")
+
+_loader = None
+_loader_lock = threading.Lock()
+
+def get_loader():
+    """Return the process-wide StorageBackend for STORAGE_BACKEND, creating it on first use"""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                if Config.STORAGE_BACKEND == 'sqlite':
+                    from sqlite_backend import SQLiteLoader
+                    _loader = SQLiteLoader()
+                else:
+                    _loader = PostgresLoader()
+                atexit.register(_loader.close)
+    return _loader
+
+def load_to_postgres(df):
+    """
+    Load DataFrame to PostgreSQL with proper NULL handling
+    """
+    return get_loader().batch_load(df)
+
+def bulk_load_to_postgres(df):
+    """
+    Load DataFrame to PostgreSQL via COPY + staging-table merge
+    """
+    return get_loader().copy_load(df)
+
+def load(df, rejected=None):
+    """
+    Main load function. Pass a list as `rejected` to collect the crypto_ids
+    of rows that went to crypto_load_dead_letters instead of the tables.
+    """
     logger.info("="*60)
     logger.info("LOAD PHASE - Starting")
     logger.info("="*60)
     
     try:
-        records_inserted = load_to_postgres(df)
+        records_inserted = get_loader().load(df, rejected)
         
         if records_inserted == len(df):
             logger.info("✓ Load phase completed successfully - ALL RECORDS INSERTED")
@@ -236,6 +1012,10 @@ if __name__ == "__main__":
     print()
     
     load(df)
+
+    print("\nRecent inserts (last 5 mins):")
+    for crypto_id, count in get_loader().recent_counts(minutes=5):
+        print(f"  {crypto_id}: {count}")
     print("\n✓ Load test complete!")
 
     end_time = time.time()
@@ -0,0 +1,32 @@
+# migrate.py - Apply the database schema outside the pipeline run
+from load import get_db_connection, create_tables, get_loader
+from config import Config
+from logger import setup_logger
+import sys
+
+logger = setup_logger('Migrate')
+
+def migrate():
+    """Create all pipeline tables and indexes"""
+    logger.info("Applying database schema...")
+
+    if Config.STORAGE_BACKEND == 'sqlite':
+        get_loader().ensure_schema()
+        return True
+
+    connection = get_db_connection()
+    try:
+        with connection.cursor() as cursor:
+            create_tables(cursor)
+        connection.commit()
+        logger.info("✓ Schema is up to date")
+        return True
+    except Exception as e:
+        connection.rollback()
+        logger.error(f"✗ Migration failed: {e}")
+        return False
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    sys.exit(0 if migrate() else 1)
@@ -0,0 +1,165 @@
+# parquet_sink.py - Partitioned Parquet dataset as an alternative load target
+import argparse
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+from logger import setup_logger
+from config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset  # noqa: F401  (pa.dataset.partitioning)
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed when the parquet sink is enabled
+    pa = pq = None
+
+logger = setup_logger('ParquetSink')
+
+class ParquetSink:
+    """
+    Transformed batches appended to a Hive-partitioned Parquet dataset:
+    <root>/dt=YYYY-MM-DD/crypto_id=<id>/part-<timestamp>-<uuid>.parquet
+
+    Every file is written under a dot-prefixed temporary name (ignored by
+    pyarrow/Spark/DuckDB dataset discovery) and renamed into place, so
+    readers never see a half-written file. Each batch adds one small file
+    per (date, coin); compact() merges them once a partition collects
+    PARQUET_COMPACT_MIN_FILES of them.
+    """
+
+    def __init__(self, root=None):
+        if pq is None:
+            raise ImportError("The parquet sink needs pyarrow: pip install pyarrow")
+        self.root = Path(root or Config.PARQUET_DIR)
+        self.lock = threading.Lock()
+
+    def partition_dir(self, day, crypto_id):
+        return self.root / f"dt={day}" / f"crypto_id={quote(str(crypto_id), safe='')}"
+
+    def _commit(self, table, directory):
+        """Write table to a new file in directory atomically. Returns: Final path."""
+        name = f"part-{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = directory / f".{name}.tmp"
+        directory.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, tmp_path, compression=Config.PARQUET_COMPRESSION)
+        os.replace(tmp_path, directory / name)
+        return directory / name
+
+    def write(self, df):
+        """
+        Append one batch, one file per (date, crypto_id) in it. crypto_id
+        and the date live in the path, not in the files.
+        Returns: (rows written, partitions touched)
+        """
+        if df.empty:
+            return 0, []
+
+        days = df['extracted_at'].dt.strftime('%Y-%m-%d')
+        df = df.assign(dt=days).sort_values(['dt', 'crypto_id'], kind='stable')
+        crypto_ids = df['crypto_id'].astype(str).to_numpy()
+        dates = df['dt'].to_numpy()
+
+        # Plain strings: Parquet dictionary-encodes them anyway, and files stay
+        # mergeable when a batch's categoricals use a different index width
+        categorical = df.select_dtypes('category').columns.drop(['crypto_id'], errors='ignore')
+        df = df.astype({column: 'str' for column in categorical})
+
+        # Convert once, then slice the Arrow table per partition (zero-copy)
+        table = pa.Table.from_pandas(df.drop(columns=['dt', 'crypto_id']), preserve_index=False)
+        keys = list(zip(dates, crypto_ids))
+        boundaries = [0] + [i for i in range(1, len(keys)) if keys[i] != keys[i - 1]] + [len(keys)]
+
+        touched = []
+        with self.lock:
+            for start, end in zip(boundaries, boundaries[1:]):
+                directory = self.partition_dir(*keys[start])
+                self._commit(table.slice(start, end - start), directory)
+                touched.append(directory)
+
+            if Config.PARQUET_COMPACT_MIN_FILES > 0:
+                for directory in touched:
+                    self._compact_partition(directory)
+
+        logger.info(f"✓ Wrote {len(df)} rows to {len(touched)} Parquet partitions under {self.root}")
+        return len(df), touched
+
+    def _small_files(self, directory):
+        return sorted(
+            path for path in directory.glob('part-*.parquet')
+            if path.stat().st_size < Config.PARQUET_TARGET_FILE_BYTES
+        )
+
+    def _compact_partition(self, directory, min_files=None):
+        """Merge a partition's small files into one. Returns: Files merged (0 if left alone)."""
+        min_files = Config.PARQUET_COMPACT_MIN_FILES if min_files is None else min_files
+        small = self._small_files(directory)
+        if len(small) < max(min_files, 2):
+            return 0
+
+        table = pa.concat_tables([pq.read_table(path) for path in small], promote_options='default')
+        table = table.sort_by('extracted_at')
+        self._commit(table, directory)
+        # The merged file is visible before the inputs go, so a reader racing
+        # the unlink can see rows twice but never miss any
+        for path in small:
+            path.unlink()
+        logger.debug(f"Compacted {len(small)} files ({table.num_rows} rows) in {directory}")
+        return len(small)
+
+    def compact(self, min_files=2):
+        """Compact every partition holding at least min_files small files. Returns: Files merged."""
+        merged = 0
+        with self.lock:
+            for directory in sorted(self.root.glob('dt=*/crypto_id=*')):
+                merged += self._compact_partition(directory, min_files)
+        logger.info(f"✓ Compaction merged {merged} small files under {self.root}")
+        return merged
+
+    def read(self, crypto_ids=None, since=None, until=None):
+        """
+        The dataset as a DataFrame. Filters on crypto_id and the date prune
+        whole partition directories before any file is opened.
+        """
+        filters = []
+        if crypto_ids:
+            filters.append(('crypto_id', 'in', [str(c) for c in crypto_ids]))
+        if since is not None:
+            filters.append(('dt', '>=', f"{since:%Y-%m-%d}"))
+        if until is not None:
+            filters.append(('dt', '<=', f"{until:%Y-%m-%d}"))
+
+        schema = pa.schema([('dt', pa.string()), ('crypto_id', pa.string())])
+        df = pq.read_table(
+            self.root, filters=filters or None,
+            partitioning=pa.dataset.partitioning(schema, flavor='hive')
+        ).to_pandas()
+        if since is not None:
+            df = df[df['extracted_at'] >= since]
+        if until is not None:
+            df = df[df['extracted_at'] <= until]
+        return df.sort_values(['crypto_id', 'extracted_at'], ignore_index=True)
+
+_sink = None
+_sink_lock = threading.Lock()
+
+def get_parquet_sink():
+    """Return the process-wide ParquetSink"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = ParquetSink()
+    return _sink
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the Parquet dataset")
+    parser.add_argument('--compact', action='store_true', help="Merge small files in every partition")
+    args = parser.parse_args()
+
+    if args.compact:
+        get_parquet_sink().compact()
+    else:
+        parser.print_help()
@@ -0,0 +1,125 @@
+# partitions.py - Range partition management for crypto_prices
+import threading
+from datetime import datetime, timedelta
+from logger import setup_logger
+from config import Config
+
+logger = setup_logger('Partitions')
+
+PARENT_TABLE = 'crypto_prices'
+
+def partition_start(ts, granularity):
+    """Start of the partition period that contains ts"""
+    if granularity == 'daily':
+        return datetime(ts.year, ts.month, ts.day)
+    if granularity == 'monthly':
+        return datetime(ts.year, ts.month, 1)
+    raise ValueError(f"Unknown partition granularity: {granularity}")
+
+def next_partition_start(start, granularity):
+    """Start of the partition period right after the one beginning at start"""
+    if granularity == 'daily':
+        return start + timedelta(days=1)
+    if granularity == 'monthly':
+        return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    raise ValueError(f"Unknown partition granularity: {granularity}")
+
+def partition_name(start, granularity):
+    """e.g. crypto_prices_p20260214 (daily) or crypto_prices_p202602 (monthly)"""
+    suffix = start.strftime('%Y%m%d' if granularity == 'daily' else '%Y%m')
+    return f"{PARENT_TABLE}_p{suffix}"
+
+def partitions_between(start, end, granularity):
+    """
+    List (name, lower, upper) for every partition overlapping [start, end]
+    """
+    partitions = []
+    lower = partition_start(start, granularity)
+    while lower <= end:
+        upper = next_partition_start(lower, granularity)
+        partitions.append((partition_name(lower, granularity), lower, upper))
+        lower = upper
+    return partitions
+
+def partitions_ahead(now, granularity, ahead):
+    """The partition holding now plus `ahead` upcoming ones"""
+    end = partition_start(now, granularity)
+    for _ in range(ahead):
+        end = next_partition_start(end, granularity)
+    return partitions_between(now, end, granularity)
+
+def create_partition_sql(name, lower, upper):
+    """DDL for one range partition of crypto_prices"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{lower:%Y-%m-%d %H:%M:%S}') TO ('{upper:%Y-%m-%d %H:%M:%S}');"
+    )
+
+class PartitionManager:
+    """
+    Keeps crypto_prices partitions created ahead of the data.
+    Known partitions are cached, so a batch that lands in existing
+    partitions costs no catalog queries or DDL.
+
+    When a `commit` callable is given, new partitions are committed before
+    they are marked known, so concurrent loaders never skip a partition that
+    another thread has created but not yet committed.
+    """
+
+    def __init__(self, granularity=None, ahead=None):
+        self.granularity = granularity or Config.PARTITION_GRANULARITY
+        self.ahead = Config.PARTITIONS_AHEAD if ahead is None else ahead
+        self.known = None
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.granularity != 'none'
+
+    def _load_existing(self, cursor):
+        cursor.execute("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+        """, (PARENT_TABLE,))
+        self.known = {row[0] for row in cursor.fetchall()}
+        logger.debug(f"Found {len(self.known)} existing partitions")
+
+    def _create(self, cursor, partitions, commit=None):
+        with self.lock:
+            if self.known is not None and all(name in self.known for name, _, _ in partitions):
+                return 0
+
+            if self.known is None:
+                self._load_existing(cursor)
+
+            missing = [p for p in partitions if p[0] not in self.known]
+            for name, lower, upper in missing:
+                cursor.execute(create_partition_sql(name, lower, upper))
+            if missing and commit is not None:
+                commit()
+
+            for name, lower, upper in missing:
+                self.known.add(name)
+                logger.info(f"✓ Created partition {name} [{lower:%Y-%m-%d} → {upper:%Y-%m-%d})")
+            return len(missing)
+
+    def ensure_ahead(self, cursor, now=None, commit=None):
+        """Create the current partition and the configured number ahead"""
+        if not self.enabled:
+            return 0
+        return self._create(cursor, partitions_ahead(now or datetime.now(), self.granularity, self.ahead), commit)
+
+    def ensure_for_batch(self, cursor, start, end, commit=None):
+        """Create partitions covering [start, end] and keep the horizon ahead of it"""
+        if not self.enabled:
+            return 0
+        needed = partitions_between(start, end, self.granularity)
+        needed += partitions_ahead(max(end, datetime.now()), self.granularity, self.ahead)
+        return self._create(cursor, needed, commit)
+
+    def forget(self):
+        """Drop the cache, e.g. after the surrounding transaction rolled back"""
+        with self.lock:
+            self.known = None
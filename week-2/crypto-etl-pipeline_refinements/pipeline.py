@@ -1,15 +1,118 @@
 # pipeline.py ETL Pipeline Orchestration
 from datetime import datetime
 from logger import setup_logger
-from extract import extract
+from config import Config
+from extract import extract, extract_market_pages
 from transform import transform
-from load import load
+from load import load, get_loader
+from currency import convert
+from change_detection import get_change_detector
+from analytics import get_analytics
+from raw_store import get_raw_store
+from parquet_sink import get_parquet_sink
+from write_behind import get_write_behind
 
 logger = setup_logger('Pipeline')
 
-def run_pipeline():
+def land(source, payload, extracted_at):
+    """Keep the raw response so it can be replayed without the API"""
+    if Config.RAW_LANDING:
+        get_raw_store().append(source, payload, extracted_at)
+
+def load_batch(df, detect_changes=False, sinks=None):
+    """
+    Load one transformed batch into each of sinks (default SINKS): 'postgres'
+    (plus its TARGET_CURRENCIES conversions) and/or the 'parquet' dataset.
+    With detect_changes, coins whose values have not changed since the last
+    write are dropped first; live polls use it, replays do not. Rolling
+    analytics see only the rows that are written.
+    """
+    sinks = sinks or Config.SINKS
+    detector = get_change_detector() if detect_changes and Config.CHANGE_DETECTION else None
+    if detector is not None:
+        df = detector.changed_rows(df)
+        if df.empty:
+            logger.info("No changed prices, nothing to load")
+            return 0
+
+    # Rolling mean/std/min/max and anomaly flags as extra columns
+    if Config.ANALYTICS:
+        df = get_analytics().update(df)
+
+    records_loaded = 0
+    rejected = []
+    if 'postgres' in sinks:
+        records_loaded = load(df, rejected=rejected)
+        if Config.TARGET_CURRENCIES and not df.empty:
+            get_loader().fx_load(convert(df))
+
+    if 'parquet' in sinks:
+        rows_written, _ = get_parquet_sink().write(df)
+        # Postgres skips rows it already holds; with Parquet alone, count what was appended
+        if 'postgres' not in sinks:
+            records_loaded = rows_written
+
+    # Only after every sink committed, so a failed batch is retried next run;
+    # dead-lettered rows are not remembered, so the same price is tried again
+    if detector is not None:
+        detector.remember(df[~df['crypto_id'].astype(str).isin(rejected)])
+    return records_loaded
+
+def write_batch(df, detect_changes=False, sinks=None):
+    """
+    load_batch() now, or with WRITE_BEHIND queue it for the background
+    loader so the next fetch does not wait on the database.
+    Returns: Records loaded (or queued).
+    """
+    if Config.WRITE_BEHIND:
+        return get_write_behind(load_batch).submit(df, detect_changes=detect_changes, sinks=sinks)
+    return load_batch(df, detect_changes=detect_changes, sinks=sinks)
+
+def run_markets_stream(sinks=None):
+    """
+    Extract, transform and load /coins/markets one page at a time. Each page
+    is written before the next one is fetched, so memory stays bounded by
+    the page size rather than the number of coins tracked.
+    Returns: Total records loaded.
+    """
+    records_loaded = 0
+    extracted_at = datetime.now()
+
+    for page_number, page in enumerate(extract_market_pages(), start=1):
+        logger.info(f"\n[page {page_number}] TRANSFORM + LOAD")
+        land('markets', page, extracted_at)
+        df = transform(page, extracted_at=extracted_at)
+        if not df.empty:
+            records_loaded += write_batch(df, detect_changes=True, sinks=sinks)
+
+    return records_loaded
+
+def run_replay(since=None, until=None, sinks=None):
+    """
+    Transform and load responses from the raw landing zone instead of the
+    API. Each response keeps its original extracted_at, and Postgres loads
+    skip rows that already exist, so replaying the same range twice is
+    harmless there (the Parquet sink appends them again).
+    Returns: Total records loaded.
+    """
+    records_loaded = 0
+    responses = 0
+
+    for source, payload, extracted_at in get_raw_store().read(since, until):
+        responses += 1
+        df = transform(payload, extracted_at=extracted_at)
+        if not df.empty:
+            records_loaded += write_batch(df, sinks=sinks)
+
+    logger.info(f"Replayed {responses} raw responses")
+    return records_loaded
+
+def run_pipeline(replay=False, since=None, until=None, sinks=None):
     """
-    Execute complete ETL pipeline
+    Execute complete ETL pipeline.
+    With replay=True, read raw responses in [since, until] from the landing
+    zone instead of calling the API. sinks overrides SINKS, e.g.
+    ['postgres', 'parquet'] to write both.
     """
 
     start_time = datetime.now()
@@ -19,17 +122,26 @@ def run_pipeline():
     logger.info("=" * 70)
 
     try:
-        # Extract
-        logger.info("\n[1/3] EXTRACT PHASE")
-        raw_data = extract()
+        if replay:
+            logger.info("\nREPLAY from raw landing zone")
+            records_loaded = run_replay(since, until, sinks)
+        elif Config.EXTRACT_SOURCE == 'markets':
+            # Streaming extract -> transform -> load, page by page
+            records_loaded = run_markets_stream(sinks)
+        else:
+            # Extract
+            logger.info("\n[1/3] EXTRACT PHASE")
+            raw_data = extract()
+            extracted_at = datetime.now()
+            land('simple_price', raw_data, extracted_at)
 
-        # Transform
-        logger.info("\n[2/3] TRANSFORM PHASE")
-        df = transform(raw_data)
+            # Transform
+            logger.info("\n[2/3] TRANSFORM PHASE")
+            df = transform(raw_data, extracted_at=extracted_at)
 
-        #Load
-        logger.info("\n[3/3] LOAD PHASE")
-        records_loaded = load(df)
+            #Load
+            logger.info("\n[3/3] LOAD PHASE")
+            records_loaded = write_batch(df, detect_changes=True, sinks=sinks)
 
         #Success summary
         end_time = datetime.now()
@@ -38,7 +150,7 @@ def run_pipeline():
         logger.info("\n" + "=" * 70)
         logger.info("✅ PIPELINE COMPLETED SUCCESSFULLY")
         logger.info("=" * 70)
-        logger.info(f"Records processed: {records_loaded}")
+        logger.info(f"Records {'queued' if Config.WRITE_BEHIND else 'processed'}: {records_loaded}")
         logger.info(f"Duration: {duration:.2f} seconds")
         logger.info(f"Finished at: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
         logger.info("=" * 70)
@@ -0,0 +1,143 @@
+# quality.py - Declarative data-quality rules, quarantine and per-batch metrics
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from logger import setup_logger
+from config import Config
+
+logger = setup_logger('Quality')
+
+# Every rule is checked against every row. Range and category rules let
+# missing values through; not_null rules decide whether a column may be empty.
+# Freshness compares CoinGecko's last_updated_at with extracted_at (both
+# naive local time, see transform.local_time), so replayed batches are
+# judged by the time they were fetched.
+RULES = [
+    {'name': 'crypto_id_present', 'type': 'not_null', 'column': 'crypto_id'},
+    {'name': 'price_present', 'type': 'not_null', 'column': 'price_inr'},
+    {'name': 'extracted_at_present', 'type': 'not_null', 'column': 'extracted_at'},
+    {'name': 'price_positive', 'type': 'range', 'column': 'price_inr', 'min': 0, 'min_inclusive': False},
+    {'name': 'market_cap_non_negative', 'type': 'range', 'column': 'market_cap_inr', 'min': 0},
+    {'name': 'volume_non_negative', 'type': 'range', 'column': 'volume_24h_inr', 'min': 0},
+    {'name': 'change_pct_plausible', 'type': 'range', 'column': 'price_change_24h_pct', 'min': -100, 'max': 100000},
+    {'name': 'price_category_allowed', 'type': 'allowed', 'column': 'price_category', 'values': ['Low', 'Medium', 'High']},
+    {'name': 'quote_fresh', 'type': 'freshness', 'column': 'last_updated_at', 'reference': 'extracted_at',
+     'max_age_minutes': Config.DQ_MAX_STALENESS_MINUTES, 'max_ahead_minutes': 5},
+]
+
+def _numeric(df, column):
+    return df[column].to_numpy(dtype='float64', na_value=np.nan)
+
+def _timestamps(df, column):
+    return pd.to_datetime(df[column]).to_numpy(dtype='datetime64[ns]')
+
+def rule_failures(df, rule, nulls):
+    """Boolean array, True where the row breaks the rule"""
+    column = rule['column']
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+
+    kind = rule['type']
+    if kind == 'not_null':
+        return nulls[column]
+
+    if kind == 'range':
+        values = _numeric(df, column)
+        failed = np.zeros(len(df), dtype=bool)
+        if 'min' in rule:
+            below = values <= rule['min'] if rule.get('min_inclusive') is False else values < rule['min']
+            failed |= below
+        if 'max' in rule:
+            failed |= values > rule['max']
+        return failed & ~nulls[column]
+
+    if kind == 'allowed':
+        return ~df[column].isin(rule['values']).to_numpy() & ~nulls[column]
+
+    if kind == 'freshness':
+        values = _timestamps(df, column)
+        reference = _timestamps(df, rule['reference'])
+        age = reference - values
+        failed = (age > np.timedelta64(int(rule['max_age_minutes'] * 60), 's')) | \
+                 (age < -np.timedelta64(int(rule['max_ahead_minutes'] * 60), 's'))
+        return failed & ~nulls[column] & ~nulls[rule['reference']]
+
+    raise ValueError(f"Unknown rule type: {kind}")
+
+def check_quality(df, rules=None):
+    """
+    Evaluate every rule over the frame in one pass. Null masks are computed
+    once per column and shared by the rules and the metrics.
+    Returns: (passed rows, quarantined rows with a dq_failures column, metrics dict)
+    """
+    rules = RULES if rules is None else rules
+    start = time.perf_counter()
+
+    nulls = {column: df[column].isna().to_numpy() for column in df.columns}
+    failures = np.column_stack([rule_failures(df, rule, nulls) for rule in rules]) if rules \
+        else np.zeros((len(df), 0), dtype=bool)
+    failed_rows = failures.any(axis=1)
+
+    passed = df[~failed_rows]
+    quarantined = df[failed_rows].copy()
+    if len(quarantined):
+        reasons = pd.Series('', index=quarantined.index, dtype=object)
+        for i, rule in enumerate(rules):
+            hit = failures[failed_rows, i]
+            reasons[hit] = reasons[hit] + rule['name'] + ';'
+        quarantined['dq_failures'] = reasons.str.rstrip(';')
+
+    prices = _numeric(passed, 'price_inr') if 'price_inr' in df.columns else np.array([])
+    metrics = {
+        'evaluated_at': datetime.now().isoformat(timespec='seconds'),
+        'extracted_at': str(df['extracted_at'].max()) if 'extracted_at' in df.columns and len(df) else None,
+        'rows': len(df),
+        'passed': len(passed),
+        'quarantined': int(failed_rows.sum()),
+        'failures': {rule['name']: int(count) for rule, count in zip(rules, failures.sum(axis=0)) if count},
+        'nulls': {column: int(mask.sum()) for column, mask in nulls.items() if mask.any()},
+        'price_min': float(np.nanmin(prices)) if np.isfinite(prices).any() else None,
+        'price_max': float(np.nanmax(prices)) if np.isfinite(prices).any() else None,
+        'positive_changes': int(passed['is_positive_change'].sum()) if 'is_positive_change' in df.columns else 0,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+    }
+    return passed, quarantined, metrics
+
+class QualityStore:
+    """
+    Quarantined rows and metrics as NDJSON under
+    <root>/quarantine/dt=YYYY-MM-DD/ and <root>/metrics/dt=YYYY-MM-DD/
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or Config.QUALITY_DIR)
+        self.lock = threading.Lock()
+
+    def _path(self, kind, day):
+        directory = self.root / kind / f"dt={day:%Y-%m-%d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f"{kind}-{os.getpid()}.ndjson"
+
+    def record(self, metrics, quarantined):
+        """Append one metrics record and any quarantined rows"""
+        day = datetime.now()
+        with self.lock:
+            with open(self._path('metrics', day), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(metrics) + '\n')
+            if len(quarantined):
+                with open(self._path('quarantine', day), 'a', encoding='utf-8') as f:
+                    quarantined.to_json(f, orient='records', lines=True, date_format='iso')
+
+_store = None
+
+def get_quality_store():
+    """Return the process-wide QualityStore"""
+    global _store
+    if _store is None:
+        _store = QualityStore()
+    return _store
@@ -0,0 +1,181 @@
+# query.py - Read-side price queries with an in-process TTL cache
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import pandas as pd
+from logger import setup_logger
+from config import Config
+from load import ANALYTICS_COLUMNS, PRICE_COLUMNS, get_loader, on_commit
+from rollups import CANDLE_COLUMNS, ROLLUP_TABLES
+
+logger = setup_logger('Query')
+
+PLACEHOLDERS = {'postgres': '%s', 'sqlite': '?'}
+
+HISTORY_COLUMNS = ['crypto_id', 'price_inr', 'market_cap_inr', 'volume_24h_inr', 'extracted_at'] + ANALYTICS_COLUMNS
+
+# history() interval -> candle table; None reads raw ticks from crypto_prices
+CANDLE_TABLES = {unit: table for table, unit in ROLLUP_TABLES.items()}
+
+# Every query is served by an index:
+#   latest      crypto_prices_latest primary key (crypto_id)
+#   history     unique_crypto_timestamp (crypto_id, extracted_at), or the candle primary key
+#   top_movers  a top-N sort of the snapshot on Postgres, where an index on the
+#               24h change would rule out HOT updates (see load.create_tables);
+#               crypto_prices_latest_change_idx on SQLite
+def latest_query(count, dialect):
+    """Snapshot rows, for `count` ids or every coin when count is None"""
+    where = ''
+    if count is not None:
+        where = f"WHERE crypto_id IN ({', '.join([PLACEHOLDERS[dialect]] * count)})"
+    return f"SELECT {', '.join(PRICE_COLUMNS)} FROM crypto_prices_latest {where} ORDER BY crypto_id"
+
+def history_query(interval, dialect):
+    """One coin's ticks (interval None) or candles in [start, end)"""
+    p = PLACEHOLDERS[dialect]
+    if interval is None:
+        return (
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM crypto_prices "
+            f"WHERE crypto_id = {p} AND extracted_at >= {p} AND extracted_at < {p} ORDER BY extracted_at"
+        )
+    return (
+        f"SELECT {', '.join(CANDLE_COLUMNS)} FROM {CANDLE_TABLES[interval]} "
+        f"WHERE crypto_id = {p} AND bucket_start >= {p} AND bucket_start < {p} ORDER BY bucket_start"
+    )
+
+def top_movers_query(losers, dialect):
+    """Largest 24h gains (or losses) from the snapshot"""
+    return (
+        f"SELECT {', '.join(PRICE_COLUMNS)} FROM crypto_prices_latest "
+        f"WHERE price_change_24h_pct IS NOT NULL "
+        f"ORDER BY price_change_24h_pct {'ASC' if losers else 'DESC'} LIMIT {PLACEHOLDERS[dialect]}"
+    )
+
+class TTLCache:
+    """
+    Size-bounded LRU whose entries also expire after `ttl` seconds.
+    clear() bumps a generation counter; a result computed before the clear
+    is not stored afterwards, so a read racing a load cannot put stale data back.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize or Config.QUERY_CACHE_SIZE
+        self.ttl = Config.QUERY_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """(True, value) for a fresh entry, else (False, generation to pass to put())"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return False, self.generation
+
+    def put(self, key, value, generation):
+        with self.lock:
+            if generation != self.generation or self.ttl <= 0:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+_cache = TTLCache()
+
+def invalidate():
+    """Drop every cached result; called whenever a load commits"""
+    _cache.clear()
+
+# Loads in this process invalidate at once; other processes' loads show up within the TTL
+on_commit(invalidate)
+
+def to_frame(rows, columns):
+    """Rows as a DataFrame with float prices and parsed timestamps, whichever backend returned them"""
+    frame = pd.DataFrame(rows, columns=columns)
+    for column in columns:
+        if column.endswith('_at') or column == 'bucket_start':
+            frame[column] = pd.to_datetime(frame[column])
+        elif column.endswith(('_inr', '_pct')) or column in ANALYTICS_COLUMNS[:-1]:
+            frame[column] = pd.to_numeric(frame[column]).astype('float64')
+        elif column == 'is_price_anomaly':
+            # SQLite returns the flag as 0/1
+            frame[column] = frame[column].astype('boolean')
+    return frame
+
+def cached(key, query, params, columns):
+    """Serve key from the cache, or run query and remember the result"""
+    hit, value = _cache.get(key)
+    if not hit:
+        start = time.perf_counter()
+        frame = to_frame(get_loader().fetch(query, params), columns)
+        _cache.put(key, frame, value)
+        logger.debug(f"{key[0]} miss: {len(frame)} rows in {time.perf_counter() - start:.4f}s")
+        value = frame
+    return value.copy()
+
+def latest(ids=None):
+    """Current snapshot for the given coin ids (every coin when None), by crypto_id"""
+    dialect = get_loader().dialect
+    if ids is None:
+        return cached(('latest', None), latest_query(None, dialect), (), PRICE_COLUMNS)
+
+    ids = tuple(sorted(set(ids)))
+    if not ids:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    return cached(('latest', ids), latest_query(len(ids), dialect), ids, PRICE_COLUMNS)
+
+def history(crypto_id, start, end=None, interval=None):
+    """
+    Prices of one coin in [start, end), end defaulting to now. interval
+    None returns every tick with its rolling analytics; 'hour' or 'day'
+    returns OHLC candles (buckets starting in the range).
+    """
+    if interval is not None and interval not in CANDLE_TABLES:
+        raise ValueError(f"interval must be one of {sorted(CANDLE_TABLES)} or None, got '{interval}'")
+
+    # An open end is cached as such, so repeated "until now" reads share one entry for the TTL
+    columns = HISTORY_COLUMNS if interval is None else CANDLE_COLUMNS
+    return cached(
+        ('history', crypto_id, start, end, interval),
+        history_query(interval, get_loader().dialect), (crypto_id, start, end or datetime.now()), columns
+    )
+
+def top_movers(n=10, losers=False):
+    """The n coins with the largest 24h change (most negative with losers=True)"""
+    return cached(
+        ('top_movers', n, losers), top_movers_query(losers, get_loader().dialect), (n,), PRICE_COLUMNS
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query prices from the storage backend")
+    parser.add_argument('--latest', nargs='*', metavar='ID', help="Snapshot for these ids (all when none given)")
+    parser.add_argument('--history', metavar='ID', help="Price history of one coin")
+    parser.add_argument('--hours', type=int, default=24, help="History window (default 24)")
+    parser.add_argument('--interval', choices=sorted(CANDLE_TABLES), default=None, help="Candles instead of ticks")
+    parser.add_argument('--top-movers', type=int, metavar='N', help="N biggest gainers and losers")
+    args = parser.parse_args()
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        if args.latest is not None:
+            print(latest(args.latest or None))
+        if args.history:
+            print(history(args.history, datetime.now() - timedelta(hours=args.hours), interval=args.interval))
+        if args.top_movers:
+            print(top_movers(args.top_movers))
+            print(top_movers(args.top_movers, losers=True))
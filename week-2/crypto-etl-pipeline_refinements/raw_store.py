@@ -0,0 +1,86 @@
+# raw_store.py - Append-only landing zone for raw API responses
+import gzip
+import json
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from logger import setup_logger
+from config import Config
+
+logger = setup_logger('RawStore')
+
+class RawStore:
+    """
+    Raw responses as gzip-compressed NDJSON under
+    <root>/dt=YYYY-MM-DD/hour=HH/<source>-<pid>.ndjson.gz.
+
+    Each record is written as its own gzip member, so files are only ever
+    appended to and a crash can at most truncate the last record.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or Config.RAW_DATA_DIR)
+        self.lock = threading.Lock()
+
+    def partition_dir(self, ts):
+        return self.root / f"dt={ts:%Y-%m-%d}" / f"hour={ts:%H}"
+
+    def append(self, source, payload, extracted_at):
+        """Land one response under the hour of extracted_at. Returns: File written."""
+        record = {'source': source, 'extracted_at': extracted_at.isoformat(), 'payload': payload}
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+        directory = self.partition_dir(extracted_at)
+        path = directory / f"{source}-{os.getpid()}.ndjson.gz"
+        with self.lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            with gzip.open(path, 'ab') as f:
+                f.write(line)
+
+        logger.debug(f"Landed {source} response ({len(line):,} bytes) in {path}")
+        return path
+
+    def partitions(self, since=None, until=None):
+        """Hour directories overlapping [since, until], oldest first"""
+        for day_dir in sorted(self.root.glob('dt=*')):
+            for hour_dir in sorted(day_dir.glob('hour=*')):
+                hour = datetime.strptime(f"{day_dir.name[3:]} {hour_dir.name[5:]}", '%Y-%m-%d %H')
+                if since is not None and hour + timedelta(hours=1) <= since:
+                    continue
+                if until is not None and hour > until:
+                    continue
+                yield hour_dir
+
+    def _read_file(self, path):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+        except (EOFError, zlib.error, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping truncated tail of {path}: {e}")
+
+    def read(self, since=None, until=None):
+        """
+        Yield (source, payload, extracted_at) for every landed response in
+        [since, until], hour by hour. Only the partitions in range are opened.
+        """
+        for hour_dir in self.partitions(since, until):
+            for path in sorted(hour_dir.glob('*.ndjson.gz')):
+                for record in self._read_file(path):
+                    extracted_at = datetime.fromisoformat(record['extracted_at'])
+                    if since is not None and extracted_at < since:
+                        continue
+                    if until is not None and extracted_at > until:
+                        continue
+                    yield record['source'], record['payload'], extracted_at
+
+_store = None
+
+def get_raw_store():
+    """Return the process-wide RawStore"""
+    global _store
+    if _store is None:
+        _store = RawStore()
+    return _store
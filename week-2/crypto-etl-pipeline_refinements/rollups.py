@@ -0,0 +1,120 @@
+# rollups.py - Hourly and daily OHLC candles per coin, maintained on every load
+import argparse
+import sys
+from datetime import datetime, timedelta
+from logger import setup_logger
+
+logger = setup_logger('Rollups')
+
+# Candle table -> bucket width
+ROLLUP_TABLES = {
+    'crypto_candles_hourly': 'hour',
+    'crypto_candles_daily': 'day',
+}
+
+# Candle columns, in table order. CoinGecko only reports a rolling 24h
+# volume, so a candle keeps the one seen at its close.
+CANDLE_COLUMNS = [
+    'crypto_id', 'bucket_start', 'open_inr', 'high_inr', 'low_inr', 'close_inr',
+    'volume_24h_inr', 'open_at', 'close_at', 'tick_count'
+]
+
+# The SQL is shared by both storage backends; only these pieces differ
+DIALECTS = {
+    'postgres': {
+        'bucket': {
+            'hour': "date_trunc('hour', extracted_at)",
+            'day': "date_trunc('day', extracted_at)",
+        },
+        'greatest': 'GREATEST',
+        'least': 'LEAST',
+    },
+    'sqlite': {
+        'bucket': {
+            'hour': "strftime('%Y-%m-%d %H:00:00.000000', extracted_at)",
+            'day': "strftime('%Y-%m-%d 00:00:00.000000', extracted_at)",
+        },
+        'greatest': 'MAX',
+        'least': 'MIN',
+    },
+}
+
+def candle_select(source, unit, dialect):
+    """
+    One candle per (crypto_id, bucket) from `source`, any relation with
+    crypto_id, price_inr, volume_24h_inr and extracted_at. Window functions
+    pick the open and close, so it runs unchanged on Postgres and SQLite.
+    """
+    bucket = DIALECTS[dialect]['bucket'][unit]
+    return f"""
+    SELECT DISTINCT
+        crypto_id, bucket_start,
+        FIRST_VALUE(price_inr) OVER w AS open_inr,
+        MAX(price_inr) OVER w AS high_inr,
+        MIN(price_inr) OVER w AS low_inr,
+        LAST_VALUE(price_inr) OVER w AS close_inr,
+        LAST_VALUE(volume_24h_inr) OVER w AS volume_24h_inr,
+        MIN(extracted_at) OVER w AS open_at,
+        MAX(extracted_at) OVER w AS close_at,
+        COUNT(*) OVER w AS tick_count
+    FROM (
+        SELECT crypto_id, price_inr, volume_24h_inr, extracted_at, {bucket} AS bucket_start
+        FROM {source}
+        WHERE price_inr IS NOT NULL
+    ) ticks
+    WHERE true
+    WINDOW w AS (
+        PARTITION BY crypto_id, bucket_start ORDER BY extracted_at
+        ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+    )
+    """
+
+def upsert_candles_query(table, source, dialect):
+    """
+    Fold the candles of `source` into `table`. Merging is order independent:
+    high/low and counts combine, and open/close come from whichever side
+    saw the earlier/later tick, so batches may arrive in any order.
+    """
+    unit = ROLLUP_TABLES[table]
+    greatest, least = DIALECTS[dialect]['greatest'], DIALECTS[dialect]['least']
+    return f"""
+    INSERT INTO {table} AS candle ({', '.join(CANDLE_COLUMNS)})
+    {candle_select(source, unit, dialect)}
+    ON CONFLICT (crypto_id, bucket_start) DO UPDATE SET
+        open_inr = CASE WHEN excluded.open_at < candle.open_at THEN excluded.open_inr ELSE candle.open_inr END,
+        open_at = {least}(candle.open_at, excluded.open_at),
+        high_inr = {greatest}(candle.high_inr, excluded.high_inr),
+        low_inr = {least}(candle.low_inr, excluded.low_inr),
+        close_inr = CASE WHEN excluded.close_at >= candle.close_at THEN excluded.close_inr ELSE candle.close_inr END,
+        volume_24h_inr = CASE WHEN excluded.close_at >= candle.close_at
+                              THEN excluded.volume_24h_inr ELSE candle.volume_24h_inr END,
+        close_at = {greatest}(candle.close_at, excluded.close_at),
+        tick_count = candle.tick_count + excluded.tick_count
+    """
+
+def rollup_ctes(source):
+    """Postgres CTEs folding `source` into every candle table"""
+    return ',\n'.join(
+        f"upsert_{unit} AS ({upsert_candles_query(table, source, 'postgres')})"
+        for table, unit in ROLLUP_TABLES.items()
+    )
+
+def rebuild_bounds(since, until):
+    """Whole days covering [since, until], so both hourly and daily buckets are rebuilt entirely"""
+    start = datetime.combine(since.date(), datetime.min.time())
+    end = datetime.combine(until.date(), datetime.min.time()) + timedelta(days=1)
+    return start, end
+
+if __name__ == "__main__":
+    from load import get_loader
+
+    parser = argparse.ArgumentParser(description="Recompute OHLC candles from crypto_prices")
+    parser.add_argument('--since', type=datetime.fromisoformat, required=True, help="e.g. 2025-11-01")
+    parser.add_argument('--until', type=datetime.fromisoformat, default=None, help="Defaults to now")
+    args = parser.parse_args()
+
+    try:
+        get_loader().rebuild_rollups(args.since, args.until or datetime.now())
+    except Exception as e:
+        logger.error(f"✗ Rollup rebuild failed: {e}")
+        sys.exit(1)
@@ -1,12 +1,38 @@
 # run.py - Entry point for the ETL pipeline
 
 from pipeline import run_pipeline
+from daemon import run_daemon
+from write_behind import shutdown_write_behind
+from datetime import datetime
+import argparse
 import sys
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crypto Price Tracker ETL Pipeline")
+    parser.add_argument('--replay', action='store_true', help="Load from the raw landing zone instead of the API")
+    parser.add_argument('--since', type=datetime.fromisoformat, default=None, help="Replay responses from, e.g. 2026-02-14T10:00")
+    parser.add_argument('--until', type=datetime.fromisoformat, default=None, help="Replay responses up to")
+    parser.add_argument('--sinks', type=lambda value: value.lower().split(','), default=None,
+                        help="Load targets overriding SINKS, e.g. postgres,parquet")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Keep running, one pipeline run every --interval seconds, until SIGTERM")
+    parser.add_argument('--interval', type=float, default=None,
+                        help="Seconds between daemon runs (default DAEMON_INTERVAL_SECONDS)")
+    args = parser.parse_args(argv)
+    if args.daemon and args.replay:
+        parser.error("--daemon polls the API; it cannot be combined with --replay")
+    return args
+
 if __name__ == "__main__":
+    args = parse_args()
     print("\n🚀 Starting Crypto Price Tracker ETL Pipeline...\n")
 
-    success = run_pipeline()
+    if args.daemon:
+        success = run_daemon(interval=args.interval, sinks=args.sinks)
+    else:
+        success = run_pipeline(replay=args.replay, since=args.since, until=args.until, sinks=args.sinks)
+    # Queued write-behind batches must reach the database before exiting
+    success = shutdown_write_behind() and success
 
     if success:
         print("\n✅ Pipeline executed successfully!")
@@ -14,4 +40,4 @@ if __name__ == "__main__":
         sys.exit()
     else:
         print("\n❌ Pipeline failed. Check logs for details.")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
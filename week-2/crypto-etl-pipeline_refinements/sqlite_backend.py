@@ -0,0 +1,431 @@
+# sqlite_backend.py - Embedded SQLite storage for edge boxes, CI and offline runs
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+from logger import setup_logger
+from config import Config
+from load import (
+    PRICE_COLUMNS, PRICE_HISTORY_COLUMNS, ANALYTICS_COLUMN_TYPES, FX_COLUMNS, SNAPSHOT_VALUE_COLUMNS,
+    StorageBackend, batch_id, batch_record, history_rows, notify_commit, verify_load
+)
+from rollups import ROLLUP_TABLES, rebuild_bounds, upsert_candles_query
+
+logger = setup_logger('SQLite')
+
+# Timestamps are stored as fixed-width text so they sort and compare as strings
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# WAL lets readers run while a load commits; synchronous=NORMAL only fsyncs at
+# checkpoints, which is durable against process crashes (not power loss)
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -64 * 1024,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crypto_prices (
+    id INTEGER PRIMARY KEY,
+    crypto_id TEXT NOT NULL,
+    crypto_name TEXT NOT NULL,
+    price_inr REAL,
+    market_cap_inr INTEGER,
+    volume_24h_inr INTEGER,
+    price_change_24h_pct REAL,
+    price_category TEXT,
+    is_positive_change INTEGER,
+    extracted_at TEXT NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS unique_crypto_timestamp
+ON crypto_prices (crypto_id, extracted_at);
+
+CREATE TABLE IF NOT EXISTS crypto_prices_latest (
+    crypto_id TEXT PRIMARY KEY,
+    crypto_name TEXT,
+    price_inr REAL,
+    market_cap_inr INTEGER,
+    volume_24h_inr INTEGER,
+    price_change_24h_pct REAL,
+    price_category TEXT,
+    is_positive_change INTEGER,
+    extracted_at TEXT NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS crypto_prices_latest_change_idx
+ON crypto_prices_latest (price_change_24h_pct);
+
+CREATE TABLE IF NOT EXISTS crypto_prices_fx (
+    crypto_id TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    price REAL,
+    market_cap REAL,
+    volume_24h REAL,
+    extracted_at TEXT NOT NULL,
+    PRIMARY KEY (crypto_id, currency, extracted_at)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS crypto_candles_hourly (
+    crypto_id TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    open_inr REAL,
+    high_inr REAL,
+    low_inr REAL,
+    close_inr REAL,
+    volume_24h_inr INTEGER,
+    open_at TEXT NOT NULL,
+    close_at TEXT NOT NULL,
+    tick_count INTEGER NOT NULL,
+    PRIMARY KEY (crypto_id, bucket_start)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS crypto_candles_daily (
+    crypto_id TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    open_inr REAL,
+    high_inr REAL,
+    low_inr REAL,
+    close_inr REAL,
+    volume_24h_inr INTEGER,
+    open_at TEXT NOT NULL,
+    close_at TEXT NOT NULL,
+    tick_count INTEGER NOT NULL,
+    PRIMARY KEY (crypto_id, bucket_start)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS crypto_load_ledger (
+    batch_id TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    rows_inserted INTEGER NOT NULL,
+    first_extracted_at TEXT,
+    last_extracted_at TEXT,
+    loaded_at TEXT DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS crypto_table_stats (
+    table_name TEXT PRIMARY KEY,
+    row_count INTEGER NOT NULL,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+-- COUNT(*) returns a row even when NOT EXISTS filters out every input row
+INSERT INTO crypto_table_stats (table_name, row_count)
+SELECT 'crypto_prices', COUNT(*) FROM crypto_prices
+WHERE NOT EXISTS (SELECT 1 FROM crypto_table_stats WHERE table_name = 'crypto_prices')
+ON CONFLICT (table_name) DO NOTHING;
+"""
+
+# Analytics columns of crypto_prices, added to older files by ensure_schema()
+ANALYTICS_SQLITE_TYPES = {
+    column: 'INTEGER' if column_type == 'BOOLEAN' else 'REAL'
+    for column, column_type in ANALYTICS_COLUMN_TYPES.items()
+}
+
+# Per-connection staging table, like the Postgres COPY path, plus the rows
+# a merge actually inserted (SQLite has no data-modifying CTEs to chain the
+# candle upserts onto the insert)
+STAGING_TABLE_QUERY = f"""
+CREATE TEMP TABLE IF NOT EXISTS crypto_prices_staging (
+    {', '.join(PRICE_HISTORY_COLUMNS)}
+);
+CREATE TEMP TABLE IF NOT EXISTS crypto_prices_inserted (
+    crypto_id, price_inr, volume_24h_inr, extracted_at
+);
+"""
+
+INSERT_STAGING_QUERY = f"""
+INSERT INTO crypto_prices_staging ({', '.join(PRICE_HISTORY_COLUMNS)})
+VALUES ({', '.join('?' * len(PRICE_HISTORY_COLUMNS))})
+"""
+
+MERGE_HISTORY_QUERY = f"""
+INSERT INTO crypto_prices ({', '.join(PRICE_HISTORY_COLUMNS)})
+SELECT {', '.join(PRICE_HISTORY_COLUMNS)} FROM crypto_prices_staging WHERE true
+ON CONFLICT (crypto_id, extracted_at) DO NOTHING
+RETURNING crypto_id, price_inr, volume_24h_inr, extracted_at
+"""
+
+INSERT_INSERTED_QUERY = """
+INSERT INTO crypto_prices_inserted (crypto_id, price_inr, volume_24h_inr, extracted_at)
+VALUES (?, ?, ?, ?)
+"""
+
+ROLLUP_QUERIES = [upsert_candles_query(table, 'crypto_prices_inserted', 'sqlite') for table in ROLLUP_TABLES]
+
+REBUILD_ROLLUP_SOURCE = """(
+    SELECT crypto_id, price_inr, volume_24h_inr, extracted_at
+    FROM crypto_prices
+    WHERE extracted_at >= :start AND extracted_at < :end
+)"""
+
+# SQLite applies the upsert row by row, so feeding staging rows oldest first
+# through the extracted_at guard leaves each coin's newest row (the job
+# DISTINCT ON does in Postgres). Unchanged coins are skipped as in Postgres;
+# IS NOT is SQLite's null-safe row comparison.
+MERGE_SNAPSHOT_QUERY = f"""
+INSERT INTO crypto_prices_latest ({', '.join(PRICE_COLUMNS)})
+SELECT {', '.join(PRICE_COLUMNS)} FROM crypto_prices_staging WHERE true
+ORDER BY extracted_at
+ON CONFLICT (crypto_id) DO UPDATE SET
+    crypto_name = excluded.crypto_name,
+    price_inr = excluded.price_inr,
+    market_cap_inr = excluded.market_cap_inr,
+    volume_24h_inr = excluded.volume_24h_inr,
+    price_change_24h_pct = excluded.price_change_24h_pct,
+    price_category = excluded.price_category,
+    is_positive_change = excluded.is_positive_change,
+    extracted_at = excluded.extracted_at,
+    updated_at = CURRENT_TIMESTAMP
+WHERE crypto_prices_latest.extracted_at <= excluded.extracted_at
+  AND ({', '.join(f'crypto_prices_latest.{column}' for column in SNAPSHOT_VALUE_COLUMNS)})
+      IS NOT ({', '.join(f'excluded.{column}' for column in SNAPSHOT_VALUE_COLUMNS)})
+"""
+
+BUMP_ROW_COUNT_QUERY = """
+UPDATE crypto_table_stats
+SET row_count = row_count + ?, updated_at = CURRENT_TIMESTAMP
+WHERE table_name = 'crypto_prices'
+RETURNING row_count
+"""
+
+RECORD_BATCH_QUERY = """
+INSERT INTO crypto_load_ledger (batch_id, row_count, rows_inserted, first_extracted_at, last_extracted_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (batch_id) DO NOTHING
+"""
+
+INSERT_FX_QUERY = f"""
+INSERT INTO crypto_prices_fx ({', '.join(FX_COLUMNS)})
+VALUES ({', '.join('?' * len(FX_COLUMNS))})
+ON CONFLICT (crypto_id, currency, extracted_at) DO NOTHING
+"""
+
+RECENT_PRICES_QUERY = """
+SELECT crypto_id, COUNT(*)
+FROM crypto_prices
+WHERE extracted_at >= ?
+GROUP BY crypto_id
+ORDER BY crypto_id
+"""
+
+RECENT_HISTORY_QUERY = """
+SELECT crypto_id, price_inr, extracted_at
+FROM (
+    SELECT crypto_id, price_inr, extracted_at,
+           ROW_NUMBER() OVER (PARTITION BY crypto_id ORDER BY extracted_at DESC) AS recency
+    FROM crypto_prices
+    WHERE extracted_at >= ?
+) recent
+WHERE recency <= ?
+ORDER BY extracted_at
+"""
+
+def to_records(df, columns):
+    """Rows of plain Python values for executemany: timestamps as text, missing values as None"""
+    df = df[columns].copy()
+    for column in columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime(TIMESTAMP_FORMAT)
+    return list(df.astype(object).where(pd.notna(df), None).itertuples(index=False, name=None))
+
+class SQLiteLoader(StorageBackend):
+    """
+    crypto_prices, crypto_prices_latest and crypto_prices_fx in one SQLite
+    file with the same upsert semantics as PostgresLoader. A batch is
+    executemany'd into a temp staging table and merged into both targets
+    inside one transaction. SQLite has a single writer, so loads from
+    several threads take turns on one shared connection.
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or Config.SQLITE_PATH
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self.lock = threading.Lock()
+        # Transactions are opened explicitly with BEGIN IMMEDIATE
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        for name, value in PRAGMAS.items():
+            self.connection.execute(f"PRAGMA {name} = {value}")
+        self._schema_ready = False
+        self.ensure_schema()
+        self.connection.executescript(STAGING_TABLE_QUERY)
+
+    def _batch_committed(self, batch, rows):
+        """Ledger lookup (call with the lock held)"""
+        if self.connection.execute("SELECT 1 FROM crypto_load_ledger WHERE batch_id = ?", (batch,)).fetchone() is None:
+            return False
+        logger.info(f"✓ Batch {batch} ({rows} rows) already committed, skipped")
+        return True
+
+    def _record_batch(self, cursor, batch, df, rows_inserted):
+        record = batch_record(batch, df, rows_inserted)
+        cursor.execute(RECORD_BATCH_QUERY, record[:3] + tuple(ts.strftime(TIMESTAMP_FORMAT) for ts in record[3:]))
+
+    def ensure_schema(self):
+        """Create tables on first use; later calls are free"""
+        if self._schema_ready:
+            return
+        with self.lock:
+            self.connection.executescript(SCHEMA)
+            existing = {row[1] for row in self.connection.execute("PRAGMA table_info(crypto_prices)")}
+            for column, column_type in ANALYTICS_SQLITE_TYPES.items():
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE crypto_prices ADD COLUMN {column} {column_type}")
+            self._schema_ready = True
+        logger.info(f"✓ SQLite schema ready ({self.path})")
+
+    def load(self, df, rejected=None):
+        """
+        Insert new rows into crypto_prices and move crypto_prices_latest forward.
+        Returns: Number of new rows inserted into crypto_prices.
+        """
+        logger.info(f"Loading {len(df)} records to SQLite")
+        batch = batch_id(df)
+        records = to_records(history_rows(df), PRICE_HISTORY_COLUMNS)
+
+        with self.lock:
+            if self._batch_committed(batch, len(df)):
+                return 0
+
+            cursor = self.connection.cursor()
+            try:
+                load_start = time.perf_counter()
+                cursor.execute("BEGIN IMMEDIATE")
+
+                cursor.execute("DELETE FROM crypto_prices_staging")
+                cursor.execute("DELETE FROM crypto_prices_inserted")
+                cursor.executemany(INSERT_STAGING_QUERY, records)
+
+                inserted = cursor.execute(MERGE_HISTORY_QUERY).fetchall()
+                inserted_ids = [row[0] for row in inserted]
+                cursor.execute(MERGE_SNAPSHOT_QUERY)
+                snapshot_rows = cursor.rowcount
+
+                # Fold only the newly inserted rows into the candles
+                cursor.executemany(INSERT_INSERTED_QUERY, inserted)
+                for query in ROLLUP_QUERIES:
+                    cursor.execute(query)
+
+                total_records = cursor.execute(BUMP_ROW_COUNT_QUERY, (len(inserted_ids),)).fetchone()[0]
+                self._record_batch(cursor, batch, df, len(inserted_ids))
+                cursor.execute("DELETE FROM crypto_prices_staging")
+
+                cursor.execute("COMMIT")
+                notify_commit()
+            except sqlite3.Error as e:
+                if self.connection.in_transaction:
+                    cursor.execute("ROLLBACK")
+                logger.error("Transaction rolled back due to error")
+                logger.error(f"Database error: {e}")
+                raise
+            finally:
+                cursor.close()
+
+        elapsed = time.perf_counter() - load_start
+        rows_per_sec = len(df) / elapsed if elapsed > 0 else float('inf')
+        logger.info(f"✓ Inserted: {len(inserted_ids)}, skipped (already loaded): {len(df) - len(inserted_ids)}")
+        logger.info(f"✓ Snapshot rows changed: {snapshot_rows} of {df['crypto_id'].nunique()} coins")
+        logger.info(f"✓ SQLite load took {elapsed:.4f}s ({rows_per_sec:,.0f} rows/sec)")
+
+        verify_load(df, inserted_ids, total_records)
+        return len(inserted_ids)
+
+    def copy_load(self, df, rejected=None):
+        """SQLite has no COPY; the staged executemany load is its bulk path"""
+        return self.load(df, rejected)
+
+    def fx_load(self, df):
+        """Insert long-format currency conversions. Returns: Number of new rows."""
+        batch = batch_id(df, FX_COLUMNS, prefix='fx-')
+        records = to_records(df, FX_COLUMNS)
+        with self.lock:
+            if self._batch_committed(batch, len(df)):
+                return 0
+
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                before = self.connection.total_changes
+                cursor.executemany(INSERT_FX_QUERY, records)
+                inserted = self.connection.total_changes - before
+                self._record_batch(cursor, batch, df, inserted)
+                cursor.execute("COMMIT")
+                notify_commit()
+            except sqlite3.Error as e:
+                if self.connection.in_transaction:
+                    self.connection.execute("ROLLBACK")
+                logger.error("Currency load failed.")
+                logger.error(f"Error: {e}")
+                raise
+            finally:
+                cursor.close()
+
+        logger.info(f"✓ {len(records)} currency rows processed, {inserted} new.")
+        return inserted
+
+    def rebuild_rollups(self, since, until):
+        """Recompute every candle of the days covering [since, until]. Returns: Candles written per table."""
+        start, end = rebuild_bounds(since, until)
+        bounds = {'start': start.strftime(TIMESTAMP_FORMAT), 'end': end.strftime(TIMESTAMP_FORMAT)}
+        logger.info(f"Rebuilding candles for {start:%Y-%m-%d} to {end:%Y-%m-%d} (exclusive)")
+
+        written = {}
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                for table in ROLLUP_TABLES:
+                    self.connection.execute(
+                        f"DELETE FROM {table} WHERE bucket_start >= :start AND bucket_start < :end", bounds
+                    )
+                    written[table] = self.connection.execute(
+                        upsert_candles_query(table, REBUILD_ROLLUP_SOURCE, 'sqlite'), bounds
+                    ).rowcount
+                self.connection.execute("COMMIT")
+                notify_commit()
+            except sqlite3.Error as e:
+                if self.connection.in_transaction:
+                    self.connection.execute("ROLLBACK")
+                logger.error(f"Rollup rebuild rolled back: {e}")
+                raise
+
+        logger.info(f"✓ Rebuilt candles: {written}")
+        return written
+
+    def recent_counts(self, minutes=5):
+        """Rows per crypto written in the last `minutes` minutes"""
+        since = datetime.now() - timedelta(minutes=minutes)
+        with self.lock:
+            return self.connection.execute(RECENT_PRICES_QUERY, (since.strftime(TIMESTAMP_FORMAT),)).fetchall()
+
+    def recent_history(self, since, per_coin):
+        """Up to per_coin most recent prices per crypto since `since`, oldest first"""
+        with self.lock:
+            rows = self.connection.execute(
+                RECENT_HISTORY_QUERY, (since.strftime(TIMESTAMP_FORMAT), per_coin)
+            ).fetchall()
+
+        history = pd.DataFrame(rows, columns=['crypto_id', 'price_inr', 'extracted_at'])
+        history['price_inr'] = history['price_inr'].astype('float64')
+        history['extracted_at'] = pd.to_datetime(history['extracted_at'], format=TIMESTAMP_FORMAT)
+        return history
+
+    def fetch(self, query, params=()):
+        """Rows of a read-only query; datetime parameters are bound in the stored text format"""
+        params = tuple(p.strftime(TIMESTAMP_FORMAT) if isinstance(p, datetime) else p for p in params)
+        with self.lock:
+            return self.connection.execute(query, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+        logger.debug("SQLite connection closed")
@@ -0,0 +1,78 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from analytics import RollingAnalytics
+
+
+def ticks(crypto_id, prices, start=datetime(2026, 2, 14, 10, 0)):
+    return pd.DataFrame({
+        'crypto_id': crypto_id,
+        'price_inr': prices,
+        'extracted_at': [start + timedelta(minutes=i) for i in range(len(prices))],
+    })
+
+
+def test_rolling_stats_match_pandas_over_many_ticks():
+    prices = np.random.default_rng(7).lognormal(15, 0.01, 500).round(2)
+    analytics = RollingAnalytics(window=20, z_threshold=4, min_periods=5)
+
+    # One tick per batch, the way the live pipeline feeds it
+    results = pd.concat([analytics.update(ticks('bitcoin', [p])) for p in prices], ignore_index=True)
+
+    expected = pd.Series(prices).rolling(20, min_periods=1)
+    assert np.allclose(results['rolling_mean'], expected.mean())
+    assert np.allclose(results['rolling_std'][1:], expected.std()[1:])
+    assert (results['rolling_min'] == expected.min()).all()
+    assert (results['rolling_max'] == expected.max()).all()
+
+
+def test_spike_is_flagged_against_the_window_before_it():
+    prices = [100.0, 101.0, 99.0, 100.5, 99.5, 100.0, 101.0, 99.0, 100.0, 100.5, 250.0]
+    analytics = RollingAnalytics(window=10, z_threshold=4, min_periods=5)
+
+    df = analytics.update(ticks('solana', prices))
+
+    assert df['is_price_anomaly'].tolist() == [False] * 10 + [True]
+    assert df['price_zscore'].iloc[-1] > 4
+    assert np.isnan(df['price_zscore'].iloc[0])
+
+
+def test_coins_are_independent_and_warm_start_fills_windows():
+    analytics = RollingAnalytics(window=5, z_threshold=4, min_periods=3)
+    analytics.warm_start(pd.concat([ticks('bitcoin', [10.0, 20.0, 30.0]), ticks('ethereum', [1.0, 2.0])]))
+
+    batch = pd.DataFrame({
+        'crypto_id': ['bitcoin', 'ethereum', 'cardano'],
+        'price_inr': [40.0, 3.0, np.nan],
+        'extracted_at': datetime(2026, 2, 14, 11, 0),
+    })
+    df = analytics.update(batch)
+
+    assert df['rolling_mean'].iloc[0] == pytest.approx(25.0)
+    assert df['rolling_max'].iloc[1] == 3.0
+    # A missing price leaves the coin's window untouched
+    assert np.isnan(df['rolling_mean'].iloc[2])
+
+
+def test_buffers_grow_without_losing_existing_coins():
+    analytics = RollingAnalytics(window=3, z_threshold=4, min_periods=2, capacity=2)
+    analytics.update(ticks('bitcoin', [1.0, 2.0]))
+
+    many = pd.DataFrame({
+        'crypto_id': ['bitcoin'] + [f"coin-{i}" for i in range(10)],
+        'price_inr': 3.0,
+        'extracted_at': datetime(2026, 2, 14, 11, 0),
+    })
+    df = analytics.update(many)
+
+    assert df['rolling_mean'].iloc[0] == pytest.approx(2.0)
+    assert (df['rolling_mean'].iloc[1:] == 3.0).all()
@@ -0,0 +1,208 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from api_client import ApiClient, RequestScheduler, TokenBucket, parse_retry_after
+
+
+class FakeClock:
+    """Monotonic clock that only moves when something sleeps"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Replays a scripted list of responses / exceptions"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+        self.sent_headers = []
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        self.calls += 1
+        self.sent_headers.append(headers or {})
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_scheduler(script, clock, **kwargs):
+    options = dict(calls_per_minute=60, max_retries=3, backoff_base=1, backoff_max=8)
+    options.update(kwargs)
+    return RequestScheduler(session=FakeSession(script), clock=clock, sleep=clock.sleep, **options)
+
+
+def test_bucket_spaces_calls_at_the_configured_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(calls_per_minute=60, capacity=2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    # Two calls from the burst, then one per second
+    assert clock.now == pytest.approx(3.0)
+
+
+def test_retry_after_pauses_the_shared_budget():
+    clock = FakeClock()
+    scheduler = make_scheduler([FakeResponse(429, {'Retry-After': '7'}), FakeResponse(200)], clock)
+
+    response = scheduler.get('https://example.test/simple/price')
+
+    assert response.status_code == 200
+    assert clock.now >= 7
+    stats = scheduler.snapshot_stats()
+    assert stats['rate_limited'] == 1
+    assert stats['retried'] == 1
+    assert stats['throttled'] == 1
+
+
+def test_retry_after_is_capped_at_backoff_max():
+    clock = FakeClock()
+    scheduler = make_scheduler([FakeResponse(503, {'Retry-After': '86400'}), FakeResponse(200)], clock)
+
+    assert scheduler.get('https://example.test/simple/price').status_code == 200
+    # backoff_max is 8 in make_scheduler, plus at most one second for the bucket
+    assert 8 <= clock.now < 10
+
+
+def test_transient_failures_back_off_exponentially():
+    clock = FakeClock()
+    scheduler = make_scheduler([
+        requests.exceptions.Timeout(),
+        FakeResponse(503),
+        FakeResponse(502),
+        FakeResponse(200),
+    ], clock, calls_per_minute=6000)
+
+    response = scheduler.get('https://example.test/simple/price')
+
+    assert response.status_code == 200
+    backoffs = [s for s in clock.sleeps if s >= 0.5]
+    assert len(backoffs) == 3
+    # Jitter keeps each delay within [base * 2^n / 2, base * 2^n]
+    for attempt, delay in enumerate(backoffs):
+        assert 2 ** attempt / 2 <= delay <= 2 ** attempt
+    assert scheduler.snapshot_stats()['retried'] == 3
+
+
+def test_gives_up_after_max_retries():
+    clock = FakeClock()
+    scheduler = make_scheduler([requests.exceptions.ConnectionError()] * 3, clock, max_retries=2)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        scheduler.get('https://example.test/simple/price')
+
+    scheduler = make_scheduler([FakeResponse(503)] * 3, clock, max_retries=2)
+    assert scheduler.get('https://example.test/simple/price').status_code == 503
+
+
+def test_parse_retry_after_accepts_seconds_and_dates():
+    from datetime import datetime, timezone
+
+    now = datetime(2026, 2, 14, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after('12') == 12
+    assert parse_retry_after('Sat, 14 Feb 2026 12:00:30 GMT', now=now) == 30
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def make_client(script, clock, ttl=60):
+    scheduler = make_scheduler(script, clock, calls_per_minute=6000)
+    return ApiClient(scheduler=scheduler, ttl=ttl, clock=clock), scheduler.session
+
+
+def test_fresh_cache_entries_skip_the_network():
+    clock = FakeClock()
+    client, session = make_client([FakeResponse(200, body={'bitcoin': {'inr': 1.0}})], clock)
+
+    first = client.get_json('https://example.test/simple/price', {'ids': 'bitcoin'})
+    second = client.get_json('https://example.test/simple/price', {'ids': 'bitcoin'})
+
+    assert first == second == {'bitcoin': {'inr': 1.0}}
+    assert session.calls == 1
+    assert client.snapshot_stats()['cache_hits'] == 1
+
+
+def test_expired_entries_are_revalidated_with_etag():
+    clock = FakeClock()
+    client, session = make_client([
+        FakeResponse(200, headers={'ETag': '"v1"'}, body={'bitcoin': {'inr': 1.0}}),
+        FakeResponse(304),
+    ], clock, ttl=60)
+
+    client.get_json('https://example.test/simple/price', {'ids': 'bitcoin'})
+    clock.now += 61
+    data = client.get_json('https://example.test/simple/price', {'ids': 'bitcoin'})
+
+    assert data == {'bitcoin': {'inr': 1.0}}
+    assert session.sent_headers[1] == {'If-None-Match': '"v1"'}
+    assert client.snapshot_stats()['revalidated'] == 1
+
+    # The 304 refreshed the TTL
+    client.get_json('https://example.test/simple/price', {'ids': 'bitcoin'})
+    assert session.calls == 2
+
+
+def test_concurrent_callers_share_one_request():
+    release = threading.Event()
+
+    class SlowSession:
+        calls = 0
+
+        def get(self, url, params=None, timeout=None, headers=None):
+            SlowSession.calls += 1
+            release.wait(timeout=5)
+            return FakeResponse(200, body={'bitcoin': {'inr': 1.0}})
+
+    scheduler = RequestScheduler(calls_per_minute=6000, session=SlowSession())
+    client = ApiClient(scheduler=scheduler, ttl=60)
+    results = []
+
+    def call():
+        results.append(client.get_json('https://example.test/simple/price', {'ids': 'bitcoin'}))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert SlowSession.calls == 1
+    assert len(results) == 5
+    assert all(result is results[0] for result in results)
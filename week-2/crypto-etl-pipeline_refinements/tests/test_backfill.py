@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import backfill
+from backfill import BackfillCheckpoint, backfill_windows, run_backfill
+from transform import transform_market_chart
+
+
+def test_windows_cover_the_range_without_gaps():
+    windows = backfill_windows(datetime(2026, 1, 1), datetime(2026, 3, 15), window_days=30)
+
+    assert windows[0][0] == datetime(2026, 1, 1)
+    assert windows[-1][1] == datetime(2026, 3, 15)
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+    assert len(windows) == 3
+
+
+@pytest.fixture
+def india_time(monkeypatch):
+    """Run with the process clock on IST (UTC+5:30)"""
+    monkeypatch.setenv('TZ', 'Asia/Kolkata')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_market_chart_becomes_one_row_per_point(india_time):
+    chart = {
+        'prices': [[1771027200000, 5000000.123], [1771030800000, 5010000.0]],
+        'market_caps': [[1771027200000, 1.5e16], [1771030800000, 1.51e16]],
+        'total_volumes': [[1771027200000, 2.5e12]],
+    }
+
+    df = transform_market_chart('bitcoin', chart)
+
+    # 00:00 and 01:00 UTC, on the same local clock as the datetime.now() of live ticks
+    assert list(df['extracted_at']) == [pd.Timestamp('2026-02-14 05:30:00'), pd.Timestamp('2026-02-14 06:30:00')]
+    assert df['price_inr'].iloc[0] == 5000000.12
+    assert pd.isna(df['volume_24h_inr'].iloc[1])
+    assert (df['crypto_name'] == 'Bitcoin').all()
+
+
+def test_backfill_resumes_from_the_checkpoint(tmp_path, monkeypatch):
+    checkpoint_path = tmp_path / 'checkpoint.json'
+    loaded = []
+
+    def fake_window(crypto_id, window_start, window_end):
+        if crypto_id == 'ethereum' and window_start.month == 2 and not loaded.count('retry'):
+            raise RuntimeError("API down")
+        loaded.append((crypto_id, window_start.month))
+        return 10
+
+    monkeypatch.setattr(backfill, 'backfill_window', fake_window)
+    args = dict(crypto_ids=['bitcoin', 'ethereum'], window_days=31, workers=3, checkpoint_path=str(checkpoint_path))
+
+    # First run: one window fails and is not checkpointed
+    assert not run_backfill(datetime(2026, 1, 1), datetime(2026, 3, 1), **args)
+    assert len(loaded) == 3
+
+    # Second run only retries the failed window
+    loaded.clear()
+    loaded.append('retry')
+    assert run_backfill(datetime(2026, 1, 1), datetime(2026, 3, 1), **args)
+    assert loaded == ['retry', ('ethereum', 2)]
+
+    checkpoint = BackfillCheckpoint(str(checkpoint_path))
+    assert len(checkpoint.completed) == 4
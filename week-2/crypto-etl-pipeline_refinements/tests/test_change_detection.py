@@ -0,0 +1,121 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import pipeline
+from change_detection import ChangeDetector
+from config import Config
+from transform import transform_crypto_data
+from write_behind import WriteBehindLoader
+
+
+def poll(prices, extracted_at, last_updated_at=1771065000):
+    raw = {
+        crypto_id: {'inr': price, 'inr_24h_change': 1.0, 'last_updated_at': last_updated_at}
+        for crypto_id, price in prices.items()
+    }
+    return transform_crypto_data(raw, extracted_at=extracted_at)
+
+
+def test_only_changed_coins_pass(tmp_path):
+    detector = ChangeDetector(str(tmp_path / 'state.sqlite3'))
+
+    first = poll({'bitcoin': 5000000.0, 'ethereum': 250000.0}, datetime(2026, 2, 14, 10, 0))
+    assert len(detector.changed_rows(first)) == 2
+    detector.remember(first)
+
+    # Same quotes polled again a minute later, except bitcoin moved
+    second = poll({'bitcoin': 5000100.0, 'ethereum': 250000.0}, datetime(2026, 2, 14, 10, 1))
+    assert detector.changed_rows(second)['crypto_id'].tolist() == ['bitcoin']
+
+
+def test_new_coin_does_not_mark_remembered_ones_changed(tmp_path):
+    detector = ChangeDetector(str(tmp_path / 'state.sqlite3'))
+    detector.remember(poll({'bitcoin': 5000000.0}, datetime(2026, 2, 14, 10, 0)))
+
+    second = poll({'bitcoin': 5000000.0, 'ethereum': 250000.0}, datetime(2026, 2, 14, 10, 1))
+    assert detector.changed_rows(second)['crypto_id'].tolist() == ['ethereum']
+
+
+def test_fingerprints_survive_restarts(tmp_path):
+    path = str(tmp_path / 'state.sqlite3')
+    ChangeDetector(path).remember(poll({'bitcoin': 5000000.0}, datetime(2026, 2, 14, 10, 0)))
+
+    restarted = ChangeDetector(path)
+
+    assert restarted.changed_rows(poll({'bitcoin': 5000000.0}, datetime(2026, 2, 14, 10, 5))).empty
+    refreshed = poll({'bitcoin': 5000000.0}, datetime(2026, 2, 14, 10, 5), last_updated_at=1771065300)
+    assert len(restarted.changed_rows(refreshed)) == 1
+
+
+def test_failed_load_is_not_remembered(monkeypatch, tmp_path):
+    detector = ChangeDetector(str(tmp_path / 'state.sqlite3'))
+    df = poll({'bitcoin': 5000000.0}, datetime(2026, 2, 14, 10, 0))
+
+    def failing_load(df, rejected=None):
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(Config, 'CHANGE_DETECTION', True)
+    monkeypatch.setattr(Config, 'ANALYTICS', False)
+    monkeypatch.setattr(pipeline, 'get_change_detector', lambda: detector)
+    monkeypatch.setattr(pipeline, 'load', failing_load)
+
+    with pytest.raises(RuntimeError):
+        pipeline.load_batch(df, detect_changes=True)
+
+    monkeypatch.setattr(pipeline, 'load', lambda df, rejected=None: len(df))
+    assert pipeline.load_batch(df, detect_changes=True) == 1
+    assert pipeline.load_batch(df, detect_changes=True) == 0
+
+
+def test_dead_lettered_rows_are_not_remembered(monkeypatch, tmp_path):
+    detector = ChangeDetector(str(tmp_path / 'state.sqlite3'))
+    df = poll({'bitcoin': 5000000.0, 'ethereum': 250000.0}, datetime(2026, 2, 14, 10, 0))
+
+    def load_rejecting_ethereum(df, rejected=None):
+        rejected.append('ethereum')
+        return len(df) - 1
+
+    monkeypatch.setattr(Config, 'CHANGE_DETECTION', True)
+    monkeypatch.setattr(Config, 'ANALYTICS', False)
+    monkeypatch.setattr(Config, 'TARGET_CURRENCIES', [])
+    monkeypatch.setattr(pipeline, 'get_change_detector', lambda: detector)
+    monkeypatch.setattr(pipeline, 'load', load_rejecting_ethereum)
+
+    assert pipeline.load_batch(df, detect_changes=True) == 1
+    # bitcoin committed and is skipped next time; the dead-lettered ethereum row is offered again
+    assert detector.changed_rows(df)['crypto_id'].tolist() == ['ethereum']
+
+
+def test_identical_ticks_coalesced_by_write_behind_are_written_once(monkeypatch, tmp_path):
+    detector = ChangeDetector(str(tmp_path / 'state.sqlite3'))
+    written = []
+    monkeypatch.setattr(Config, 'CHANGE_DETECTION', True)
+    monkeypatch.setattr(Config, 'ANALYTICS', False)
+    monkeypatch.setattr(Config, 'TARGET_CURRENCIES', [])
+    monkeypatch.setattr(pipeline, 'get_change_detector', lambda: detector)
+    monkeypatch.setattr(pipeline, 'load', lambda df, rejected=None: written.append(df) or len(df))
+
+    # Two polls with the same quotes, queued while the database was slow; the
+    # second one arrives first to show the batch is ordered by extracted_at
+    first = poll({'bitcoin': 5000000.0, 'ethereum': 250000.0}, datetime(2026, 2, 14, 10, 0))
+    second = poll({'bitcoin': 5000000.0, 'ethereum': 250100.0}, datetime(2026, 2, 14, 10, 1))
+    loader = WriteBehindLoader(pipeline.load_batch)
+    try:
+        loader._write([(second, {'detect_changes': True}), (first, {'detect_changes': True})])
+    finally:
+        loader.close()
+
+    assert len(written) == 1
+    rows = written[0].sort_values(['crypto_id', 'extracted_at'])
+    assert list(zip(rows['crypto_id'], rows['extracted_at'].dt.minute)) == [
+        ('bitcoin', 0), ('ethereum', 0), ('ethereum', 1)
+    ]
+    # The latest tick is remembered, so a third identical poll is skipped
+    assert detector.changed_rows(second).empty
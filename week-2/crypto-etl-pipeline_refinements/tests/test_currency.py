@@ -0,0 +1,68 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import currency
+from config import Config
+from currency import conversion_factors, to_currencies
+
+# /exchange_rates quotes every currency against BTC
+RATES = pd.Series({'btc': 1.0, 'inr': 5000000.0, 'usd': 60000.0, 'eur': 55000.0})
+
+
+def test_factors_convert_from_the_base_currency():
+    factors = conversion_factors(RATES, base='inr', targets=['USD', 'eur'])
+
+    assert list(factors.index) == ['usd', 'eur']
+    assert factors['usd'] == pytest.approx(0.012)
+    assert factors['eur'] == pytest.approx(0.011)
+
+
+def test_unknown_currency_is_rejected():
+    with pytest.raises(ValueError, match='xyz'):
+        conversion_factors(RATES, base='inr', targets=['usd', 'xyz'])
+
+
+def test_long_format_has_one_row_per_coin_and_currency():
+    extracted_at = datetime(2026, 2, 14, 10, 30)
+    df = pd.DataFrame({
+        'crypto_id': ['bitcoin', 'cardano'],
+        'price_inr': [5000000.0, 50.0],
+        'market_cap_inr': [1e16, np.nan],
+        'volume_24h_inr': [2e12, np.nan],
+        'extracted_at': extracted_at,
+    })
+
+    long_df = to_currencies(df, conversion_factors(RATES, base='inr', targets=['usd', 'eur']))
+
+    assert list(zip(long_df['crypto_id'], long_df['currency'])) == [
+        ('bitcoin', 'usd'), ('bitcoin', 'eur'), ('cardano', 'usd'), ('cardano', 'eur')
+    ]
+    assert long_df['price'].tolist() == pytest.approx([60000.0, 55000.0, 0.6, 0.55])
+    assert long_df['market_cap'].isna().tolist() == [False, False, True, True]
+    assert (long_df['extracted_at'] == extracted_at).all()
+
+
+def test_exchange_rates_use_their_own_ttl(monkeypatch):
+    calls = []
+
+    class FakeClient:
+        def get_json(self, url, params=None, ttl=None):
+            calls.append((url, ttl))
+            return {'rates': {'btc': {'value': 1}, 'usd': {'value': 60000}}}
+
+    monkeypatch.setattr(currency, 'get_api_client', lambda: FakeClient())
+    monkeypatch.setattr(Config, 'FX_RATES_TTL', 900.0)
+
+    rates = currency.fetch_exchange_rates()
+
+    assert rates['usd'] == 60000.0
+    assert calls == [(f"{Config.API_BASE_URL}/exchange_rates", 900.0)]
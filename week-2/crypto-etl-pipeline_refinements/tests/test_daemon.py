@@ -0,0 +1,149 @@
+import json
+import os
+import signal
+import sys
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import api_client
+import daemon
+import extract
+from api_client import ApiClient, RequestScheduler
+from config import Config
+from daemon import Daemon
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_daemon(monkeypatch, durations, interval=10, on_tick=None):
+    """Daemon on a fake clock whose ticks take `durations` seconds, stopping after the last"""
+    clock = FakeClock()
+    started = []
+
+    def tick():
+        started.append(clock.now)
+        if on_tick:
+            on_tick(len(started))
+        clock.now += durations[len(started) - 1]
+        if len(started) == len(durations):
+            runner.stop()
+        return True
+
+    runner = Daemon(tick, interval=interval, clock=clock)
+
+    def wait(timeout):
+        clock.now += timeout
+        return runner.stopping.is_set()
+
+    monkeypatch.setattr(runner.stopping, 'wait', wait)
+    monkeypatch.setattr(daemon, 'take_write_behind_errors', lambda: [])
+    return runner, started
+
+
+def test_ticks_stay_on_schedule_and_overruns_skip_missed_slots(monkeypatch):
+    runner, started = make_daemon(monkeypatch, [3, 25, 4, 9.5])
+
+    assert runner.run() is True
+
+    # Tick 1 ran from 10 to 35, so the slots due at 20 and 30 are skipped
+    assert started == [0, 10, 40, 50]
+    assert runner.ticks_skipped == 2
+    assert runner.ticks_run == 4
+
+
+def test_sigterm_finishes_the_current_tick_then_stops(monkeypatch):
+    def send_sigterm(tick_number):
+        if tick_number == 2:
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    runner, started = make_daemon(monkeypatch, [1, 1, 1, 1], on_tick=send_sigterm)
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        runner.install_signal_handlers()
+        runner.run()
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    assert started == [0, 10]
+
+
+def test_failed_ticks_and_background_load_errors_are_counted(monkeypatch):
+    results = iter([True, False])
+    runner, _ = make_daemon(monkeypatch, [1, 1])
+    tick = runner.tick
+    runner.tick = lambda: tick() and next(results)
+    monkeypatch.setattr(daemon, 'take_write_behind_errors', lambda: [RuntimeError('db down')])
+
+    assert runner.run() is False
+    assert runner.ticks_failed == 3
+
+
+class PriceSession:
+    """HTTP session whose /simple/price quote moves on every call; each call takes a second"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        self.clock.now += 1
+        self.calls += 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({'bitcoin': {'inr': 5000000 + self.calls}}).encode()
+        return response
+
+
+def test_each_tick_fetches_fresh_prices_despite_the_api_cache(monkeypatch):
+    clock = FakeClock()
+    session = PriceSession(clock)
+    runners = []
+    prices = []
+
+    def warm_up():
+        # The process-wide client, created after run_daemon() has set Config up
+        scheduler = RequestScheduler(calls_per_minute=6000, session=session, clock=clock, sleep=lambda seconds: None)
+        api_client._client = ApiClient(scheduler=scheduler, clock=clock)
+
+    def run_pipeline(sinks=None):
+        prices.append(extract.fetch_crypto_prices(['bitcoin'])['bitcoin']['inr'])
+        if len(prices) == 3:
+            runners[0].stop()
+        return True
+
+    def fake_clock_daemon(tick, interval):
+        runner = Daemon(tick, interval=interval, clock=clock)
+
+        def wait(timeout):
+            clock.now += timeout
+            return runner.stopping.is_set()
+
+        monkeypatch.setattr(runner.stopping, 'wait', wait)
+        monkeypatch.setattr(runner, 'install_signal_handlers', lambda: None)
+        runners.append(runner)
+        return runner
+
+    monkeypatch.setattr(Config, 'WRITE_BEHIND', False)
+    monkeypatch.setattr(Config, 'API_CACHE_TTL', 60)
+    monkeypatch.setattr(api_client, '_client', None)
+    monkeypatch.setattr(daemon, 'warm_up', warm_up)
+    monkeypatch.setattr(daemon, 'run_pipeline', run_pipeline)
+    monkeypatch.setattr(daemon, 'Daemon', fake_clock_daemon)
+    monkeypatch.setattr(daemon, 'take_write_behind_errors', lambda: [])
+
+    # Ticks at 0, 60 and 120s. A response cached for 60s when it arrived at
+    # 1s would still be fresh at 60s, so that tick would reload old prices.
+    assert daemon.run_daemon(interval=60)
+    assert session.calls == 3
+    assert prices == [5000001, 5000002, 5000003]
@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import extract
+from extract import chunk_ids, fetch_crypto_prices_sharded
+
+
+def test_chunk_ids_keeps_order_and_remainder():
+    ids = [f"coin-{i}" for i in range(7)]
+
+    assert chunk_ids(ids, 3) == [ids[0:3], ids[3:6], ids[6:7]]
+    with pytest.raises(ValueError):
+        chunk_ids(ids, 0)
+
+
+def test_sharded_fetch_merges_shards_with_bounded_parallelism(monkeypatch):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    calls = []
+
+    def fake_fetch(ids):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            calls.append(ids)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return {crypto_id: {'inr': 1.0} for crypto_id in ids}
+
+    monkeypatch.setattr(extract, 'fetch_crypto_prices', fake_fetch)
+    ids = [f"coin-{i}" for i in range(10)]
+
+    data = fetch_crypto_prices_sharded(ids, shard_size=2, max_workers=3)
+
+    assert set(data) == set(ids)
+    assert all(len(shard) <= 2 for shard in calls)
+    assert len(calls) == 5
+    assert 1 < peak <= 3
+
+
+def test_sharded_fetch_raises_when_a_shard_fails(monkeypatch):
+    def fake_fetch(ids):
+        if 'coin-3' in ids:
+            raise RuntimeError("shard failed")
+        return {crypto_id: {} for crypto_id in ids}
+
+    monkeypatch.setattr(extract, 'fetch_crypto_prices', fake_fetch)
+
+    with pytest.raises(RuntimeError):
+        fetch_crypto_prices_sharded([f"coin-{i}" for i in range(6)], shard_size=2, max_workers=2)
+
+
+class FakeApiClient:
+    """Serves /coins/markets pages from a list, recording requested page numbers"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get_json(self, url, params=None, ttl=None):
+        self.requested.append(params['page'])
+        return self.pages[params['page'] - 1] if params['page'] <= len(self.pages) else []
+
+
+def test_market_pages_stop_at_the_first_short_page(monkeypatch):
+    client = FakeApiClient([[{'id': 'a'}, {'id': 'b'}], [{'id': 'c'}, {'id': 'd'}], [{'id': 'e'}]])
+    monkeypatch.setattr(extract, 'get_api_client', lambda: client)
+
+    pages = list(extract.iter_market_pages(per_page=2, max_pages=0))
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert client.requested == [1, 2, 3]
+
+
+def test_market_pages_are_fetched_lazily(monkeypatch):
+    client = FakeApiClient([[{'id': 'a'}, {'id': 'b'}]] * 5)
+    monkeypatch.setattr(extract, 'get_api_client', lambda: client)
+
+    pages = extract.iter_market_pages(per_page=2, max_pages=3)
+    next(pages)
+    assert client.requested == [1]
+
+    assert len(list(pages)) == 2
+    assert client.requested == [1, 2, 3]
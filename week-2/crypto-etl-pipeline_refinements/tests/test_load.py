@@ -0,0 +1,260 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import load
+from load import ANALYTICS_COLUMNS, PRICE_COLUMNS, PRICE_HISTORY_COLUMNS, dataframe_to_csv_buffer
+
+
+def make_price_frame():
+    """Two coins, one with missing market data"""
+    return pd.DataFrame([
+        {
+            'crypto_id': 'bitcoin', 'crypto_name': 'Bitcoin', 'price_inr': 5000000.12,
+            'market_cap_inr': 1.5e16, 'volume_24h_inr': 2.5e12, 'price_change_24h_pct': 1.25,
+            'extracted_at': datetime(2026, 2, 14, 10, 30), 'is_positive_change': True,
+            'price_category': 'High'
+        },
+        {
+            'crypto_id': 'cardano', 'crypto_name': 'Cardano', 'price_inr': 45.5,
+            'market_cap_inr': None, 'volume_24h_inr': None, 'price_change_24h_pct': None,
+            'extracted_at': datetime(2026, 2, 14, 10, 30), 'is_positive_change': None,
+            'price_category': 'Low'
+        },
+    ])
+
+
+class FakeCursor:
+    """Records executed SQL and returns canned result rows per statement"""
+
+    def __init__(self, results):
+        self.results = results
+        self.rowcount = -1
+        self.statements = []
+        self.copied = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+        self.rowcount = len(self.results.get(query, []))
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append(sql)
+        self.copied = buffer.getvalue()
+
+    def fetchall(self):
+        return self.results.get(self.statements[-1], [])
+
+    def fetchone(self):
+        rows = self.results.get(self.statements[-1], [])
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.closed = 0
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    """Single-connection stand-in for ThreadedConnectionPool"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.closed = False
+        self.checkouts = 0
+
+    def getconn(self):
+        self.checkouts += 1
+        return self.connection
+
+    def putconn(self, connection, close=False):
+        pass
+
+    def closeall(self):
+        self.closed = True
+
+
+def make_loader(results):
+    cursor = FakeCursor(results)
+    pool = FakePool(FakeConnection(cursor))
+    return load.PostgresLoader(pool=pool), cursor
+
+
+def test_csv_buffer_uses_table_column_order_and_empty_nulls():
+    buffer = dataframe_to_csv_buffer(make_price_frame())
+    lines = buffer.getvalue().splitlines()
+
+    assert len(lines) == 2
+    bitcoin = lines[0].split(',')
+    assert len(bitcoin) == len(PRICE_HISTORY_COLUMNS)
+    assert bitcoin[0] == 'bitcoin'
+    assert bitcoin[PRICE_COLUMNS.index('extracted_at')] == '2026-02-14 10:30:00'
+    # No analytics on this batch: the columns are there, empty
+    assert bitcoin[len(PRICE_COLUMNS):] == [''] * len(ANALYTICS_COLUMNS)
+
+    # Missing values must be empty fields so COPY reads them as NULL
+    cardano = lines[1].split(',')
+    assert cardano[PRICE_COLUMNS.index('market_cap_inr')] == ''
+    assert cardano[PRICE_COLUMNS.index('is_positive_change')] == ''
+
+
+def test_copy_load_reports_inserted_rows():
+    loader, cursor = make_loader({
+        'EXECUTE merge_history': [('bitcoin',)],
+        'EXECUTE merge_snapshot': [(), ()],
+        'EXECUTE bump_row_count (%s)': [(101,)],
+    })
+
+    inserted = loader.copy_load(make_price_frame())
+
+    # One row was new, the other already existed in crypto_prices
+    assert inserted == 1
+    assert cursor.copied.count('\n') == 2
+    assert cursor.statements.index('EXECUTE merge_history') < cursor.statements.index('EXECUTE merge_snapshot')
+
+
+def test_batch_already_in_ledger_is_skipped_before_copy():
+    loader, cursor = make_loader({'EXECUTE batch_committed (%s)': [(1,)]})
+
+    assert loader.copy_load(make_price_frame()) == 0
+    assert cursor.copied is None
+    assert 'EXECUTE merge_history' not in cursor.statements
+
+
+def test_batch_id_depends_on_content_not_row_labels():
+    df = make_price_frame()
+
+    assert load.batch_id(df) == load.batch_id(df.set_axis([7, 8]))
+    assert load.batch_id(df) != load.batch_id(df.iloc[:1])
+    assert load.batch_id(df, prefix='fx-').startswith('fx-')
+
+
+def test_schema_and_prepared_statements_are_set_up_once():
+    loader, cursor = make_loader({
+        'EXECUTE merge_history': [('bitcoin',), ('cardano',)],
+        'EXECUTE bump_row_count (%s)': [(2,)],
+    })
+
+    loader.copy_load(make_price_frame())
+    loader.copy_load(make_price_frame())
+
+    creates = [q for q in cursor.statements if 'CREATE TABLE IF NOT EXISTS crypto_prices_latest' in q]
+    prepares = [q for q in cursor.statements if q.startswith('PREPARE merge_history')]
+    assert len(creates) == 1
+    assert len(prepares) == 1
+    assert cursor.statements.count('EXECUTE merge_history') == 2
+
+
+def test_verification_never_scans_history():
+    loader, cursor = make_loader({
+        'EXECUTE merge_history': [('bitcoin',)],
+        'EXECUTE bump_row_count (%s)': [(5000000,)],
+    })
+
+    loader.copy_load(make_price_frame())
+
+    # Total size comes from the counter table, not COUNT(*) over crypto_prices
+    load_statements = cursor.statements[cursor.statements.index('EXECUTE merge_history'):]
+    assert not [q for q in load_statements if 'COUNT(*)' in q or 'GROUP BY' in q]
+    assert 'EXECUTE bump_row_count (%s)' in load_statements
+
+
+class ShrinkingPool(FakePool):
+    """Closes connections on return like a pool above minconn; the next one reuses the id"""
+
+    def getconn(self):
+        self.connection.closed = 0
+        return super().getconn()
+
+    def putconn(self, connection, close=False):
+        connection.closed = 1
+
+
+def test_connection_closed_by_pool_is_prepared_again():
+    cursor = FakeCursor({
+        'EXECUTE merge_history': [('bitcoin',)],
+        'EXECUTE bump_row_count (%s)': [(1,)],
+    })
+    loader = load.PostgresLoader(pool=ShrinkingPool(FakeConnection(cursor)))
+
+    loader.copy_load(make_price_frame())
+    loader.copy_load(make_price_frame())
+
+    # A fresh session has no temp staging table or prepared statements
+    staging = [q for q in cursor.statements if q == load.STAGING_TABLE_QUERY]
+    assert len(staging) == 2
+
+
+def test_csv_buffer_writes_compact_missing_values_as_empty_fields():
+    df = make_price_frame().astype({
+        'crypto_id': 'category', 'market_cap_inr': 'Int64', 'is_positive_change': 'boolean'
+    })
+
+    cardano = dataframe_to_csv_buffer(df).getvalue().splitlines()[1].split(',')
+
+    assert cardano[PRICE_COLUMNS.index('crypto_id')] == 'cardano'
+    assert cardano[PRICE_COLUMNS.index('market_cap_inr')] == ''
+    assert cardano[PRICE_COLUMNS.index('is_positive_change')] == ''
+
+
+class PoisonCursor(FakeCursor):
+    """COPY fails like Postgres would whenever the buffer holds the poison row"""
+
+    def __init__(self, results):
+        super().__init__(results)
+        self.copies = 0
+
+    def copy_expert(self, sql, buffer):
+        self.copies += 1
+        if 'poison' in buffer.getvalue():
+            raise psycopg2.DataError('numeric field overflow')
+        super().copy_expert(sql, buffer)
+
+
+def test_bad_row_is_bisected_into_dead_letters(monkeypatch):
+    dead_letters = []
+    monkeypatch.setattr(load, 'execute_values', lambda cursor, sql, rows, **kwargs: dead_letters.extend(rows))
+    cursor = PoisonCursor({'EXECUTE bump_row_count (%s)': [(64,)]})
+    loader = load.PostgresLoader(pool=FakePool(FakeConnection(cursor)))
+
+    df = pd.concat([make_price_frame()] * 32, ignore_index=True)
+    df['crypto_id'] = [f'coin{i}' for i in range(len(df))]
+    df.loc[37, 'crypto_id'] = 'poison'
+
+    rejected = []
+    loader.copy_load(df, rejected)
+
+    assert rejected == ['poison']
+    # One failing COPY per level plus its good sibling, not one per row
+    assert cursor.copies == 1 + 2 * 6
+    assert len(dead_letters) == 1
+    batch, pgcode, error, payload = dead_letters[0]
+    assert error == 'numeric field overflow'
+    assert '"crypto_id":"poison"' in payload
+    assert cursor.statements.count('DELETE FROM crypto_prices_staging') == 6
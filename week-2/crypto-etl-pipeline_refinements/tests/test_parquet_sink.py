@@ -0,0 +1,60 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+pytest.importorskip('pyarrow')
+
+from config import Config
+from parquet_sink import ParquetSink
+from transform import build_price_frame
+
+
+def batch(extracted_at, prices):
+    ids = pd.Series(list(prices))
+    return build_price_frame(
+        ids, ids.str.title(), list(prices.values()), 1e12, 1e9, 1.5, extracted_at
+    )
+
+
+def test_batches_land_in_date_and_coin_partitions(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'PARQUET_COMPACT_MIN_FILES', 0)
+    sink = ParquetSink(tmp_path)
+
+    rows, touched = sink.write(batch(datetime(2026, 2, 14, 23, 59), {'bitcoin': 5000000.0, 'solana': 12000.0}))
+    sink.write(batch(datetime(2026, 2, 15, 0, 1), {'bitcoin': 5100000.0}))
+
+    assert rows == 2 and len(touched) == 2
+    assert sorted(str(p.parent.relative_to(tmp_path)) for p in tmp_path.rglob('*.parquet')) == [
+        'dt=2026-02-14/crypto_id=bitcoin', 'dt=2026-02-14/crypto_id=solana', 'dt=2026-02-15/crypto_id=bitcoin'
+    ]
+    assert not list(tmp_path.rglob('.*.tmp'))
+
+    df = sink.read(crypto_ids=['bitcoin'])
+    assert df['price_inr'].tolist() == [5000000.0, 5100000.0]
+    assert df['market_cap_inr'].dtype == 'Int64'
+    assert sink.read(since=datetime(2026, 2, 15))['crypto_id'].tolist() == ['bitcoin']
+
+
+def test_small_files_are_compacted_without_losing_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'PARQUET_COMPACT_MIN_FILES', 3)
+    sink = ParquetSink(tmp_path)
+    partition = sink.partition_dir('2026-02-14', 'bitcoin')
+
+    for minute in range(4):
+        sink.write(batch(datetime(2026, 2, 14, 10, minute), {'bitcoin': 5000000.0 + minute}))
+
+    # Merged into one file on the third write, then one more small file
+    assert len(list(partition.glob('*.parquet'))) == 2
+    assert sink.compact() == 2
+    assert len(list(partition.glob('*.parquet'))) == 1
+
+    df = sink.read()
+    assert df['price_inr'].tolist() == [5000000.0 + minute for minute in range(4)]
+    assert df['extracted_at'].is_monotonic_increasing
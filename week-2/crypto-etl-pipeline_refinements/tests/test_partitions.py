@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from config import Config
+from partitions import (
+    PartitionManager, create_partition_sql, partition_name, partition_start, partitions_ahead,
+    partitions_between
+)
+
+
+def test_daily_partitions_cover_the_whole_range():
+    partitions = partitions_between(
+        datetime(2026, 2, 27, 23, 59), datetime(2026, 3, 1, 0, 0), 'daily'
+    )
+
+    assert [name for name, _, _ in partitions] == [
+        'crypto_prices_p20260227', 'crypto_prices_p20260228', 'crypto_prices_p20260301'
+    ]
+    # Bounds are contiguous so no timestamp falls between partitions
+    for (_, _, upper), (_, lower, _) in zip(partitions, partitions[1:]):
+        assert upper == lower
+
+
+def test_monthly_partitions_roll_over_the_year():
+    partitions = partitions_ahead(datetime(2026, 11, 14, 8, 0), 'monthly', ahead=2)
+
+    assert [(name, lower, upper) for name, lower, upper in partitions] == [
+        ('crypto_prices_p202611', datetime(2026, 11, 1), datetime(2026, 12, 1)),
+        ('crypto_prices_p202612', datetime(2026, 12, 1), datetime(2027, 1, 1)),
+        ('crypto_prices_p202701', datetime(2027, 1, 1), datetime(2027, 2, 1)),
+    ]
+
+
+def test_partition_ddl_uses_half_open_range():
+    lower = datetime(2026, 2, 14)
+    sql = create_partition_sql(partition_name(lower, 'daily'), lower, lower + timedelta(days=1))
+
+    assert sql == (
+        "CREATE TABLE IF NOT EXISTS crypto_prices_p20260214 PARTITION OF crypto_prices "
+        "FOR VALUES FROM ('2026-02-14 00:00:00') TO ('2026-02-15 00:00:00');"
+    )
+
+
+class RecordingCursor:
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+    def fetchall(self):
+        return [(name,) for name in self.existing]
+
+
+def test_manager_only_creates_missing_partitions():
+    now = datetime.now()
+    existing = [name for name, _, _ in partitions_ahead(now, 'daily', ahead=3)]
+    cursor = RecordingCursor(existing)
+    manager = PartitionManager('daily', ahead=3)
+
+    manager.ensure_for_batch(cursor, now - timedelta(days=1), now)
+    ddl = [q for q in cursor.statements if q.startswith('CREATE TABLE')]
+    assert ddl == [create_partition_sql(*partitions_between(now - timedelta(days=1), now - timedelta(days=1), 'daily')[0])]
+
+    # A second batch in the same window needs no catalog lookups or DDL
+    cursor.statements.clear()
+    manager.ensure_for_batch(cursor, now, now)
+    assert cursor.statements == []
+
+
+@pytest.mark.skipif(not os.getenv('TEST_DATABASE_URL'), reason="TEST_DATABASE_URL not set")
+def test_recent_query_prunes_old_partitions(monkeypatch):
+    psycopg2 = pytest.importorskip('psycopg2')
+    from load import RECENT_PRICES_QUERY, create_tables
+
+    monkeypatch.setattr(Config, 'PARTITION_GRANULARITY', 'daily')
+    connection = psycopg2.connect(os.environ['TEST_DATABASE_URL'])
+    try:
+        with connection.cursor() as cursor:
+            # Everything happens in one transaction that is rolled back
+            cursor.execute("CREATE SCHEMA partition_pruning_test; SET LOCAL search_path TO partition_pruning_test")
+            create_tables(cursor)
+
+            now = datetime.now()
+            PartitionManager('daily', ahead=1).ensure_for_batch(cursor, now - timedelta(days=10), now)
+
+            cursor.execute("EXPLAIN (FORMAT JSON) " + RECENT_PRICES_QUERY, (now - timedelta(minutes=5),))
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+
+        scanned = set()
+
+        def collect(node):
+            if 'Relation Name' in node:
+                scanned.add(node['Relation Name'])
+            for child in node.get('Plans', []):
+                collect(child)
+
+        collect(plan[0]['Plan'])
+
+        since = now - timedelta(minutes=5)
+        current = partition_name(partition_start(since, 'daily'), 'daily')
+        older = {name for name, _, _ in partitions_between(now - timedelta(days=10), since, 'daily')} - {current}
+        assert current in scanned
+        assert scanned.isdisjoint(older)
+    finally:
+        connection.rollback()
+        connection.close()
@@ -0,0 +1,83 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import pipeline
+import transform
+from config import Config
+from quality import QualityStore
+from raw_store import RawStore
+
+
+def test_markets_stream_writes_each_page_before_fetching_the_next(monkeypatch):
+    events = []
+
+    def fake_pages():
+        for number in (1, 2, 3):
+            events.append(f"fetch {number}")
+            yield [{'id': f"coin-{number}"}]
+
+    def fake_transform(page, extracted_at=None):
+        return pd.DataFrame({'crypto_id': [page[0]['id']], 'extracted_at': [extracted_at]})
+
+    def fake_load(df, rejected=None):
+        events.append(f"load {df['crypto_id'].iloc[0]}")
+        return len(df)
+
+    monkeypatch.setattr(pipeline, 'extract_market_pages', fake_pages)
+    monkeypatch.setattr(pipeline, 'transform', fake_transform)
+    monkeypatch.setattr(pipeline, 'load', fake_load)
+    monkeypatch.setattr(Config, 'RAW_LANDING', False)
+    monkeypatch.setattr(Config, 'CHANGE_DETECTION', False)
+    monkeypatch.setattr(Config, 'ANALYTICS', False)
+
+    assert pipeline.run_markets_stream() == 3
+    assert events == ['fetch 1', 'load coin-1', 'fetch 2', 'load coin-2', 'fetch 3', 'load coin-3']
+
+
+def test_replay_loads_landed_responses_without_the_api(monkeypatch, tmp_path):
+    store = RawStore(tmp_path)
+    extracted_at = datetime(2026, 2, 14, 10, 30)
+    store.append('simple_price', {'bitcoin': {'inr': 5000000}}, extracted_at)
+    store.append('markets', [{'id': 'ethereum', 'current_price': 250000}, {'id': 'solana', 'current_price': 12000}], extracted_at)
+
+    def no_api():
+        raise AssertionError("replay must not call the API")
+
+    loaded = []
+    monkeypatch.setattr(pipeline, 'get_raw_store', lambda: store)
+    monkeypatch.setattr(transform, 'get_quality_store', lambda: QualityStore(tmp_path / 'quality'))
+    monkeypatch.setattr(Config, 'ANALYTICS', False)
+    monkeypatch.setattr(pipeline, 'extract', no_api)
+    monkeypatch.setattr(pipeline, 'extract_market_pages', no_api)
+    monkeypatch.setattr(pipeline, 'load', lambda df, rejected=None: loaded.append(df) or len(df))
+
+    assert pipeline.run_pipeline(replay=True)
+    assert sorted(sorted(df['crypto_id']) for df in loaded) == [['bitcoin'], ['ethereum', 'solana']]
+    assert all((df['extracted_at'] == extracted_at).all() for df in loaded)
+
+
+def test_sinks_select_parquet_instead_of_postgres(monkeypatch):
+    written = []
+
+    class FakeSink:
+        def write(self, df):
+            written.append(df)
+            return len(df), []
+
+    def no_postgres(df, rejected=None):
+        raise AssertionError("postgres sink not selected")
+
+    monkeypatch.setattr(Config, 'ANALYTICS', False)
+    monkeypatch.setattr(pipeline, 'load', no_postgres)
+    monkeypatch.setattr(pipeline, 'get_parquet_sink', lambda: FakeSink())
+
+    df = pd.DataFrame({'crypto_id': ['bitcoin', 'solana'], 'extracted_at': [datetime(2026, 2, 14, 10, 30)] * 2})
+    assert pipeline.load_batch(df, sinks=['parquet']) == 2
+    assert written[0] is df
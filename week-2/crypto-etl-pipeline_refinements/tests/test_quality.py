@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from quality import QualityStore, check_quality
+from transform import transform_crypto_data, transform_market_page
+
+EXTRACTED_AT = datetime(2026, 2, 14, 10, 30)
+
+
+def coin(crypto_id, price, **fields):
+    row = {
+        'id': crypto_id, 'name': crypto_id.title(), 'current_price': price, 'market_cap': 1e12,
+        'total_volume': 1e9, 'price_change_percentage_24h': 1.5,
+        'last_updated': (EXTRACTED_AT - timedelta(minutes=2)).isoformat() + 'Z',
+    }
+    row.update(fields)
+    return row
+
+
+def test_failing_rows_are_quarantined_with_their_reasons():
+    df = transform_market_page([
+        coin('bitcoin', 5000000.0),
+        coin('ghost', None),
+        coin('broken', -3.0, total_volume=-1),
+        coin('stale', 100.0, last_updated=(EXTRACTED_AT - timedelta(days=2)).isoformat() + 'Z'),
+    ], extracted_at=EXTRACTED_AT)
+
+    passed, quarantined, metrics = check_quality(df)
+
+    assert passed['crypto_id'].tolist() == ['bitcoin']
+    assert dict(zip(quarantined['crypto_id'], quarantined['dq_failures'])) == {
+        'ghost': 'price_present',
+        'broken': 'price_positive;volume_non_negative',
+        'stale': 'quote_fresh',
+    }
+    assert metrics['rows'] == 4 and metrics['passed'] == 1 and metrics['quarantined'] == 3
+    assert metrics['failures'] == {
+        'price_present': 1, 'price_positive': 1, 'volume_non_negative': 1, 'quote_fresh': 1
+    }
+    assert metrics['price_min'] == metrics['price_max'] == 5000000.0
+
+
+def test_missing_optional_values_pass():
+    df = transform_market_page([
+        coin('new-coin', 12.5, market_cap=None, total_volume=None, price_change_percentage_24h=None,
+             last_updated=None),
+    ], extracted_at=EXTRACTED_AT)
+
+    passed, quarantined, metrics = check_quality(df)
+
+    assert len(passed) == 1 and quarantined.empty
+    assert metrics['nulls']['market_cap_inr'] == 1
+
+
+def test_store_appends_metrics_and_quarantine(tmp_path):
+    df = transform_market_page([coin('bitcoin', 5000000.0), coin('ghost', None)], extracted_at=EXTRACTED_AT)
+    _, quarantined, metrics = check_quality(df)
+    store = QualityStore(tmp_path)
+
+    store.record(metrics, quarantined)
+    store.record(metrics, quarantined)
+
+    [metrics_file] = (tmp_path / 'metrics').rglob('*.ndjson')
+    [quarantine_file] = (tmp_path / 'quarantine').rglob('*.ndjson')
+    assert [json.loads(line)['quarantined'] for line in metrics_file.read_text().splitlines()] == [1, 1]
+    assert [json.loads(line)['crypto_id'] for line in quarantine_file.read_text().splitlines()] == ['ghost', 'ghost']
+
+
+@pytest.fixture(params=['Asia/Kolkata', 'America/New_York'])
+def local_timezone(request, monkeypatch):
+    """Run with the process clock away from UTC"""
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_live_quotes_are_fresh_outside_utc(local_timezone):
+    raw = {
+        'bitcoin': {'inr': 5000000, 'inr_24h_change': 1.0, 'last_updated_at': int(time.time()) - 60},
+        'ethereum': {'inr': 250000, 'inr_24h_change': -0.5, 'last_updated_at': int(time.time()) - 30},
+    }
+
+    # Default extracted_at, as in a live run
+    passed, quarantined, _ = check_quality(transform_crypto_data(raw))
+
+    assert quarantined.empty
+    assert len(passed) == 2
@@ -0,0 +1,98 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+import query
+from query import TTLCache
+from sqlite_backend import SQLiteLoader
+from transform import build_price_frame
+
+
+def batch(extracted_at, prices, change=1.25):
+    ids = pd.Series(list(prices))
+    return build_price_frame(
+        ids, ids.str.title(), list(prices.values()), 1.5e16, 2.5e12, change, extracted_at
+    )
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    loader = SQLiteLoader(str(tmp_path / 'prices.sqlite3'))
+    fetches = []
+    fetch = loader.fetch
+    monkeypatch.setattr(loader, 'fetch', lambda sql, params=(): fetches.append(sql) or fetch(sql, params))
+    loader.fetches = fetches
+    monkeypatch.setattr(query, 'get_loader', lambda: loader)
+    monkeypatch.setattr(query, '_cache', TTLCache(maxsize=8, ttl=60))
+    yield loader
+    loader.close()
+
+
+def test_repeated_reads_are_cached_until_a_load_commits(loader):
+    loader.load(batch(datetime(2026, 2, 14, 10, 30), {'bitcoin': 5000000.0, 'cardano': 45.5}))
+
+    first = query.latest(['cardano', 'bitcoin'])
+    again = query.latest(['bitcoin', 'cardano', 'bitcoin'])
+
+    assert first['crypto_id'].tolist() == ['bitcoin', 'cardano']
+    assert first['extracted_at'].iloc[0] == datetime(2026, 2, 14, 10, 30)
+    pd.testing.assert_frame_equal(first, again)
+    assert len(loader.fetches) == 1
+
+    # Callers get their own copy
+    again.loc[0, 'price_inr'] = 0.0
+    assert query.latest(['bitcoin'])['price_inr'].iloc[0] == 5000000.0
+
+    loader.load(batch(datetime(2026, 2, 14, 10, 31), {'bitcoin': 5000100.0}))
+    assert query.latest(['bitcoin', 'cardano'])['price_inr'].tolist() == [5000100.0, 45.5]
+
+
+def test_history_reads_ticks_or_candles(loader):
+    for minute in range(3):
+        loader.load(batch(datetime(2026, 2, 14, 10, minute), {'bitcoin': 100.0 + minute}))
+    start, end = datetime(2026, 2, 14, 10, 1), datetime(2026, 2, 14, 11)
+
+    ticks = query.history('bitcoin', start, end)
+    candles = query.history('bitcoin', datetime(2026, 2, 14), end, interval='hour')
+
+    assert ticks['price_inr'].tolist() == [101.0, 102.0]
+    assert candles[['open_inr', 'close_inr', 'tick_count']].values.tolist() == [[100.0, 102.0, 3]]
+    with pytest.raises(ValueError):
+        query.history('bitcoin', start, end, interval='week')
+
+
+def test_top_movers_ranks_snapshot_by_24h_change(loader):
+    at = datetime(2026, 2, 14, 10, 30)
+    for coin, change in {'bitcoin': 2.0, 'cardano': -7.5, 'solana': 9.1, 'ripple': None}.items():
+        loader.load(batch(at, {coin: 1.0}, change=change))
+
+    assert query.top_movers(2)['crypto_id'].tolist() == ['solana', 'bitcoin']
+    assert query.top_movers(1, losers=True)['crypto_id'].tolist() == ['cardano']
+    assert 'crypto_prices_latest_change_idx' in str(loader.connection.execute(
+        f"EXPLAIN QUERY PLAN {query.top_movers_query(False, 'sqlite')}", (2,)
+    ).fetchall())
+
+
+def test_cache_evicts_least_recent_and_ignores_results_from_before_a_clear(monkeypatch):
+    cache = TTLCache(maxsize=2, ttl=10)
+    for key in 'abc':
+        cache.put(key, key, cache.get(key)[1])
+    assert cache.get('a') == (False, 0)
+    assert cache.get('c') == (True, 'c')
+
+    _, generation = cache.get('d')
+    cache.clear()
+    cache.put('d', 'stale', generation)
+    assert cache.get('d')[0] is False
+
+    clock = iter([100.0, 111.0])
+    monkeypatch.setattr(query.time, 'monotonic', lambda: next(clock))
+    cache.put('e', 'e', cache.generation)
+    assert cache.get('e')[0] is False
@@ -0,0 +1,46 @@
+import gzip
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from raw_store import RawStore
+
+
+def test_responses_are_partitioned_by_date_and_hour(tmp_path):
+    store = RawStore(tmp_path)
+
+    path = store.append('simple_price', {'bitcoin': {'inr': 1}}, datetime(2026, 2, 14, 9, 59))
+    store.append('simple_price', {'bitcoin': {'inr': 2}}, datetime(2026, 2, 14, 9, 1))
+
+    assert path.parent == tmp_path / 'dt=2026-02-14' / 'hour=09'
+    assert path.name.endswith('.ndjson.gz')
+    # Appends go to the same file as separate gzip members
+    with gzip.open(path, 'rt') as f:
+        assert len(f.readlines()) == 2
+
+
+def test_read_only_opens_partitions_in_range(tmp_path):
+    store = RawStore(tmp_path)
+    for hour in (8, 9, 10, 11):
+        store.append('markets', [{'id': f"coin-{hour}"}], datetime(2026, 2, 14, hour, 30))
+
+    since, until = datetime(2026, 2, 14, 9, 0), datetime(2026, 2, 14, 10, 45)
+    assert [p.name for p in store.partitions(since, until)] == ['hour=09', 'hour=10']
+    assert [payload[0]['id'] for _, payload, _ in store.read(since, until)] == ['coin-9', 'coin-10']
+
+
+def test_truncated_tail_keeps_earlier_records(tmp_path):
+    store = RawStore(tmp_path)
+    extracted_at = datetime(2026, 2, 14, 10, 0)
+    store.append('markets', [{'id': 'bitcoin'}], extracted_at)
+    path = store.append('markets', [{'id': 'ethereum'}], extracted_at)
+
+    # Simulate a crash halfway through writing the last record
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+
+    assert [payload[0]['id'] for _, payload, _ in store.read()] == ['bitcoin']
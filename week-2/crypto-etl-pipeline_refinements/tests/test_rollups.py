@@ -0,0 +1,79 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from rollups import rebuild_bounds
+from sqlite_backend import SQLiteLoader
+from transform import build_price_frame
+
+
+def ticks(*points):
+    """(crypto_id, 'HH:MM', price, volume) -> one frame"""
+    frame = pd.DataFrame(points, columns=['crypto_id', 'time', 'price', 'volume'])
+    return build_price_frame(
+        frame['crypto_id'], frame['crypto_id'].str.title(), frame['price'], 1e12, frame['volume'], 1.0,
+        pd.to_datetime('2026-02-14 ' + frame['time'])
+    )
+
+
+def candles(loader, table):
+    return loader.connection.execute(f"""
+        SELECT crypto_id, bucket_start, open_inr, high_inr, low_inr, close_inr, volume_24h_inr, tick_count
+        FROM {table} ORDER BY crypto_id, bucket_start
+    """).fetchall()
+
+
+@pytest.fixture
+def loader(tmp_path):
+    loader = SQLiteLoader(str(tmp_path / 'prices.sqlite3'))
+    yield loader
+    loader.close()
+
+
+def test_candles_follow_each_batch_in_any_order(loader):
+    loader.load(ticks(('bitcoin', '10:05', 100.0, 7), ('bitcoin', '10:20', 130.0, 8), ('solana', '10:10', 5.0, 1)))
+    # A later tick, then a late-arriving earlier one for the same hour
+    loader.load(ticks(('bitcoin', '10:40', 120.0, 9), ('bitcoin', '11:00', 125.0, 10)))
+    loader.load(ticks(('bitcoin', '10:01', 90.0, 6)))
+
+    assert candles(loader, 'crypto_candles_hourly') == [
+        ('bitcoin', '2026-02-14 10:00:00.000000', 90.0, 130.0, 90.0, 120.0, 9, 4),
+        ('bitcoin', '2026-02-14 11:00:00.000000', 125.0, 125.0, 125.0, 125.0, 10, 1),
+        ('solana', '2026-02-14 10:00:00.000000', 5.0, 5.0, 5.0, 5.0, 1, 1),
+    ]
+    assert candles(loader, 'crypto_candles_daily')[0] == (
+        'bitcoin', '2026-02-14 00:00:00.000000', 90.0, 130.0, 90.0, 125.0, 10, 5
+    )
+
+
+def test_reloaded_rows_are_not_counted_twice(loader):
+    batch = ticks(('bitcoin', '10:05', 100.0, 7), ('bitcoin', '10:20', 130.0, 8))
+    loader.load(batch)
+    loader.load(batch)
+
+    assert candles(loader, 'crypto_candles_hourly')[0][-1] == 2
+
+
+def test_rebuild_matches_incremental_candles(loader):
+    loader.load(ticks(('bitcoin', '10:05', 100.0, 7), ('solana', '23:59', 5.0, 1)))
+    loader.load(ticks(('bitcoin', '10:40', 120.0, 9), ('bitcoin', '11:00', 125.0, 10)))
+    incremental = {table: candles(loader, table) for table in ('crypto_candles_hourly', 'crypto_candles_daily')}
+    loader.connection.execute("UPDATE crypto_candles_hourly SET tick_count = 0")
+
+    written = loader.rebuild_rollups(datetime(2026, 2, 14, 12), datetime(2026, 2, 14, 13))
+
+    assert written == {'crypto_candles_hourly': 3, 'crypto_candles_daily': 2}
+    assert {table: candles(loader, table) for table in incremental} == incremental
+
+
+def test_rebuild_covers_whole_days():
+    assert rebuild_bounds(datetime(2026, 2, 14, 10, 30), datetime(2026, 2, 15, 1)) == (
+        datetime(2026, 2, 14), datetime(2026, 2, 16)
+    )
@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from load import ANALYTICS_COLUMNS
+from sqlite_backend import SQLiteLoader
+from transform import build_price_frame
+
+
+def batch(extracted_at, prices, market_cap=1.5e16):
+    ids = pd.Series(list(prices))
+    return build_price_frame(
+        ids, ids.str.title(), list(prices.values()), market_cap, 2.5e12, 1.25, extracted_at
+    )
+
+
+def with_analytics(df):
+    """df with the columns RollingAnalytics.update() adds, flagged as an anomaly"""
+    df['rolling_mean'] = 5000000.0
+    df['rolling_std'] = 25000.0
+    df['rolling_min'] = 4950000.0
+    df['rolling_max'] = 5050000.0
+    df['price_zscore'] = 16.0
+    df['is_price_anomaly'] = pd.array([True] * len(df), dtype='boolean')
+    return df
+
+
+@pytest.fixture
+def loader(tmp_path):
+    loader = SQLiteLoader(str(tmp_path / 'prices.sqlite3'))
+    yield loader
+    loader.close()
+
+
+def test_history_skips_duplicates_and_counts_rows(loader):
+    first = batch(datetime(2026, 2, 14, 10, 30), {'bitcoin': 5000000.12, 'cardano': 45.5}, market_cap=None)
+
+    assert loader.load(first) == 2
+    assert loader.load(first) == 0
+    assert loader.load(batch(datetime(2026, 2, 14, 10, 31), {'bitcoin': 5000100.0})) == 1
+
+    connection = loader.connection
+    assert connection.execute("SELECT row_count FROM crypto_table_stats").fetchone() == (3,)
+    assert connection.execute(
+        "SELECT market_cap_inr, is_positive_change, extracted_at FROM crypto_prices WHERE crypto_id = 'cardano'"
+    ).fetchone() == (None, 1, '2026-02-14 10:30:00.000000')
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ('wal',)
+
+
+def test_analytics_columns_are_stored_with_history(tmp_path):
+    path = str(tmp_path / 'prices.sqlite3')
+    # A file created before crypto_prices had analytics columns
+    SQLiteLoader(path).close()
+    connection = sqlite3.connect(path)
+    for column in ANALYTICS_COLUMNS:
+        connection.execute(f"ALTER TABLE crypto_prices DROP COLUMN {column}")
+    connection.close()
+
+    loader = SQLiteLoader(path)
+    try:
+        plain = batch(datetime(2026, 2, 14, 10, 30), {'bitcoin': 5000000.0})
+        analysed = with_analytics(batch(datetime(2026, 2, 14, 10, 31), {'bitcoin': 5400000.0}))
+        loader.load(plain)
+        loader.load(analysed)
+
+        assert loader.connection.execute(
+            f"SELECT {', '.join(ANALYTICS_COLUMNS)} FROM crypto_prices ORDER BY extracted_at"
+        ).fetchall() == [(None,) * 6, (5000000.0, 25000.0, 4950000.0, 5050000.0, 16.0, 1)]
+    finally:
+        loader.close()
+
+
+def test_reopening_a_file_keeps_its_data(tmp_path):
+    path = str(tmp_path / 'prices.sqlite3')
+    loader = SQLiteLoader(path)
+    loader.load(batch(datetime(2026, 2, 14, 10, 30), {'bitcoin': 5000000.0}))
+    loader.close()
+
+    reopened = SQLiteLoader(path)
+    try:
+        assert reopened.connection.execute("SELECT row_count FROM crypto_table_stats").fetchone() == (1,)
+        assert reopened.load(batch(datetime(2026, 2, 14, 10, 31), {'bitcoin': 5000100.0})) == 1
+    finally:
+        reopened.close()
+
+
+def test_snapshot_only_moves_forward(loader):
+    loader.load(batch(datetime(2026, 2, 14, 10, 31), {'bitcoin': 5000100.0}))
+    # Backfilled history and a batch holding two ticks of the same coin
+    loader.load(batch(datetime(2026, 2, 14, 9, 0), {'bitcoin': 4900000.0}))
+    two_ticks = pd.concat([
+        batch(datetime(2026, 2, 14, 10, 33), {'bitcoin': 5000300.0}),
+        batch(datetime(2026, 2, 14, 10, 32), {'bitcoin': 5000200.0}),
+    ], ignore_index=True)
+    loader.load(two_ticks)
+
+    assert loader.connection.execute(
+        "SELECT price_inr, extracted_at FROM crypto_prices_latest"
+    ).fetchall() == [(5000300.0, '2026-02-14 10:33:00.000000')]
+
+
+def test_unchanged_coins_leave_the_snapshot_alone(loader):
+    loader.load(batch(datetime(2026, 2, 14, 10, 30), {'bitcoin': 5000000.0, 'cardano': 45.5}))
+    loader.load(batch(datetime(2026, 2, 14, 10, 31), {'bitcoin': 5000000.0, 'cardano': 46.0}))
+
+    # bitcoin did not change, so its row still shows when it last did
+    assert loader.connection.execute(
+        "SELECT crypto_id, price_inr, extracted_at FROM crypto_prices_latest ORDER BY crypto_id"
+    ).fetchall() == [
+        ('bitcoin', 5000000.0, '2026-02-14 10:30:00.000000'),
+        ('cardano', 46.0, '2026-02-14 10:31:00.000000'),
+    ]
+
+
+def test_recent_history_reads_back_timestamps(loader):
+    for minute in range(5):
+        loader.load(batch(datetime(2026, 2, 14, 10, minute), {'bitcoin': 100.0 + minute}))
+
+    history = loader.recent_history(datetime(2026, 2, 14, 10, 1), per_coin=3)
+
+    assert history['price_inr'].tolist() == [102.0, 103.0, 104.0]
+    assert history['extracted_at'].iloc[-1] == datetime(2026, 2, 14, 10, 4)
+
+
+def test_fx_rows_are_inserted_once(loader):
+    from currency import to_currencies
+
+    fx = to_currencies(
+        batch(datetime(2026, 2, 14, 10, 30), {'bitcoin': 5000000.0}),
+        pd.Series({'usd': 0.012, 'btc': 2e-7})
+    )
+
+    assert loader.fx_load(fx) == 2
+    assert loader.fx_load(fx) == 0
+
+
+def test_committed_batch_is_recorded_and_not_reloaded(loader):
+    first = batch(datetime(2026, 2, 14, 10, 30), {'bitcoin': 5000000.12, 'cardano': 45.5})
+
+    assert loader.load(first) == 2
+    assert loader.load(first.copy()) == 0
+
+    assert loader.connection.execute(
+        "SELECT row_count, rows_inserted, first_extracted_at FROM crypto_load_ledger"
+    ).fetchall() == [(2, 2, '2026-02-14 10:30:00.000000')]
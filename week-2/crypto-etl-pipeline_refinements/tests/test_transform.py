@@ -1,3 +1,15 @@
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from transform import PRICE_DTYPES, transform_crypto_data, transform_market_page
+
+
 def test_transform_converts_nan_to_none():
     """
     Test that transform properly handles NaN values
@@ -13,10 +25,56 @@ def test_transform_converts_nan_to_none():
         }
     }
 
-    df = test_transform_converts_nan_to_none(incomplete_data)
+    df = transform_crypto_data(incomplete_data)
 
     # Check that NaN values can be converted to None
-    df_clean = df.where(pd.notna(df), None)
+    df_clean = df.astype(object).where(pd.notna(df), None)
 
     # Verify None values exist (not NaN)
-    assert df_clean['market_cap_usd'].iloc[0] is None
\ No newline at end of file
+    assert df_clean['market_cap_inr'].iloc[0] is None
+
+
+def test_market_page_matches_simple_price_layout():
+    page = [
+        {'id': 'bitcoin', 'name': 'Bitcoin', 'current_price': 5000000.123, 'market_cap': 1.5e16,
+         'total_volume': 2.5e12, 'price_change_percentage_24h': -1.234},
+        {'id': 'wrapped-bitcoin', 'name': 'Wrapped Bitcoin', 'current_price': 4999000.0,
+         'market_cap': None, 'total_volume': None, 'price_change_percentage_24h': None},
+    ]
+
+    df = transform_market_page(page)
+    simple = transform_crypto_data({'bitcoin': {'inr': 1.0}})
+
+    assert set(df.columns) == set(simple.columns)
+    assert list(df['crypto_name']) == ['Bitcoin', 'Wrapped Bitcoin']
+    assert df['price_inr'].iloc[0] == 5000000.12
+    assert df['is_positive_change'].iloc[0] == False
+    assert df['is_positive_change'].iloc[1] is pd.NA
+    assert list(df['price_category']) == ['High', 'High']
+
+
+def test_columnar_transform_bins_prices_and_keeps_missing_change_empty():
+    raw = {
+        'tether': {'inr': 9000.0, 'inr_24h_change': 0.0},
+        'wrapped-ether': {'inr': 9000.01, 'inr_24h_change': 2.5},
+        'bitcoin': {'inr': 90000.01, 'inr_24h_change': -0.5},
+        'new-coin': {},
+    }
+
+    df = transform_crypto_data(raw)
+
+    assert list(df['crypto_name']) == ['Tether', 'Wrapped Ether', 'Bitcoin', 'New Coin']
+    assert list(df['price_category'].astype(object).where(df['price_category'].notna(), None)) == [
+        'Low', 'Medium', 'High', None
+    ]
+    assert df['is_positive_change'].tolist() == [False, True, False, pd.NA]
+
+
+def test_transform_uses_the_compact_schema():
+    df = transform_crypto_data({
+        'bitcoin': {'inr': 5000000.0, 'inr_market_cap': 1.5e16, 'inr_24h_vol': 2.5e12, 'inr_24h_change': 1.2},
+        'cardano': {'inr': 45.5},
+    })
+
+    assert {column: str(df[column].dtype) for column in PRICE_DTYPES} == PRICE_DTYPES
+    assert df['market_cap_inr'].tolist() == [15000000000000000, pd.NA]
@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('DB_PASSWORD', 'test')
+
+from transform import build_price_frame
+from write_behind import WriteBehindLoader
+
+
+def batch(crypto_id, minute):
+    return build_price_frame(
+        pd.Series([crypto_id]), pd.Series([crypto_id.title()]), 100.0 + minute, 1e9, 1e6, 1.0,
+        datetime(2026, 2, 14, 10, minute)
+    )
+
+
+class GatedLoad:
+    """load_fn that holds its first call until released"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, df, **load_kwargs):
+        self.started.set()
+        self.release.wait(5)
+        self.calls.append((df, load_kwargs))
+        return len(df)
+
+
+def test_batches_queued_during_a_slow_load_are_coalesced():
+    load = GatedLoad()
+    loader = WriteBehindLoader(load, max_queued=8)
+
+    loader.submit(batch('bitcoin', 0), detect_changes=True)
+    assert load.started.wait(5)
+    for minute, crypto_id in enumerate(['solana', 'cardano', 'bitcoin'], start=1):
+        loader.submit(batch(crypto_id, minute), detect_changes=True)
+    load.release.set()
+    loader.close()
+
+    assert [len(df) for df, _ in load.calls] == [1, 3]
+    coalesced, load_kwargs = load.calls[1]
+    assert load_kwargs == {'detect_changes': True}
+    assert coalesced['crypto_id'].tolist() == ['solana', 'cardano', 'bitcoin']
+    assert coalesced['crypto_id'].dtype == 'category'
+    assert loader.records_loaded == 4
+
+
+def test_submit_blocks_while_the_queue_is_full():
+    load = GatedLoad()
+    loader = WriteBehindLoader(load, max_queued=1)
+
+    loader.submit(batch('bitcoin', 0))
+    assert load.started.wait(5)
+    loader.submit(batch('bitcoin', 1))
+
+    third = threading.Thread(target=loader.submit, args=(batch('bitcoin', 2),))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+
+    load.release.set()
+    third.join(5)
+    assert not third.is_alive()
+    loader.close()
+    assert loader.records_loaded == 3
+
+
+def test_load_errors_are_raised_by_flush():
+    def failing_load(df, **load_kwargs):
+        raise ValueError("database is down")
+
+    loader = WriteBehindLoader(failing_load)
+    loader.submit(batch('bitcoin', 0))
+
+    with pytest.raises(RuntimeError, match="database is down"):
+        loader.flush()
+    loader.close()
+    with pytest.raises(RuntimeError):
+        loader.submit(batch('bitcoin', 1))
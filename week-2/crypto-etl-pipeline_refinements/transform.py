@@ -1,91 +1,224 @@
 import pandas as pd
 from datetime import datetime
+from dateutil.tz import tzlocal
 from logger import setup_logger
 from config import Config
+from quality import check_quality, get_quality_store
 
 logger = setup_logger('Transform')
 
-def transform_crypto_data(raw_data):
+PRICE_BINS = [-float('inf'), 9000, 90000, float('inf')]
+PRICE_CATEGORIES = ['Low', 'Medium', 'High']
+NUMERIC_COLUMNS = ['price_inr', 'market_cap_inr', 'volume_24h_inr', 'price_change_24h_pct']
+
+# Compact in-memory schema of every transformed frame. Repeated strings are
+# categoricals (their categories use pandas 3's default string dtype, which is
+# Arrow-backed when pyarrow is installed), BIGINT columns are nullable Int64
+# and the trend is a nullable boolean, so missing values never force object.
+PRICE_DTYPES = {
+    'crypto_id': 'category',
+    'crypto_name': 'category',
+    'price_inr': 'float64',
+    'market_cap_inr': 'Int64',
+    'volume_24h_inr': 'Int64',
+    'price_change_24h_pct': 'float64',
+    'price_category': 'category',
+    'is_positive_change': 'boolean',
+}
+INTEGER_COLUMNS = [column for column, dtype in PRICE_DTYPES.items() if dtype == 'Int64']
+
+# crypto_id -> display name; ids repeat every run, so each is only titled once
+_crypto_names = {}
+
+def crypto_names(crypto_ids):
+    """Display names such as 'Wrapped Bitcoin' for a Series of crypto ids"""
+    names = crypto_ids.map(_crypto_names)
+    new_ids = crypto_ids[names.isna()].drop_duplicates()
+    if not new_ids.empty:
+        _crypto_names.update(zip(new_ids, new_ids.str.replace('-', ' ').str.title()))
+        names = crypto_ids.map(_crypto_names)
+    return names
+
+def positive_change(change):
+    """True/False per row, <NA> where the 24h change is missing"""
+    return (change > 0).astype('boolean').mask(change.isna())
+
+def local_time(timestamps):
     """
-    Transform raw API data into structured DataFrame
+    UTC timestamps (tz-aware) as naive local time, the clock extracted_at
+    uses (datetime.now()), so the two can be compared and ordered
+    """
+    return timestamps.dt.tz_convert(tzlocal()).dt.tz_localize(None)
+
+def memory_per_row(df):
+    """Bytes per row including string contents"""
+    return df.memory_usage(deep=True).sum() / len(df) if len(df) else 0.0
+
+def apply_compact_schema(df):
+    """Cast a transformed frame to PRICE_DTYPES in place"""
+    # Whole units, so the cast to Int64 is exact
+    df[INTEGER_COLUMNS] = df[INTEGER_COLUMNS].round()
+    for column, dtype in PRICE_DTYPES.items():
+        if df[column].dtype != dtype:
+            df[column] = df[column].astype(dtype)
+    return df
+
+def add_calculated_columns(df):
+    """Trend, price category and rounding shared by every transform, one column at a time"""
+    # astype so missing values are NaN, not None, even in all-missing columns
+    df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].astype('float64')
+    df['is_positive_change'] = positive_change(df['price_change_24h_pct'])
+
+    # Price category: Low <= 9000 < Medium <= 90000 < High, empty without a price
+    df['price_category'] = pd.cut(df['price_inr'], bins=PRICE_BINS, labels=PRICE_CATEGORIES)
+
+    df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].round(2)
+    return apply_compact_schema(df)
+
+def build_price_frame(crypto_id, crypto_name, price, market_cap, volume, change, extracted_at,
+                      last_updated_at=pd.NaT):
+    """
+    Standard crypto_prices DataFrame from whole columns. last_updated_at
+    (when CoinGecko last refreshed the quote) feeds change detection and is
+    not written to the database.
+    """
+    df = pd.DataFrame({
+        'crypto_id': crypto_id,
+        'crypto_name': crypto_name,
+        'price_inr': price,
+        'market_cap_inr': market_cap,
+        'volume_24h_inr': volume,
+        'price_change_24h_pct': change,
+        'extracted_at': extracted_at,
+        'last_updated_at': last_updated_at
+    })
+    return add_calculated_columns(df)
+
+def transform_crypto_data(raw_data, extracted_at=None):
+    """
+    Transform raw /simple/price data into structured DataFrame
     """
 
     logger.info("Starting data transformation")
 
-    transformed_records = []
-    timestamp = datetime.now()
-
-    for crypto_id, values in raw_data.items():
-        try:
-            # Extract values with default
-            price = values.get(Config.VS_CURRENCY.lower(), None)
-            market_cap = values.get(f"{Config.VS_CURRENCY.lower()}_market_cap", None)
-            volume_24h = values.get(f"{Config.VS_CURRENCY.lower()}_24h_vol", None)
-            change_24h = values.get(f"{Config.VS_CURRENCY.lower()}_24h_change", None)
-
-            # Create record
-            record = {
-                'crypto_id': crypto_id,
-                'crypto_name': crypto_id.replace('-', ' ').title(),
-                'price_inr': price,
-                'market_cap_inr': market_cap,
-                'volume_24h_inr': volume_24h,
-                'price_change_24h_pct': change_24h,
-                'extracted_at': timestamp,
-                'is_positive_change': change_24h > 0 if change_24h else None
-            }
-
-            transformed_records.append(record)
-            logger.debug(f"Transformed {crypto_id}: ₹{price}")
-
-        except Exception as e:
-            logger.warning(f"Error transforming {crypto_id}: {e}")
-            continue
-
-    # Create DataFrame
-    df = pd.DataFrame(transformed_records)
-
-    # Add calculated columns
-    if not df.empty:
-        # Price category
-        df['price_category'] = df['price_inr'].apply(
-            lambda x: 'High' if x > 90000 else ('Medium' if x > 9000 else 'Low')
-        )
-
-        # Round numeric values
-        df['price_inr'] = df['price_inr'].round(2)
-        df['price_change_24h_pct'] = df['price_change_24h_pct'].round(2)  
-        df['volume_24h_inr'] = df['volume_24h_inr'].round(2)
-        df['market_cap_inr'] = df['market_cap_inr'].round(2)
-
-        logger.info(f"✓ Transformed {len(df)} records")
-        logger.debug(f"Columns: {list(df.columns)}")
-    else:
+    timestamp = extracted_at or datetime.now()
+    currency = Config.VS_CURRENCY.lower()
+
+    # One constructor call turns the {id: {field: value}} response into columns
+    data = pd.DataFrame(
+        list(raw_data.values()),
+        index=pd.Index(list(raw_data.keys()), dtype=object),
+        columns=[
+            currency, f"{currency}_market_cap", f"{currency}_24h_vol", f"{currency}_24h_change",
+            'last_updated_at'
+        ]
+    )
+
+    if data.empty:
         logger.warning("No records to transform!")
+        return pd.DataFrame()
+
+    data = data.rename_axis('crypto_id').reset_index()
+    df = build_price_frame(
+        data['crypto_id'],
+        crypto_names(data['crypto_id']),
+        data[currency],
+        data[f"{currency}_market_cap"],
+        data[f"{currency}_24h_vol"],
+        data[f"{currency}_24h_change"],
+        timestamp,
+        local_time(pd.to_datetime(data['last_updated_at'], unit='s', utc=True))
+    )
+
+    logger.info(f"✓ Transformed {len(df)} records")
+    logger.debug(f"Columns: {list(df.columns)}")
+    return df
+
+def transform_market_page(page, extracted_at=None):
+    """
+    Transform one /coins/markets page (list of coin dicts) into the same
+    DataFrame layout as transform_crypto_data
+    """
+    logger.info(f"Transforming markets page with {len(page)} coins")
 
+    timestamp = extracted_at or datetime.now()
+    df = pd.DataFrame(page, columns=[
+        'id', 'name', 'current_price', 'market_cap', 'total_volume', 'price_change_percentage_24h',
+        'last_updated'
+    ])
+
+    if df.empty:
+        logger.warning("No records to transform!")
+        return df
+
+    df = build_price_frame(
+        df['id'], df['name'], df['current_price'], df['market_cap'], df['total_volume'],
+        df['price_change_percentage_24h'], timestamp,
+        local_time(pd.to_datetime(df['last_updated'], utc=True))
+    )
+
+    logger.info(f"✓ Transformed {len(df)} records")
+    return df
+
+def transform_market_chart(crypto_id, chart):
+    """
+    Transform a /coins/{id}/market_chart/range response into the standard
+    DataFrame layout, one row per price point. The endpoint has no 24h
+    change, so price_change_24h_pct and is_positive_change stay empty.
+    Points are epoch milliseconds, stored as local time like live ticks.
+    """
+    prices = pd.DataFrame(chart.get('prices') or [], columns=['ts', 'price_inr'])
+    market_caps = pd.DataFrame(chart.get('market_caps') or [], columns=['ts', 'market_cap_inr'])
+    volumes = pd.DataFrame(chart.get('total_volumes') or [], columns=['ts', 'volume_24h_inr'])
+
+    df = prices.merge(market_caps, on='ts', how='left').merge(volumes, on='ts', how='left')
+    if df.empty:
+        logger.warning(f"No history points for {crypto_id}")
+        return df
+
+    df = build_price_frame(
+        crypto_id,
+        crypto_id.replace('-', ' ').title(),
+        df['price_inr'],
+        df['market_cap_inr'],
+        df['volume_24h_inr'],
+        float('nan'),
+        local_time(pd.to_datetime(df['ts'], unit='ms', utc=True))
+    )
+
+    logger.debug(f"Transformed {len(df)} history points for {crypto_id}")
     return df
 
-def transform(raw_data):
-    """Main transform function"""
+def transform(raw_data, extracted_at=None):
+    """
+    Main transform function. Accepts a /simple/price dict or a
+    /coins/markets page (list).
+    """
     logger.info("=" * 60)
     logger.info("TRANSFORM PHASE - STARTING...")
     logger.info("=" * 60)
 
     try:
-        df = transform_crypto_data(raw_data)
+        if isinstance(raw_data, list):
+            df = transform_market_page(raw_data, extracted_at=extracted_at)
+        else:
+            df = transform_crypto_data(raw_data, extracted_at=extracted_at)
 
-        # Data quality checks
+        # Data quality rules: failing rows are quarantined, not loaded
         logger.info("Running data quality checks...")
+        df, quarantined, metrics = check_quality(df)
+        get_quality_store().record(metrics, quarantined)
 
-        # Check for nulls
-        null_counts = df.isnull().sum()
-        if null_counts.any():
-            logger.warning(f"Null values found:\n{null_counts[null_counts > 0]}")
+        if metrics['nulls']:
+            logger.warning(f"Null values found: {metrics['nulls']}")
+        if metrics['quarantined']:
+            logger.warning(f"⚠ Quarantined {metrics['quarantined']} / {metrics['rows']} rows: {metrics['failures']}")
 
         # Summary stats
-        logger.info(f"Price range: ₹{df['price_inr'].min():.2f} - ₹{df['price_inr'].max():.2f}")
-        positive_changes = df['is_positive_change'].sum()
-        logger.info(f"Positive changes: {positive_changes} / {len(df)}")
+        logger.info(f"Memory: {memory_per_row(df):.0f} bytes/row ({df.memory_usage(deep=True).sum() / 1024:,.1f} KiB)")
+        if metrics['price_min'] is not None:
+            logger.info(f"Price range: ₹{metrics['price_min']:.2f} - ₹{metrics['price_max']:.2f}")
+        logger.info(f"Positive changes: {metrics['positive_changes']} / {metrics['passed']}")
 
         logger.info("✓ Transform phase completed successfully")
         return df
@@ -0,0 +1,167 @@
+# write_behind.py - Background loader thread so extraction never waits on the database
+import atexit
+import queue
+import threading
+import time
+import pandas as pd
+from logger import setup_logger
+from config import Config
+from transform import apply_compact_schema
+
+logger = setup_logger('WriteBehind')
+
+_STOP = object()
+
+class WriteBehindLoader:
+    """
+    Transformed batches go onto a bounded queue and return immediately; one
+    loader thread drains it, concatenating whatever has piled up (up to
+    WRITE_BEHIND_MAX_ROWS) into a single load_fn call. When the queue is
+    full, submit() blocks until the loader catches up (backpressure), so a
+    stalled database bounds memory instead of growing it.
+
+    Load errors are logged by the thread and re-raised by flush()/close().
+    """
+
+    def __init__(self, load_fn, max_queued=None, max_rows=None):
+        self.load_fn = load_fn
+        self.max_rows = max_rows or Config.WRITE_BEHIND_MAX_ROWS
+        self.queue = queue.Queue(maxsize=max_queued or Config.WRITE_BEHIND_QUEUE_SIZE)
+        self.records_loaded = 0
+        self.errors = []
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self.thread.start()
+
+    def submit(self, df, **load_kwargs):
+        """Queue one batch for load_fn(df, **load_kwargs). Returns: Rows queued."""
+        if self.closed:
+            raise RuntimeError("Write-behind loader is closed")
+        if df.empty:
+            return 0
+
+        try:
+            self.queue.put_nowait((df, load_kwargs))
+        except queue.Full:
+            logger.warning(f"⚠ Write-behind queue full ({self.queue.maxsize} batches), waiting for the loader")
+            start = time.perf_counter()
+            self.queue.put((df, load_kwargs))
+            logger.info(f"Queue space after {time.perf_counter() - start:.2f}s")
+        return len(df)
+
+    def _drain(self, first):
+        """first plus every batch already queued, up to max_rows"""
+        items = [first]
+        if first is _STOP:
+            return items
+        rows = len(first[0])
+        while rows < self.max_rows:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            items.append(item)
+            if item is _STOP:
+                break
+            rows += len(item[0])
+        return items
+
+    def _write(self, batches):
+        """Coalesce consecutive batches with the same load arguments into one load"""
+        groups = []
+        for df, load_kwargs in batches:
+            if groups and groups[-1][1] == load_kwargs:
+                groups[-1][0].append(df)
+            else:
+                groups.append(([df], load_kwargs))
+
+        for frames, load_kwargs in groups:
+            start = time.perf_counter()
+            try:
+                # Categories differ between batches, so concat falls back to object; recompact
+                df = apply_compact_schema(pd.concat(frames, ignore_index=True)) if len(frames) > 1 else frames[0]
+                loaded = self.load_fn(df, **load_kwargs)
+            except Exception as e:
+                logger.error(f"✗ Write-behind load of {sum(map(len, frames))} rows failed: {e}")
+                self.errors.append(e)
+                continue
+            self.records_loaded += loaded
+            logger.info(
+                f"✓ Write-behind loaded {loaded} rows from {len(frames)} batch(es) "
+                f"in {time.perf_counter() - start:.2f}s ({self.queue.qsize()} still queued)"
+            )
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            items = self._drain(self.queue.get())
+            stopping = items[-1] is _STOP
+            try:
+                self._write([item for item in items if item is not _STOP])
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+    def take_errors(self):
+        """Load errors since the last call, leaving the loader running"""
+        errors = []
+        # pop() rather than swapping the list, so an error appended concurrently is never lost
+        while self.errors:
+            errors.append(self.errors.pop(0))
+        return errors
+
+    def _raise_errors(self):
+        errors = self.take_errors()
+        if errors:
+            raise RuntimeError(f"{len(errors)} write-behind load(s) failed, first: {errors[0]}") from errors[0]
+
+    def flush(self):
+        """Block until every queued batch has been loaded"""
+        self.queue.join()
+        self._raise_errors()
+
+    def close(self):
+        """Flush and stop the loader thread"""
+        if not self.closed:
+            self.closed = True
+            self.queue.put(_STOP)
+            self.thread.join()
+        self._raise_errors()
+
+_loader = None
+_loader_lock = threading.Lock()
+
+def get_write_behind(load_fn):
+    """Return the process-wide WriteBehindLoader, flushed at interpreter exit"""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                _loader = WriteBehindLoader(load_fn)
+                atexit.register(shutdown_write_behind)
+    return _loader
+
+def take_write_behind_errors():
+    """Background load errors since the last call (empty if write-behind never started)"""
+    loader = _loader
+    return loader.take_errors() if loader is not None else []
+
+def shutdown_write_behind():
+    """
+    Flush and stop the write-behind loader if one was started.
+    Returns: True if every queued batch was loaded.
+    """
+    global _loader
+    with _loader_lock:
+        loader, _loader = _loader, None
+    if loader is None:
+        return True
+
+    logger.info(f"Flushing write-behind queue ({loader.queue.qsize()} batches)...")
+    try:
+        loader.close()
+    except RuntimeError as e:
+        logger.error(f"✗ {e}")
+        return False
+    logger.info(f"✓ Write-behind flushed, {loader.records_loaded} records loaded")
+    return True